@@ -0,0 +1,72 @@
+"""
+Distance matrix cache benchmark for ATLAS routing problems
+Builds the road-factor matrix for the 12 distribution centers plus a few
+thousand stops around them, then times memory hits, disk (mmap) hits and
+incremental extension when a handful of stops are added.
+
+Usage (from backend/):
+    python benchmarks/matrix_benchmark.py --stops 3000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from distance_matrix import MatrixCache, pairwise_distances
+
+# Same sites as the logistics map (frontend LogisticsMap.jsx)
+DISTRIBUTION_CENTERS = np.array([
+    (34.0522, -118.2437), (41.8781, -87.6298), (40.7128, -74.0060), (29.7604, -95.3698),
+    (47.6062, -122.3321), (25.7617, -80.1918), (39.7392, -104.9903), (33.7490, -84.3880),
+    (33.4484, -112.0740), (42.3601, -71.0589), (32.7767, -96.7970), (37.7749, -122.4194),
+])
+
+
+def network(stops: int, seed: int = 0) -> np.ndarray:
+    """DCs first, then stops scattered within ~150 km of a random DC"""
+    rng = np.random.default_rng(seed)
+    around = DISTRIBUTION_CENTERS[rng.integers(0, len(DISTRIBUTION_CENTERS), size=stops)]
+    return np.vstack([DISTRIBUTION_CENTERS, around + rng.normal(0, 1.0, size=(stops, 2))])
+
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<40}{(time.perf_counter() - started) * 1e3:>10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time distance matrix cache paths")
+    parser.add_argument("--stops", type=int, default=3000)
+    parser.add_argument("--added", type=int, default=5, help="Stops added for the extension case")
+    args = parser.parse_args()
+
+    coords = network(args.stops)
+    extra = network(args.added, seed=1)[len(DISTRIBUTION_CENTERS):]
+    print(f"{len(coords)} locations, road metric, float32 matrix {len(coords) ** 2 * 4 / 2**20:.0f} MB")
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = MatrixCache(root)
+        timed("float64 compute, no cache", lambda: pairwise_distances(coords, coords, "road"))
+        timed("first request (compute + write)", lambda: cache.get(coords, "road"))
+        timed("repeat request (memory LRU)", lambda: cache.get(coords, "road"))
+        # A fresh cache on the same directory is what another worker or solver process sees
+        other = MatrixCache(root)
+        matrix, _ = timed("other process (disk mmap)", lambda: other.get(coords, "road"))
+        timed("  + touch every page", lambda: float(matrix.sum()))
+        extended, source = timed(f"{args.added} stops added (extension)", lambda: other.get(np.vstack([coords, extra]), "road"))
+        full = pairwise_distances(np.vstack([coords, extra]), np.vstack([coords, extra]), "road")
+        print(f"source={source}, max abs error vs float64 {np.abs(extended - full).max():.2e} km")
+        print(cache.get_stats())
+        print(other.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Serialization micro-benchmark for ATLAS API payloads
+Compares FastAPI's default response path (response_model validation +
+jsonable_encoder + json.dumps) with the fast path (pre-rendered orjson) for
+/api/agents, /api/command and /api/market/dashboard sized payloads.
+
+Usage (from backend/):
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=bench python benchmarks/serialization_benchmark.py
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import market_analytics
+import server
+from fast_json import FastJSONResponse, orjson
+from market_analytics import QuoteTable
+from market_data import SUPPLY_CHAIN_COMPANIES
+
+
+def agents_payload() -> List[Dict[str, Any]]:
+    updated_at = datetime.now(timezone.utc).isoformat()
+    return [dict(agent, updated_at=updated_at) for agent in server.AGENTS_DATA.values()]
+
+
+def command_result() -> Dict[str, Any]:
+    return {
+        "response": "Risk Sentinel activated. Scanning supplier network for potential disruptions and vulnerabilities.",
+        "components": ["agents", "metrics", "risk_alerts", "supplier_network", "blockchain", "quantum"],
+        "primary_agent": "risk",
+        "intent": "risk_assessment",
+    }
+
+
+def dashboard_payload() -> Dict[str, Any]:
+    """A dashboard shaped like the refresher's snapshot, built from synthetic quotes"""
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc).isoformat()
+    quotes = {}
+    for symbol in SUPPLY_CHAIN_COMPANIES:
+        price = rng.uniform(20, 500)
+        change = rng.uniform(-6, 6)
+        quotes[symbol] = {
+            "symbol": symbol,
+            "price": round(price, 2),
+            "previous_close": round(price / (1 + change / 100), 2),
+            "change": round(price * change / 100, 2),
+            "change_percent": round(change, 2),
+            "volume": rng.randint(10**5, 10**8),
+            "fifty_two_week_high": round(price * 1.3, 2),
+            "fifty_two_week_low": round(price * 0.7, 2),
+            "currency": "USD",
+            "exchange": "NMS",
+            "timestamp": now,
+        }
+    table = QuoteTable.from_quotes(quotes, SUPPLY_CHAIN_COMPANIES)
+    alerts, total = market_analytics.risk_alerts(table, limit=10)
+    return {
+        "quotes": quotes,
+        "sector_performance": market_analytics.sector_performance(table),
+        "risk_alerts": alerts,
+        "market_summary": {"total_companies": len(quotes), "alerts_count": total},
+        "timestamp": now,
+    }
+
+
+def default_agents() -> bytes:
+    # What FastAPI does for response_model=List[AgentStatus] when the handler builds models
+    models = [server.AgentStatus(**agent) for agent in agents_payload()]
+    validated = [server.AgentStatus.model_validate(m.model_dump()) for m in models]
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_agents() -> bytes:
+    return FastJSONResponse(agents_payload()).body
+
+
+def default_command(body: Dict[str, Any]) -> bytes:
+    # The handler builds a CommandResponse, then FastAPI validates it again for response_model
+    model = server.CommandResponse(**body)
+    return JSONResponse(jsonable_encoder(server.CommandResponse.model_validate(model.model_dump()))).body
+
+
+def fast_command() -> bytes:
+    return server.encode_command_response(command_result())
+
+
+def run(name: str, default: Callable[[], bytes], fast: Callable[[], bytes], number: int):
+    default_time = min(timeit.repeat(default, number=number, repeat=5)) / number
+    fast_time = min(timeit.repeat(fast, number=number, repeat=5)) / number
+    size = len(fast())
+    print(f"{name:<32}{size:>10,} B{default_time * 1e6:>14.1f} us{fast_time * 1e6:>14.1f} us{default_time / fast_time:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare default and fast JSON response paths")
+    parser.add_argument("--number", type=int, default=500, help="Calls per timing run")
+    args = parser.parse_args()
+
+    server.logger.setLevel("WARNING")
+    dashboard = dashboard_payload()
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}")
+    print(f"{'payload':<32}{'size':>12}{'default':>17}{'fast':>17}{'speedup':>10}")
+    run("/api/agents", default_agents, fast_agents, args.number)
+    command_body = json.loads(fast_command())
+    run("/api/command", lambda: default_command(command_body), fast_command, args.number)
+    run(
+        "/api/market/dashboard",
+        lambda: JSONResponse(jsonable_encoder(dashboard)).body,
+        lambda: FastJSONResponse(dashboard).body,
+        max(1, args.number // 10),
+    )
+    # The route itself re-encodes only when the refresher publishes a new snapshot
+    server.dashboard_response(dashboard)
+    run(
+        "/api/market/dashboard (cached)",
+        lambda: JSONResponse(jsonable_encoder(dashboard)).body,
+        lambda: server.dashboard_response(dashboard).body,
+        max(1, args.number // 10),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Command Response Cache for ATLAS Supply Chain OS
+Caches LLM command results by normalized text, with an optional TF-IDF
+similarity tier so paraphrased commands can reuse a recent answer
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Any, Awaitable, Callable, Set, Tuple
+
+# Filler words that do not change what an operator is asking for
+STOPWORDS = frozenset({
+    "a", "an", "the", "me", "my", "our", "us", "please", "pls", "can", "could", "would",
+    "you", "i", "to", "for", "of", "and", "is", "are", "now", "just", "quick", "quickly",
+})
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def tokenize(command: str) -> List[str]:
+    """Lowercase alphanumeric tokens with filler words removed"""
+    return [t for t in _NON_WORD.split(command.lower()) if t and t not in STOPWORDS]
+
+
+def normalize_command(command: str) -> str:
+    """Exact-tier cache key: case, punctuation, spacing and filler words are ignored"""
+    return " ".join(tokenize(command))
+
+
+def same_order(a: List[str], b: List[str]) -> bool:
+    """True when the tokens two commands share appear in the same order in both.
+
+    TF-IDF vectors are bags of words, so "shanghai to rotterdam" and "rotterdam to
+    shanghai" score as identical; this rejects such swaps while still allowing a
+    paraphrase that adds or drops words.
+    """
+    shared = set(a) & set(b)
+    return [t for t in a if t in shared] == [t for t in b if t in shared]
+
+
+class CommandResponseCache:
+    """TTL/LRU cache of command results with an inverted-index TF-IDF lookup for near duplicates"""
+
+    def __init__(self, ttl: float = None, max_entries: int = None, similarity_threshold: float = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("COMMAND_CACHE_TTL", 600))
+        self.max_entries = max_entries or int(os.environ.get("COMMAND_CACHE_MAX_ENTRIES", 1000))
+        # 0 disables the similarity tier; only exact normalized matches are served
+        self.similarity_threshold = (
+            similarity_threshold if similarity_threshold is not None
+            else float(os.environ.get("COMMAND_CACHE_SIMILARITY", 0.85))
+        )
+        # key -> (stored_at, result, term counts, guard)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Counter, Optional[str]]]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0, "coalesced": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        _, _, terms, _ = self._entries.pop(key)
+        for term in terms:
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _vector(self, terms: Counter) -> Dict[str, float]:
+        weights = {term: count * self._idf(term) for term, count in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def _fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def lookup(self, command: str, guard: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return (result, tier) where tier is "exact", "similar" or None on a miss
+
+        guard is an inexpensive classification of the command (e.g. the routed intent);
+        similarity hits are only accepted from entries stored with the same guard.
+        """
+        key = normalize_command(command)
+        result = self._fresh(key)
+        if result is not None:
+            return result, "exact"
+        if self.similarity_threshold <= 0 or not key:
+            return None, None
+
+        terms = Counter(key.split())
+        candidates: Set[str] = set()
+        for term in terms:
+            candidates |= self._postings.get(term, set())
+        if not candidates:
+            return None, None
+
+        query = self._vector(terms)
+        tokens = key.split()
+        best_key, best_score = None, self.similarity_threshold
+        for candidate in candidates:
+            _, _, candidate_terms, candidate_guard = self._entries[candidate]
+            if candidate_guard != guard:
+                continue
+            vector = self._vector(candidate_terms)
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score >= best_score and same_order(tokens, candidate.split()):
+                best_key, best_score = candidate, score
+        if best_key is None:
+            return None, None
+        result = self._fresh(best_key)
+        return (result, "similar") if result is not None else (None, None)
+
+    def store(self, command: str, result: Dict[str, Any], guard: Optional[str] = None):
+        key = normalize_command(command)
+        if not key:
+            return
+        if key in self._entries:
+            self._remove(key)
+        terms = Counter(key.split())
+        self._entries[key] = (time.monotonic(), result, terms, guard)
+        for term in terms:
+            self._postings.setdefault(term, set()).add(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._postings.clear()
+
+    async def get_or_compute(
+        self,
+        command: str,
+        compute: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]],
+        guard: Optional[str] = None,
+        bypass: bool = False,
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Serve from cache or run compute(), which returns (result, cacheable); concurrent identical commands share one call"""
+        if bypass:
+            self.stats["bypassed"] += 1
+            result, cacheable = await compute()
+            if cacheable:
+                self.store(command, result, guard)
+            return result, None
+
+        result, tier = self.lookup(command, guard)
+        if result is not None:
+            self.stats["hits" if tier == "exact" else "similar_hits"] += 1
+            return dict(result), tier
+
+        key = normalize_command(command)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return dict(await asyncio.shield(inflight)), "coalesced"
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result, cacheable = await compute()
+            if cacheable:
+                self.store(command, result, guard)
+            future.set_result(result)
+            return result, None
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        served = self.stats["hits"] + self.stats["similar_hits"] + self.stats["coalesced"]
+        lookups = served + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+        }
+
+
+_command_cache: Optional[CommandResponseCache] = None
+
+
+def get_command_cache() -> CommandResponseCache:
+    """Get or create the command cache singleton"""
+    global _command_cache
+    if _command_cache is None:
+        _command_cache = CommandResponseCache()
+    return _command_cache
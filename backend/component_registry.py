@@ -0,0 +1,72 @@
+"""
+UI Component Registry for ATLAS Supply Chain OS
+Maps component names to payload providers and keeps their JSON encodings,
+so command responses are assembled from pre-serialized fragments
+"""
+
+from typing import Callable, Dict, Hashable, List, Optional, Any, Tuple
+
+from fast_json import dumps
+
+# Caching policies for a component's encoded payload
+CACHE_STATIC = "static"   # encoded once, until invalidated
+CACHE_NONE = "none"       # encoded on every request
+
+Provider = Callable[[Dict[str, Any]], Any]
+
+
+def encode_json(value: Any) -> bytes:
+    return dumps(value)
+
+
+class ComponentRegistry:
+    """name -> (provider, policy) table with a memo of encoded component fragments"""
+
+    def __init__(self, encoder: Callable[[Any], bytes] = encode_json):
+        self.encode = encoder
+        self._providers: Dict[str, Tuple[Provider, str]] = {}
+        self._encoded: Dict[Tuple[str, Hashable], bytes] = {}
+        self.stats = {"encoded": 0, "reused": 0}
+
+    def register(self, name: str, provider: Provider, cache: str = CACHE_STATIC):
+        """Register a payload provider; provider(context) returns the component's "data" value"""
+        if cache not in (CACHE_STATIC, CACHE_NONE):
+            raise ValueError(f"Unknown cache policy {cache!r} for component {name}")
+        self._providers[name] = (provider, cache)
+        self.invalidate(name)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop cached encodings for one component (or all) after its source data changed"""
+        if name is None:
+            self._encoded.clear()
+            return
+        for cached in [k for k in self._encoded if k[0] == name]:
+            del self._encoded[cached]
+
+    def memo(self, name: str, key: Hashable, build: Callable[[], Any]) -> bytes:
+        """Encoded value of build(), kept under (name, key) until invalidate(name)"""
+        cached = self._encoded.get((name, key))
+        if cached is not None:
+            self.stats["reused"] += 1
+            return cached
+        encoded = self.encode(build())
+        self.stats["encoded"] += 1
+        self._encoded[(name, key)] = encoded
+        return encoded
+
+    def fragment(self, name: str, context: Dict[str, Any]) -> Optional[bytes]:
+        """Encoded {"type": name, "data": ...} object, or None for an unknown component"""
+        entry = self._providers.get(name)
+        if entry is None:
+            return None
+        provider, cache = entry
+        build = lambda: {"type": name, "data": provider(context)}
+        if cache == CACHE_NONE:
+            self.stats["encoded"] += 1
+            return self.encode(build())
+        return self.memo(name, None, build)
+
+    def encode_components(self, names: List[str], context: Dict[str, Any]) -> bytes:
+        """JSON array of the named components' fragments; unknown names are skipped"""
+        fragments = [self.fragment(name, context) for name in names]
+        return b"[" + b",".join(f for f in fragments if f is not None) + b"]"
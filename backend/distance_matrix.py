@@ -0,0 +1,235 @@
+"""
+Distance Matrix Cache for ATLAS Supply Chain OS
+Vectorized euclidean/haversine/road-factor matrices keyed on the location set,
+held in an in-memory LRU and shared on disk as memory-mapped float32 arrays
+"""
+
+import hashlib
+import itertools
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+# Typical ratio of road to great-circle distance for regional trucking
+DEFAULT_ROAD_FACTOR = 1.3
+METRICS = ("euclidean", "haversine", "road")
+
+# Reuse a cached matrix for a new location set only if it covers at least this share of it
+MIN_OVERLAP = 0.5
+MAX_EXTENSION_CANDIDATES = 8
+
+
+def pairwise_distances(a: np.ndarray, b: np.ndarray, metric: str = "euclidean", road_factor: float = DEFAULT_ROAD_FACTOR) -> np.ndarray:
+    """len(a) x len(b) distances; haversine and road take (lat, lon) degrees and return km"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    if metric in ("haversine", "road"):
+        lat_a, lon_a = np.radians(a[:, 0])[:, None], np.radians(a[:, 1])[:, None]
+        lat_b, lon_b = np.radians(b[:, 0])[None, :], np.radians(b[:, 1])[None, :]
+        h = np.sin((lat_a - lat_b) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_a - lon_b) / 2) ** 2
+        dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+        return dist * road_factor if metric == "road" else dist
+    if metric == "euclidean":
+        return np.hypot(a[:, 0][:, None] - b[:, 0][None, :], a[:, 1][:, None] - b[:, 1][None, :])
+    raise ValueError(f"Unknown distance metric {metric!r}; expected one of {', '.join(METRICS)}")
+
+
+def _row_keys(coords: np.ndarray) -> List[bytes]:
+    """One hashable value per location, for matching locations between sets"""
+    return [row.tobytes() for row in np.ascontiguousarray(coords, dtype=np.float64)]
+
+
+class MatrixCache:
+    """Distance matrices per (metric, road factor, location set): memory LRU, then disk, then extension, then compute.
+
+    Disk entries are .npy files opened with mmap, so every worker and solver process
+    on the host shares one copy through the page cache. A location set that mostly
+    overlaps a cached one reuses the known pairs and computes only the new rows.
+    """
+
+    def __init__(self, root: str = None, max_entries: int = None, max_disk_mb: float = None):
+        if root is None:
+            root = os.environ.get("MATRIX_CACHE_DIR", str(Path(__file__).parent / "data" / "distance_matrices"))
+        self.root = Path(root) if root else None
+        if self.root is not None:
+            self.root.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or int(os.environ.get("MATRIX_CACHE_ENTRIES", 4))
+        self.max_disk_bytes = (max_disk_mb or float(os.environ.get("MATRIX_CACHE_DISK_MB", 2048))) * 1024 * 1024
+        # key -> (coords, matrix); matrices are read-only memmaps when a disk root is set
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "extended": 0, "computed": 0, "pairs_computed": 0}
+
+    @staticmethod
+    def key(coords: np.ndarray, metric: str, road_factor: float) -> str:
+        digest = hashlib.sha1(np.ascontiguousarray(coords, dtype=np.float64).tobytes()).hexdigest()[:20]
+        factor = f"-{road_factor:g}" if metric == "road" else ""
+        return f"{metric}{factor}-{len(coords)}-{digest}"
+
+    def get(self, coords: np.ndarray, metric: str = "euclidean", road_factor: float = DEFAULT_ROAD_FACTOR) -> Tuple[np.ndarray, str]:
+        """The float32 matrix for coords and where it came from: memory, disk, extended or computed"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown distance metric {metric!r}; expected one of {', '.join(METRICS)}")
+        coords = np.ascontiguousarray(coords, dtype=np.float64)
+        key = self.key(coords, metric, road_factor)
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return self._entries[key][1], "memory"
+
+        matrix = self._load(key)
+        if matrix is not None:
+            self.stats["disk_hits"] += 1
+            self._remember(key, coords, matrix)
+            return matrix, "disk"
+
+        prefix = key.rsplit("-", 2)[0]
+        matrix = self._extend(coords, prefix, metric, road_factor)
+        source = "extended"
+        if matrix is None:
+            matrix = pairwise_distances(coords, coords, metric, road_factor).astype(np.float32)
+            self.stats["pairs_computed"] += len(coords) ** 2
+            source = "computed"
+        self.stats[source] += 1
+        matrix = self._store(key, coords, matrix)
+        self._remember(key, coords, matrix)
+        return matrix, source
+
+    def _remember(self, key: str, coords: np.ndarray, matrix: np.ndarray):
+        self._entries[key] = (coords, matrix)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ---------- incremental extension ----------
+
+    def _candidates(self, prefix: str):
+        """Cached (coords, matrix) pairs with the same metric, in memory first, then on disk"""
+        for key, entry in reversed(self._entries.items()):
+            if key.rsplit("-", 2)[0] == prefix:
+                yield key, entry
+        if self.root is None:
+            return
+        for path in sorted(self.root.glob(f"{prefix}-*.coords.npy"), key=lambda p: p.stat().st_mtime, reverse=True):
+            key = path.name[: -len(".coords.npy")]
+            if key.rsplit("-", 2)[0] != prefix or key in self._entries:
+                continue
+            matrix = self._load(key)
+            if matrix is not None:
+                yield key, (np.load(path), matrix)
+
+    def _extend(self, coords: np.ndarray, prefix: str, metric: str, road_factor: float) -> Optional[np.ndarray]:
+        """Build from the cached set sharing the most locations, computing only rows for new ones"""
+        rows = _row_keys(coords)
+        best = None
+        for _, (cached_coords, matrix) in itertools.islice(self._candidates(prefix), MAX_EXTENSION_CANDIDATES):
+            index = {row: i for i, row in enumerate(_row_keys(cached_coords))}
+            mapped = np.fromiter((index.get(row, -1) for row in rows), dtype=np.int64, count=len(rows))
+            overlap = int((mapped >= 0).sum())
+            if best is None or overlap > best[0]:
+                best = (overlap, mapped, matrix)
+            if overlap == len(rows):
+                break
+        if best is None or best[0] < MIN_OVERLAP * len(coords):
+            return None
+
+        _, mapped, parent = best
+        known = np.flatnonzero(mapped >= 0)
+        new = np.flatnonzero(mapped < 0)
+        matrix = np.empty((len(coords), len(coords)), dtype=np.float32)
+        k = len(known)
+        if np.array_equal(known, np.arange(k)) and np.array_equal(mapped[:k], np.arange(k)):
+            # Stops appended to an unchanged set: a block copy instead of a gather
+            matrix[:k, :k] = parent[:k, :k]
+        else:
+            matrix[np.ix_(known, known)] = parent[np.ix_(mapped[known], mapped[known])]
+        if len(new):
+            block = pairwise_distances(coords[new], coords, metric, road_factor).astype(np.float32)
+            matrix[new, :] = block
+            matrix[:, new] = block.T
+            self.stats["pairs_computed"] += block.size
+        return matrix
+
+    # ---------- disk ----------
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npy"
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        if self.root is None:
+            return None
+        try:
+            return np.load(self._path(key), mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def _store(self, key: str, coords: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Write atomically and hand back a read-only map of the file; in memory only without a root"""
+        if self.root is None:
+            return matrix
+        try:
+            # Coordinates first: a matrix file without them would never be found for extension
+            self._write(self.root / f"{key}.coords.npy", coords)
+            self._write(self._path(key), matrix)
+            self._prune_disk()
+            return np.load(self._path(key), mmap_mode="r")
+        except OSError as e:
+            logger.warning(f"Could not write distance matrix {key}: {e}")
+            return matrix
+
+    def _write(self, path: Path, array: np.ndarray):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        os.close(fd)
+        try:
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=array.dtype, shape=array.shape)
+            out[:] = array
+            out.flush()
+            del out
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _prune_disk(self):
+        """Delete least recently written matrices beyond the disk budget"""
+        files = sorted(self.root.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.max_disk_bytes:
+                break
+            if path.name.endswith(".coords.npy"):
+                continue
+            coords_path = path.with_name(path.name[: -len(".npy")] + ".coords.npy")
+            for stale in (path, coords_path):
+                try:
+                    total -= stale.stat().st_size
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "root": str(self.root) if self.root is not None else None,
+        }
+
+
+_cache: Optional[MatrixCache] = None
+
+
+def get_matrix_cache() -> MatrixCache:
+    """Process-wide cache; MATRIX_CACHE_DIR= (empty) keeps matrices in memory only"""
+    global _cache
+    if _cache is None:
+        _cache = MatrixCache()
+    return _cache
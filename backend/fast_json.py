@@ -0,0 +1,43 @@
+"""
+Fast JSON Serialization for ATLAS Supply Chain OS
+orjson-backed encoder and response class, with a stdlib fallback when
+orjson is not installed
+"""
+
+import json
+import os
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+# Fast mode returns trusted internal data as pre-rendered responses, skipping
+# response_model validation and jsonable_encoder; disable to use FastAPI's default path
+FAST_JSON_ENABLED = os.environ.get("API_FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> bytes:
+        # Pydantic models and other non-native types go through FastAPI's encoder
+        return orjson.dumps(value, default=jsonable_encoder, option=_OPTIONS)
+else:
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), default=jsonable_encoder).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content: Any) -> Any:
+    """Respond with trusted internal data; pre-rendered in fast mode, otherwise left to FastAPI"""
+    return FastJSONResponse(content) if FAST_JSON_ENABLED else content
@@ -0,0 +1,138 @@
+"""
+Write-Behind Buffer for ATLAS Supply Chain OS
+Collects documents in a bounded in-memory queue and flushes them to MongoDB
+with insert_many on size or time thresholds, off the request path
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Bounded async queue drained by one background task into collection.insert_many"""
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = None,
+        flush_interval: float = None,
+        max_queue: int = None,
+        put_timeout: float = 0.05,
+        max_retries: int = 3,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size or int(os.environ.get("COMMAND_HISTORY_BATCH_SIZE", 100))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.environ.get("COMMAND_HISTORY_FLUSH_INTERVAL", 1.0))
+        self.max_queue = max_queue or int(os.environ.get("COMMAND_HISTORY_MAX_QUEUE", 10000))
+        # How long a producer may be held back by a full queue before its record is dropped
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Documents taken off the queue but not yet handed to a write, and the write in progress;
+        # both survive cancellation of the flusher so drain() can finish them
+        self._batch: List[Dict[str, Any]] = []
+        self._writing: Optional[asyncio.Future] = None
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "dropped": 0, "failed": 0, "backpressure_waits": 0}
+
+    def start(self):
+        """Start the flusher on the running loop (idempotent)"""
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, document: Dict[str, Any]) -> bool:
+        """Queue one document; returns False if it was dropped because the buffer stayed full"""
+        self.start()
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.stats["backpressure_waits"] += 1
+            try:
+                await asyncio.wait_for(self._queue.put(document), timeout=self.put_timeout)
+            except asyncio.TimeoutError:
+                self.stats["dropped"] += 1
+                return False
+        self.stats["queued"] += 1
+        return True
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for one document, then keep collecting until the batch is full or the interval passes"""
+        batch = self._batch
+        batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        # Poll rather than wait_for(queue.get()) so a timeout can never swallow a document
+        while True:
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, self.POLL_INTERVAL))
+        self._batch = []
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        delay = 0.5
+        for attempt in range(self.max_retries):
+            try:
+                # insert_many adds _id to each dict; callers never see these documents again
+                await self.collection.insert_many(batch, ordered=False)
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    self.stats["failed"] += len(batch)
+                    logger.warning(f"Dropping {len(batch)} buffered {self.collection.name} records after {self.max_retries} attempts: {e}")
+                    return
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+
+    async def drain(self, timeout: float = 10.0):
+        """Stop the flusher and write everything still queued (called on shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        if self._queue is None:
+            return
+
+        async def flush_remaining():
+            if self._writing is not None:
+                await self._writing
+            if self._batch:
+                batch, self._batch = self._batch, []
+                await self._write(batch)
+            while not self._queue.empty():
+                batch = []
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                await self._write(batch)
+
+        try:
+            await asyncio.wait_for(flush_remaining(), timeout=timeout)
+        except asyncio.TimeoutError:
+            lost = self._queue.qsize()
+            self.stats["dropped"] += lost
+            logger.warning(f"Shutdown drain timed out with {lost} {self.collection.name} records unwritten")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self._queue.qsize() if self._queue is not None else 0}
@@ -0,0 +1,244 @@
+"""
+Intent Router for ATLAS Supply Chain OS
+Declarative keyword -> intent table compiled once into an Aho-Corasick
+automaton, so every command is classified in a single pass over its text
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    """One routable intent: lower priority wins, keywords are matched as lowercase substrings"""
+    intent: str
+    priority: int
+    keywords: Tuple[str, ...]
+    response: str
+    components: Tuple[str, ...]
+    primary_agent: str
+    # When False the canned response is returned even if the LLM produced text
+    use_llm_response: bool = True
+
+
+# Priorities follow the original if/elif order; each keyword has exactly one owner
+INTENT_RULES: Tuple[IntentRule, ...] = (
+    IntentRule(
+        "market_analysis", 0, ("market data",),
+        "Real-Time Market Intelligence activated. Displaying live Fortune 500 supply chain data from Yahoo Finance with sector performance and risk alerts.",
+        ("market_data", "agents"), "risk", use_llm_response=False,
+    ),
+    IntentRule(
+        "demand_analysis", 10, ("demand", "forecast", "predict", "sales"),
+        "Analyzing demand patterns. The Demand Agent is processing current market signals and historical data.",
+        ("agents", "metrics"), "demand",
+    ),
+    IntentRule(
+        "procurement", 20, ("procure", "supplier", "buy", "source", "purchase"),
+        "Activating Procurement Agent. Analyzing supplier options and negotiation opportunities.",
+        ("agents", "supplier_network", "blockchain"), "procurement",
+    ),
+    IntentRule(
+        "logistics_optimization", 30, ("route", "logistics", "ship", "deliver", "transport", "map"),
+        "Logistics Agent engaged. Interactive map displaying distribution centers, routes, and active shipments.",
+        ("map", "metrics"), "logistics",
+    ),
+    IntentRule(
+        "supplier_analysis", 40, ("network", "graph", "tier", "partner"),
+        "Displaying supplier network graph. Multi-tier relationships and risk indicators visualized.",
+        ("supplier_network", "risk_alerts"), "procurement",
+    ),
+    IntentRule(
+        "explainability", 50,
+        ("explain", "why", "reason", "logic", "symbolic", "trace", "decision", "rationale", "justif", "causal"),
+        "Neuro-Symbolic Reasoning Engine activated. Displaying decision traces with neural insights, symbolic rules, and compliance status.",
+        ("neuro_symbolic", "agents"), "orchestrator",
+    ),
+    IntentRule(
+        "scenario_planning", 60, ("scenario", "what if", "what-if", "simulate", "counterfactual", "planning"),
+        "Counterfactual Scenario Planner activated. Select a scenario to simulate cascading effects across the supply chain.",
+        ("scenario_planner",), "orchestrator",
+    ),
+    IntentRule(
+        "contracts", 70, ("contract", "smart contract", "agreement", "settlement", "payment", "terms"),
+        "Contract Intelligence module loaded. View active smart contracts, settlements, and create new agreements.",
+        ("contracts", "blockchain"), "procurement",
+    ),
+    IntentRule(
+        "audit", 80, ("timeline", "history", "audit", "decisions", "chronological", "replay"),
+        "Decision Timeline activated. View chronological agent decisions with full audit trail for board review.",
+        ("timeline",), "orchestrator",
+    ),
+    IntentRule(
+        "digital_twin", 90,
+        ("3d", "digital twin", "world model", "visualization", "physics", "cascade", "demand spike", "simulation", "dynamics"),
+        "Digital Twin loaded with physics-based simulation. Click nodes to trigger demand spikes and observe cascade effects through your supply chain network.",
+        ("world_model",), "orchestrator",
+    ),
+    IntentRule(
+        "demo", 100, ("demo", "walkthrough", "tour", "presentation", "showcase"),
+        "Interactive Demo Walkthrough started. Follow the guided tour of ATLAS capabilities.",
+        ("demo",), "orchestrator",
+    ),
+    IntentRule(
+        "market_analysis", 110,
+        ("market", "stock", "fortune", "yahoo", "finance", "price", "sector", "real-time", "realtime"),
+        "Real-Time Market Intelligence activated. Displaying live Fortune 500 supply chain data from Yahoo Finance with sector performance and risk alerts.",
+        ("market_data", "agents"), "risk",
+    ),
+    IntentRule(
+        "risk_assessment", 120, ("risk", "alert", "danger", "warning", "fail"),
+        "Risk Sentinel activated. Scanning supplier network for potential disruptions and vulnerabilities.",
+        ("agents", "risk_alerts", "supplier_network"), "risk",
+    ),
+    IntentRule(
+        "blockchain_view", 130, ("blockchain", "transaction", "settle", "ledger"),
+        "Accessing blockchain ledger. Smart contracts and settlements are displayed.",
+        ("blockchain", "quantum"), "orchestrator",
+    ),
+    IntentRule(
+        "quantum_view", 140, ("quantum", "qaoa", "optimization"),
+        "Quantum optimization console active. Displaying hybrid solver status and results.",
+        ("quantum",), "logistics",
+    ),
+    IntentRule(
+        "robotics", 150,
+        ("robot", "robotics", "autonomous", "warehouse automation", "amr", "agv", "drone", "embodied"),
+        "Embodied AI robotics console activated. Monitoring autonomous fleet: AMRs, AGVs, drones, and robotic arms.",
+        ("embodied_ai", "agents"), "logistics",
+    ),
+    IntentRule(
+        "edge_network", 160, ("6g", "edge", "latency", "bandwidth", "global network", "edge computing"),
+        "6G Edge Network dashboard activated. Displaying global edge node status, latency metrics, and bandwidth utilization.",
+        ("sixg_edge", "agents"), "orchestrator",
+    ),
+    IntentRule(
+        "blockchain_mainnet", 170, ("ethereum", "mainnet", "crypto", "eth"),
+        "Blockchain Mainnet console active. Ethereum L1 settlement layer showing live transactions and smart contract status.",
+        ("blockchain_mainnet", "agents"), "orchestrator",
+    ),
+    IntentRule(
+        "strategy", 180, ("strategy", "chess", "game theory", "competition", "competitor", "market position"),
+        "Strategic Chess BI engine activated. QEMASI analyzing competitive landscape and market positioning.",
+        ("chess_bi", "agents"), "orchestrator",
+    ),
+    IntentRule(
+        "erp_wms", 190, ("erp", "wms", "inventory", "orders", "warehouse", "fulfillment"),
+        "ERP/WMS Live Feed connected. Real-time inventory levels, order status, and shipment tracking now displayed.",
+        ("erp_wms",), "logistics",
+    ),
+    IntentRule(
+        "overview", 200, ("status", "overview", "dashboard", "show all", "everything"),
+        "ATLAS Command Center initialized. All agents reporting status. Supply chain systems nominal.",
+        ("agents", "metrics", "risk_alerts"), "orchestrator",
+    ),
+)
+
+DEFAULT_RULE = IntentRule(
+    "general", 1 << 30, (),
+    "ATLAS is ready. How can I assist with your supply chain operations today?",
+    ("agents",), "orchestrator",
+)
+
+
+class IntentRouter:
+    """Aho-Corasick automaton over every rule keyword; reports overlapping matches in one scan"""
+
+    def __init__(self, rules: Tuple[IntentRule, ...] = INTENT_RULES, default: IntentRule = DEFAULT_RULE):
+        self.rules = tuple(rules)
+        self.default = default
+        owners: Dict[str, int] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                keyword = keyword.lower()
+                if keyword in owners:
+                    raise ValueError(
+                        f"Keyword {keyword!r} is claimed by both {self.rules[owners[keyword]].intent} and {rule.intent}"
+                    )
+                owners[keyword] = index
+        self._delta, self._outputs = self._compile(owners)
+
+    @staticmethod
+    def _compile(owners: Dict[str, int]) -> Tuple[List[Dict[str, int]], List[Tuple[int, ...]]]:
+        """Build the trie, fail links and a fully resolved transition table (a DFA)"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[int, ...]] = [()]
+        for keyword, rule_index in owners.items():
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(())
+                state = nxt
+            outputs[state] += (rule_index,)
+
+        # Breadth-first: each state inherits its fail state's transitions and outputs
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] += outputs[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                delta[state][ch] = nxt
+                queue.append(nxt)
+        return delta, outputs
+
+    def scan(self, text: str) -> Dict[int, int]:
+        """Keyword hit counts per rule index for one lowercase pass over text"""
+        delta, outputs = self._delta, self._outputs
+        hits: Dict[int, int] = {}
+        state = 0
+        for ch in text.lower():
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for rule_index in outputs[state]:
+                    hits[rule_index] = hits.get(rule_index, 0) + 1
+        return hits
+
+    def match(self, text: str) -> List[Tuple[IntentRule, int]]:
+        """Every matching rule with its hit count, ranked by priority then hits"""
+        hits = self.scan(text)
+        if not hits:
+            return []
+        ranked = sorted(hits, key=lambda i: (self.rules[i].priority, -hits[i], i))
+        return [(self.rules[i], hits[i]) for i in ranked]
+
+    def classify(self, text: str) -> str:
+        """Name of the winning intent only"""
+        matches = self.match(text)
+        return matches[0][0].intent if matches else self.default.intent
+
+    def route(self, text: str, llm_response: Optional[str] = None) -> Dict[str, Any]:
+        """Resolve a command to the response dict used by the command endpoint"""
+        matches = self.match(text)
+        rule = matches[0][0] if matches else self.default
+        response = rule.response if not rule.use_llm_response else (llm_response or rule.response)
+        scores: Dict[str, int] = {}
+        for matched, hits in matches:
+            scores[matched.intent] = scores.get(matched.intent, 0) + hits
+        return {
+            "response": response,
+            "components": list(rule.components),
+            "primary_agent": rule.primary_agent,
+            "intent": rule.intent,
+            "matched_intents": list(scores),
+            "scores": scores,
+        }
+
+
+_router: Optional[IntentRouter] = None
+
+
+def get_intent_router() -> IntentRouter:
+    """Get or create the compiled router singleton"""
+    global _router
+    if _router is None:
+        _router = IntentRouter()
+    return _router
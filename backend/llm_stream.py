@@ -0,0 +1,106 @@
+"""
+LLM Stream Parsing for ATLAS Supply Chain OS
+Pulls fields out of a JSON object while the LLM is still generating it,
+so streamed commands can emit intent, components and text early
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonStringFieldStreamer:
+    """Incrementally decodes one string field (e.g. "response") from JSON text arriving in chunks"""
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self.buffer = ""
+        self._pos: Optional[int] = None
+        self.text = ""
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Append a chunk and return whatever new field text it completed"""
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = self._key.search(self.buffer)
+            if match is None:
+                return ""
+            self._pos = match.end()
+
+        buf, i, out = self.buffer, self._pos, []
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            # Escapes may be split across chunks; wait for the rest before decoding
+            if i + 1 >= len(buf):
+                break
+            esc = buf[i + 1]
+            if esc == "u":
+                if i + 6 > len(buf):
+                    break
+                try:
+                    out.append(chr(int(buf[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+            else:
+                out.append(_SIMPLE_ESCAPES.get(esc, esc))
+                i += 2
+        self._pos = i
+        delta = "".join(out)
+        self.text += delta
+        return delta
+
+
+def peek_string(text: str, field: str) -> Optional[str]:
+    """Value of a complete "field": "..." pair in partial JSON, if it has arrived"""
+    match = re.search(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % re.escape(field), text)
+    if match is None:
+        return None
+    try:
+        return json.loads(f'"{match.group(1)}"')
+    except ValueError:
+        return None
+
+
+def peek_array(text: str, field: str) -> Optional[List[Any]]:
+    """Value of a complete "field": [...] array in partial JSON, if its closing bracket has arrived"""
+    match = re.search(r'"%s"\s*:\s*\[' % re.escape(field), text)
+    if match is None:
+        return None
+    start = match.end() - 1
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                try:
+                    value = json.loads(text[start:i + 1])
+                except ValueError:
+                    return None
+                return value if isinstance(value, list) else None
+    return None
@@ -0,0 +1,205 @@
+"""
+Vectorized Market Analytics for ATLAS Supply Chain OS
+Columnar NumPy quote table with group-by sector aggregates,
+risk alert thresholds and company risk scores
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
+
+# Alert thresholds on daily change percent
+ALERT_DROP_THRESHOLD = -3.0
+ALERT_HIGH_THRESHOLD = -5.0
+
+# Risk score bands
+RISK_HIGH_SCORE = 60
+RISK_MEDIUM_SCORE = 30
+
+
+class QuoteTable:
+    """Columnar snapshot of quotes: one NumPy array per field, one row per symbol"""
+
+    def __init__(
+        self,
+        symbols: List[str],
+        names: List[str],
+        sectors: List[str],
+        sector_codes: np.ndarray,
+        tiers: np.ndarray,
+        price: np.ndarray,
+        change_pct: np.ndarray,
+        high_52: np.ndarray,
+        low_52: np.ndarray,
+        volume: np.ndarray,
+        timestamps: List[Optional[str]],
+    ):
+        self.symbols = symbols
+        self.names = names
+        # Sector labels in first-seen order; sector_codes index into this list
+        self.sectors = sectors
+        self.sector_codes = sector_codes
+        self.tiers = tiers
+        self.price = price
+        self.change_pct = change_pct
+        self.high_52 = high_52
+        self.low_52 = low_52
+        self.volume = volume
+        self.timestamps = timestamps
+        self._index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._risk = None
+
+    @classmethod
+    def from_quotes(
+        cls,
+        quotes: Dict[str, Dict],
+        companies: Dict[str, Dict],
+        default_sector: str = "Other",
+    ) -> "QuoteTable":
+        """Build the table from quote dicts keyed by symbol"""
+        n = len(quotes)
+        symbols, names, timestamps = [], [], []
+        sector_lookup: Dict[str, int] = {}
+        sector_codes = np.empty(n, dtype=np.int32)
+        tiers = np.empty(n, dtype=np.int8)
+        price = np.empty(n, dtype=np.float64)
+        change_pct = np.empty(n, dtype=np.float64)
+        high_52 = np.empty(n, dtype=np.float64)
+        low_52 = np.empty(n, dtype=np.float64)
+        volume = np.empty(n, dtype=np.int64)
+
+        for i, (symbol, quote) in enumerate(quotes.items()):
+            info = companies.get(symbol, {})
+            sector = info.get("sector", default_sector)
+            symbols.append(symbol)
+            names.append(info.get("name", symbol))
+            timestamps.append(quote.get("timestamp"))
+            sector_codes[i] = sector_lookup.setdefault(sector, len(sector_lookup))
+            tiers[i] = info.get("tier", 2)
+            p = quote.get("price") or 0
+            price[i] = p
+            change_pct[i] = quote.get("change_percent") or 0
+            high_52[i] = quote.get("fifty_two_week_high", p) or 0
+            low_52[i] = quote.get("fifty_two_week_low", p) or 0
+            volume[i] = quote.get("volume") or 0
+
+        return cls(symbols, names, list(sector_lookup), sector_codes, tiers, price,
+                   change_pct, high_52, low_52, volume, timestamps)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def index_of(self, symbol: str) -> Optional[int]:
+        return self._index.get(symbol)
+
+    @property
+    def risk(self) -> Dict[str, np.ndarray]:
+        """Risk score columns, computed once per table"""
+        if self._risk is None:
+            self._risk = compute_risk_scores(self)
+        return self._risk
+
+
+def sector_performance(table: QuoteTable) -> Dict[str, Dict[str, Any]]:
+    """Group quotes by sector: total/average change and member companies"""
+    n_sectors = len(table.sectors)
+    total_change = np.bincount(table.sector_codes, weights=table.change_pct, minlength=n_sectors)
+    counts = np.bincount(table.sector_codes, minlength=n_sectors)
+    avg_change = np.round(np.divide(total_change, counts, out=np.zeros(n_sectors), where=counts > 0), 2)
+
+    # Stable sort keeps companies in table order within each sector
+    order = np.argsort(table.sector_codes, kind="stable")
+    groups = np.split(order, np.cumsum(counts)[:-1])
+    price = table.price.tolist()
+    change_pct = table.change_pct.tolist()
+
+    performance = {}
+    for code, sector in enumerate(table.sectors):
+        performance[sector] = {
+            "total_change": float(total_change[code]),
+            "count": int(counts[code]),
+            "companies": [
+                {
+                    "symbol": table.symbols[i],
+                    "name": table.names[i],
+                    "price": price[i],
+                    "change_percent": change_pct[i],
+                }
+                for i in groups[code].tolist()
+            ],
+            "avg_change": float(avg_change[code]),
+        }
+    return performance
+
+
+def risk_alerts(
+    table: QuoteTable,
+    limit: Optional[int] = None,
+    drop_threshold: float = ALERT_DROP_THRESHOLD,
+    high_threshold: float = ALERT_HIGH_THRESHOLD,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Return (alerts sorted by worst drop, total number of alerting symbols)"""
+    rows = np.flatnonzero(table.change_pct < drop_threshold)
+    total = len(rows)
+    order = rows[np.argsort(table.change_pct[rows], kind="stable")]
+    if limit is not None:
+        order = order[:limit]
+
+    change = table.change_pct[order]
+    probability = np.minimum(0.9, np.abs(change) / 10)
+    high = change < high_threshold
+
+    alerts = []
+    for i, chg, prob, is_high in zip(order.tolist(), change.tolist(), probability.tolist(), high.tolist()):
+        alerts.append({
+            "id": f"ra-{table.symbols[i]}",
+            "severity": "high" if is_high else "medium",
+            "supplier": table.names[i],
+            "symbol": table.symbols[i],
+            "issue": f"Stock down {abs(chg):.1f}% - potential financial stress",
+            "change_percent": chg,
+            "price": float(table.price[i]),
+            "probability": prob,
+            "sector": table.sectors[table.sector_codes[i]],
+            "tier": int(table.tiers[i]),
+        })
+    return alerts, total
+
+
+def compute_risk_scores(table: QuoteTable) -> Dict[str, np.ndarray]:
+    """52-week range volatility, distance from the high, and the blended 0-100 risk score"""
+    low, high, price = table.low_52, table.high_52, table.price
+    volatility = np.divide((high - low) * 100, low, out=np.zeros(len(table)), where=low > 0)
+    price_vs_high = np.divide((high - price) * 100, high, out=np.zeros(len(table)), where=high > 0)
+    risk_score = np.clip(volatility / 2 + price_vs_high / 2, 0, 100)
+    level = np.where(risk_score > RISK_HIGH_SCORE, "HIGH", np.where(risk_score > RISK_MEDIUM_SCORE, "MEDIUM", "LOW"))
+    return {
+        "volatility": volatility,
+        "price_vs_high": price_vs_high,
+        "risk_score": risk_score,
+        "risk_level": level,
+    }
+
+
+def risk_profiles(table: QuoteTable, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """Risk profile dicts for the given rows (all rows by default)"""
+    if rows is None:
+        rows = np.arange(len(table))
+    risk = table.risk
+    profiles = []
+    for i in np.asarray(rows).tolist():
+        profiles.append({
+            "symbol": table.symbols[i],
+            "name": table.names[i],
+            "sector": table.sectors[table.sector_codes[i]],
+            "tier": int(table.tiers[i]),
+            "current_price": float(table.price[i]),
+            "change_percent": float(table.change_pct[i]),
+            "fifty_two_week_high": float(table.high_52[i]),
+            "fifty_two_week_low": float(table.low_52[i]),
+            "price_vs_52_high": round(float(risk["price_vs_high"][i]), 1),
+            "volatility_index": round(float(risk["volatility"][i]), 1),
+            "risk_score": round(float(risk["risk_score"][i]), 0),
+            "risk_level": str(risk["risk_level"][i]),
+            "timestamp": table.timestamps[i],
+        })
+    return profiles
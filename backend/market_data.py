@@ -6,11 +6,24 @@ Focus: Supply Chain specific companies and data
 
 import asyncio
 import aiohttp
+import hashlib
+import heapq
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Awaitable, Callable, Tuple
 import os
 import json
 
+import numpy as np
+
+import market_analytics
+from market_analytics import QuoteTable
+from price_store import BAR_DTYPE, EMPTY_BARS, PriceHistoryStore, realized_volatility
+from risk_engine import RiskMetricsEngine
+
 # Supply Chain focused company tickers
 SUPPLY_CHAIN_COMPANIES = {
     # Logistics & Transportation
@@ -89,56 +102,529 @@ SUPPLY_CHAIN_COMPANIES = {
     "BE": {"name": "Bloom Energy", "sector": "Energy", "tier": 2},
 }
 
+
+class HTTPSessionPool:
+    """Shared aiohttp session with pooled keep-alive connections for all market data clients"""
+    
+    def __init__(
+        self,
+        limit: int = None,
+        limit_per_host: int = None,
+        keepalive_timeout: float = None,
+        dns_cache_ttl: int = None,
+        request_timeout: float = 10,
+    ):
+        self.limit = limit or int(os.environ.get("MARKET_HTTP_POOL_LIMIT", 100))
+        self.limit_per_host = limit_per_host or int(os.environ.get("MARKET_HTTP_LIMIT_PER_HOST", 20))
+        self.keepalive_timeout = keepalive_timeout or float(os.environ.get("MARKET_HTTP_KEEPALIVE", 30))
+        self.dns_cache_ttl = dns_cache_ttl or int(os.environ.get("MARKET_HTTP_DNS_TTL", 300))
+        self.request_timeout = request_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+    
+    async def start(self) -> aiohttp.ClientSession:
+        """Open the pooled session (idempotent)"""
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    use_dns_cache=True,
+                    enable_cleanup_closed=True,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                )
+            return self._session
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, opening it lazily if startup has not run yet"""
+        if self._session is None or self._session.closed:
+            return await self.start()
+        return self._session
+    
+    async def close(self):
+        """Close the pooled session and release all connections"""
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+            self._session = None
+
+
+# Freshness window (seconds) per cached data type
+DEFAULT_CACHE_TTLS = {
+    "quote": 30,
+    "forex": 300,
+    "news": 600,
+}
+
+
+class QuoteCache:
+    """In-process TTL/LRU cache with stale-while-revalidate and single-flight upstream fetches"""
+    
+    def __init__(self, ttls: Dict[str, float] = None, max_entries: int = None, stale_ttl: float = None):
+        self.ttls = {
+            kind: float(os.environ.get(f"MARKET_CACHE_TTL_{kind.upper()}", ttl))
+            for kind, ttl in DEFAULT_CACHE_TTLS.items()
+        }
+        self.ttls.update(ttls or {})
+        self.max_entries = max_entries or int(os.environ.get("MARKET_CACHE_MAX_ENTRIES", 5000))
+        # How long past its TTL an entry may still be served while a refresh runs
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.environ.get("MARKET_CACHE_STALE_TTL", 300))
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._background: set = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "upstream_fetches": 0, "fallbacks": 0, "evictions": 0}
+    
+    def _lookup(self, kind: str, key: str) -> Tuple[Any, Optional[str]]:
+        """Return (value, state) where state is "fresh", "stale" or None"""
+        entry = self._entries.get((kind, key))
+        if entry is None:
+            return None, None
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        ttl = self.ttls.get(kind, 60)
+        if age <= ttl:
+            state = "fresh"
+        elif age <= ttl + self.stale_ttl:
+            state = "stale"
+        else:
+            # Expired entries stay until LRU eviction as last-known-good fallback values
+            return None, None
+        self._entries.move_to_end((kind, key))
+        return value, state
+    
+    def peek(self, kind: str, key: str) -> Optional[Any]:
+        """Return a cached value (fresh or stale) without triggering a fetch"""
+        value, _ = self._lookup(kind, key)
+        return value
+    
+    def last_known(self, kind: str, key: str) -> Optional[Any]:
+        """Return the last stored value regardless of age (used when the provider is down)"""
+        entry = self._entries.get((kind, key))
+        return entry[1] if entry is not None else None
+    
+    def set(self, kind: str, key: str, value: Any):
+        """Store a value and evict least-recently-used entries over capacity"""
+        self._entries[(kind, key)] = (time.monotonic(), value)
+        self._entries.move_to_end((kind, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def clear(self):
+        self._entries.clear()
+    
+    async def get(self, kind: str, key: str, fetch: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """Get one value, fetching it upstream on a miss"""
+        async def fetch_one(keys: List[str]) -> Dict[str, Any]:
+            value = await fetch()
+            return {key: value} if value is not None else {}
+        
+        results = await self.get_many(kind, [key], fetch_one)
+        return results.get(key)
+    
+    async def get_many(
+        self,
+        kind: str,
+        keys: List[str],
+        fetch_many: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        revalidate: bool = False,
+    ) -> Dict[str, Any]:
+        """Get many values; misses are fetched in one upstream call shared with concurrent callers.
+        
+        With revalidate=True stale entries are refetched and awaited instead of served.
+        """
+        results = {}
+        missing, stale, waiting = [], [], {}
+        
+        for key in keys:
+            value, state = self._lookup(kind, key)
+            if state == "fresh":
+                self.stats["hits"] += 1
+                results[key] = value
+            elif state == "stale" and not revalidate:
+                self.stats["stale_hits"] += 1
+                results[key] = value
+                if (kind, key) not in self._inflight:
+                    stale.append(key)
+            elif (kind, key) in self._inflight:
+                self.stats["coalesced"] += 1
+                waiting[key] = self._inflight[(kind, key)]
+            else:
+                self.stats["misses"] += 1
+                missing.append(key)
+        
+        # Stale entries are served immediately and revalidated in the background
+        if stale:
+            task = asyncio.create_task(self._fetch_batch(kind, stale, fetch_many))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        
+        if missing:
+            waiting.update(self._fetch_batch_futures(kind, missing, fetch_many))
+        
+        for key, future in waiting.items():
+            value = await asyncio.shield(future)
+            if value is not None:
+                results[key] = value
+        return results
+    
+    def _fetch_batch_futures(self, kind: str, keys: List[str], fetch_many) -> Dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        for key, future in futures.items():
+            self._inflight[(kind, key)] = future
+        task = asyncio.create_task(self._resolve_batch(kind, futures, fetch_many))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return futures
+    
+    async def _fetch_batch(self, kind: str, keys: List[str], fetch_many):
+        futures = self._fetch_batch_futures(kind, keys, fetch_many)
+        await asyncio.gather(*(asyncio.shield(f) for f in futures.values()))
+    
+    async def _resolve_batch(self, kind: str, futures: Dict[str, asyncio.Future], fetch_many):
+        fetched = {}
+        try:
+            self.stats["upstream_fetches"] += 1
+            fetched = await fetch_many(list(futures.keys())) or {}
+        except Exception as e:
+            print(f"Cache fetch error for {kind}: {e}")
+        finally:
+            for key, future in futures.items():
+                value = fetched.get(key)
+                if value is not None:
+                    self.set(kind, key, value)
+                else:
+                    # Keep serving the last known value if the refresh came back empty
+                    value = self.last_known(kind, key)
+                    if value is not None:
+                        self.stats["fallbacks"] += 1
+                self._inflight.pop((kind, key), None)
+                if not future.done():
+                    future.set_result(value)
+
+
+class ProviderUnavailable(Exception):
+    """Raised without touching the network when a provider's circuit is open or its rate budget is spent"""
+
+
+class TokenBucket:
+    """Adaptive token bucket: halves its refill rate on 429s and creeps back toward the configured rate"""
+    
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, max_wait: float) -> bool:
+        """Take one token, waiting up to max_wait seconds; False means the caller should fail fast"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        wait = (1 - self.tokens) / self.rate
+        if wait > max_wait:
+            return False
+        # Reserve the token now so concurrent waiters queue up behind us
+        self.tokens -= 1
+        await asyncio.sleep(wait)
+        return True
+    
+    def on_throttled(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0)
+    
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures; open -> half-open after a jittered, growing backoff"""
+    
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 5,
+        max_recovery_timeout: float = 300,
+        half_open_probes: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.failures = 0
+        self.consecutive_opens = 0
+        self.open_until = 0.0
+        self._probes_in_flight = 0
+    
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() < self.open_until:
+                return False
+            self.state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                return False
+            self._probes_in_flight += 1
+        return True
+    
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.consecutive_opens = 0
+        self._probes_in_flight = 0
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+    
+    def _open(self):
+        self.consecutive_opens += 1
+        backoff = min(self.max_recovery_timeout, self.recovery_timeout * 2 ** (self.consecutive_opens - 1))
+        self.open_until = time.monotonic() + backoff * random.uniform(0.5, 1.5)
+        self.state = self.OPEN
+        self._probes_in_flight = 0
+
+
+class ProviderGuard:
+    """Circuit breaker + rate limiter in front of one upstream market data provider"""
+    
+    def __init__(self, name: str, rate: float, capacity: float = None, max_wait: float = 2.0):
+        self.name = name
+        rate = float(os.environ.get(f"MARKET_RATE_LIMIT_{name.upper()}", rate))
+        self.bucket = TokenBucket(rate, capacity)
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get("MARKET_BREAKER_FAILURES", 5)),
+            recovery_timeout=float(os.environ.get("MARKET_BREAKER_RECOVERY", 5)),
+        )
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "failures": 0, "throttled": 0, "rejected": 0}
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[str] = None
+    
+    @property
+    def available(self) -> bool:
+        """Whether a request could currently be attempted (does not consume a probe)"""
+        return self.breaker.state != CircuitBreaker.OPEN or time.monotonic() >= self.breaker.open_until
+    
+    def _failure(self, reason: str):
+        self.stats["failures"] += 1
+        self.last_error = reason
+        self.breaker.record_failure()
+    
+    async def fetch_json(self, http: HTTPSessionPool, url: str, **kwargs) -> Tuple[int, Optional[Any]]:
+        """GET url through the guard; returns (status, parsed JSON or None)"""
+        if not self.breaker.allow_request():
+            self.stats["rejected"] += 1
+            raise ProviderUnavailable(f"{self.name} circuit open")
+        if not await self.bucket.acquire(self.max_wait):
+            self.stats["rejected"] += 1
+            raise ProviderUnavailable(f"{self.name} rate limit exhausted")
+        
+        self.stats["requests"] += 1
+        try:
+            session = await http.get_session()
+            async with session.get(url, **kwargs) as resp:
+                if resp.status == 429:
+                    self.stats["throttled"] += 1
+                    self.bucket.on_throttled()
+                    self._failure("HTTP 429")
+                    return resp.status, None
+                if resp.status >= 500:
+                    self._failure(f"HTTP {resp.status}")
+                    return resp.status, None
+                data = await resp.json(content_type=None) if resp.status == 200 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self._failure(f"{type(e).__name__}: {e}")
+            raise
+        # Any non-5xx answer means the provider itself is healthy
+        self.breaker.record_success()
+        self.bucket.on_success()
+        self.last_success = datetime.now(timezone.utc).isoformat()
+        return resp.status, data
+    
+    def status(self) -> Dict[str, Any]:
+        open_for = max(0.0, self.breaker.open_until - time.monotonic()) if self.breaker.state == CircuitBreaker.OPEN else 0.0
+        return {
+            "provider": self.name,
+            "state": self.breaker.state,
+            "healthy": self.breaker.state == CircuitBreaker.CLOSED,
+            "consecutive_failures": self.breaker.failures,
+            "retry_in_seconds": round(open_for, 1),
+            "rate_limit_per_second": round(self.bucket.rate, 3),
+            "configured_rate_per_second": self.bucket.max_rate,
+            "last_error": self.last_error,
+            "last_success": self.last_success,
+            **self.stats,
+        }
+
+
 class YahooFinanceClient:
     """Yahoo Finance API client for stock and company data"""
     
     BASE_URL = "https://query1.finance.yahoo.com/v8/finance"
+    BATCH_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
+    # Seconds to stop trying the batch endpoint after it rejects us (e.g. missing crumb)
+    BATCH_RETRY_AFTER = 600
+    
+    def __init__(
+        self,
+        http: HTTPSessionPool = None,
+        batch_size: int = None,
+        max_concurrency: int = None,
+        batch_mode: bool = None,
+    ):
+        self.http = http or HTTPSessionPool()
+        self.batch_size = batch_size or int(os.environ.get("YAHOO_BATCH_SIZE", 50))
+        self.max_concurrency = max_concurrency or int(os.environ.get("YAHOO_MAX_CONCURRENCY", 8))
+        if batch_mode is None:
+            batch_mode = os.environ.get("YAHOO_BATCH_QUOTES", "true").lower() == "true"
+        self.batch_mode = batch_mode
+        self._batch_disabled_until = 0.0
+        self.guard = ProviderGuard("yahoo", rate=10, capacity=20)
+    
+    @staticmethod
+    def _format_quote(symbol: str, current_price: float, prev_close: float, fields: Dict) -> Dict:
+        """Build the quote dict returned by every fetch path"""
+        current_price = current_price or 0
+        prev_close = prev_close or current_price
+        change_pct = ((current_price - prev_close) / prev_close * 100) if prev_close else 0
+        return {
+            "symbol": symbol,
+            "price": round(current_price, 2),
+            "change": round(current_price - prev_close, 2),
+            "change_percent": round(change_pct, 2),
+            "volume": fields.get("regularMarketVolume", 0),
+            "market_cap": fields.get("marketCap", 0),
+            "fifty_two_week_high": fields.get("fiftyTwoWeekHigh", 0),
+            "fifty_two_week_low": fields.get("fiftyTwoWeekLow", 0),
+            "currency": fields.get("currency", "USD"),
+            "exchange": fields.get("exchangeName", fields.get("exchange", "")),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
     
     async def get_quote(self, symbol: str) -> Optional[Dict]:
         """Get real-time quote for a symbol"""
         url = f"{self.BASE_URL}/chart/{symbol}?interval=1d&range=5d"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.HEADERS, timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        result = data.get("chart", {}).get("result", [])
-                        if result:
-                            meta = result[0].get("meta", {})
-                            indicators = result[0].get("indicators", {}).get("quote", [{}])[0]
-                            closes = indicators.get("close", [])
-                            
-                            current_price = meta.get("regularMarketPrice", 0)
-                            prev_close = meta.get("previousClose", current_price)
-                            change_pct = ((current_price - prev_close) / prev_close * 100) if prev_close else 0
-                            
-                            return {
-                                "symbol": symbol,
-                                "price": round(current_price, 2),
-                                "change": round(current_price - prev_close, 2),
-                                "change_percent": round(change_pct, 2),
-                                "volume": meta.get("regularMarketVolume", 0),
-                                "market_cap": meta.get("marketCap", 0),
-                                "fifty_two_week_high": meta.get("fiftyTwoWeekHigh", 0),
-                                "fifty_two_week_low": meta.get("fiftyTwoWeekLow", 0),
-                                "currency": meta.get("currency", "USD"),
-                                "exchange": meta.get("exchangeName", ""),
-                                "timestamp": datetime.now(timezone.utc).isoformat()
-                            }
-                    else:
-                        print(f"Yahoo Finance returned status {resp.status} for {symbol}")
+            status, data = await self.guard.fetch_json(self.http, url, headers=self.HEADERS)
+            if status == 200 and data:
+                result = data.get("chart", {}).get("result", [])
+                if result:
+                    meta = result[0].get("meta", {})
+                    current_price = meta.get("regularMarketPrice", 0)
+                    prev_close = meta.get("previousClose", current_price)
+                    return self._format_quote(symbol, current_price, prev_close, meta)
+            elif status != 200:
+                print(f"Yahoo Finance returned status {status} for {symbol}")
+        except ProviderUnavailable:
+            pass
         except Exception as e:
             print(f"Yahoo Finance error for {symbol}: {e}")
         return None
     
+    async def get_bars(self, symbol: str, since: int = None, history_range: str = "1y") -> np.ndarray:
+        """Get daily OHLCV bars, either after a unix timestamp or for a whole range"""
+        if since is not None:
+            window = f"period1={since + 1}&period2={int(time.time())}"
+        else:
+            window = f"range={history_range}"
+        url = f"{self.BASE_URL}/chart/{symbol}?interval=1d&{window}"
+        try:
+            status, data = await self.guard.fetch_json(self.http, url, headers=self.HEADERS)
+            if status == 200 and data:
+                result = data.get("chart", {}).get("result") or []
+                if result:
+                    timestamps = result[0].get("timestamp") or []
+                    quote = (result[0].get("indicators", {}).get("quote") or [{}])[0]
+                    rows = [
+                        (ts, o, h, l, c, v or 0)
+                        for ts, o, h, l, c, v in zip(
+                            timestamps,
+                            quote.get("open", []), quote.get("high", []), quote.get("low", []),
+                            quote.get("close", []), quote.get("volume", []),
+                        )
+                        if c is not None and o is not None and h is not None and l is not None
+                    ]
+                    return np.array(rows, dtype=BAR_DTYPE)
+            elif status != 200:
+                print(f"Yahoo Finance returned status {status} for {symbol} history")
+        except ProviderUnavailable:
+            pass
+        except Exception as e:
+            print(f"Yahoo Finance history error for {symbol}: {e}")
+        return EMPTY_BARS
+    
+    async def get_batch_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get quotes for up to batch_size symbols in a single v7 quote request"""
+        params = {"symbols": ",".join(symbols)}
+        try:
+            status, data = await self.guard.fetch_json(self.http, self.BATCH_QUOTE_URL, params=params, headers=self.HEADERS)
+            if status == 200:
+                quotes = {}
+                for item in (data or {}).get("quoteResponse", {}).get("result", []) or []:
+                    symbol = item.get("symbol")
+                    if symbol in symbols and item.get("regularMarketPrice") is not None:
+                        quotes[symbol] = self._format_quote(
+                            symbol,
+                            item.get("regularMarketPrice"),
+                            item.get("regularMarketPreviousClose"),
+                            item,
+                        )
+                return quotes
+            print(f"Yahoo Finance batch quote returned status {status}, falling back to chart requests")
+            if status in (401, 403, 404):
+                self._batch_disabled_until = time.monotonic() + self.BATCH_RETRY_AFTER
+        except ProviderUnavailable:
+            pass
+        except Exception as e:
+            print(f"Yahoo Finance batch quote error: {e}")
+        return {}
+    
     async def get_multiple_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Get quotes for multiple symbols concurrently"""
-        tasks = [self.get_quote(symbol) for symbol in symbols]
-        results = await asyncio.gather(*tasks)
-        return {symbols[i]: r for i, r in enumerate(results) if r}
+        """Get quotes for multiple symbols, batched where possible"""
+        symbols = list(dict.fromkeys(symbols))
+        quotes = {}
+        
+        if self.batch_mode and time.monotonic() >= self._batch_disabled_until:
+            batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+            for result in await asyncio.gather(*(self.get_batch_quotes(b) for b in batches)):
+                quotes.update(result)
+        
+        # Anything the batch path did not return goes through bounded per-symbol chart calls,
+        # unless the circuit is open, in which case callers fall back to cached quotes
+        remaining = [s for s in symbols if s not in quotes]
+        if remaining and self.guard.available:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            async def bounded_quote(symbol: str) -> Optional[Dict]:
+                async with semaphore:
+                    return await self.get_quote(symbol)
+            
+            results = await asyncio.gather(*(bounded_quote(s) for s in remaining))
+            quotes.update({remaining[i]: r for i, r in enumerate(results) if r})
+        return quotes
 
 
 class AlphaVantageClient:
@@ -146,8 +632,11 @@ class AlphaVantageClient:
     
     BASE_URL = "https://www.alphavantage.co/query"
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, http: HTTPSessionPool = None):
         self.api_key = api_key or os.environ.get("ALPHA_VANTAGE_KEY", "demo")
+        self.http = http or HTTPSessionPool()
+        # Free tier allows 5 requests per minute
+        self.guard = ProviderGuard("alpha_vantage", rate=5 / 60, capacity=5)
     
     async def get_forex_rate(self, from_currency: str, to_currency: str) -> Optional[Dict]:
         """Get real-time forex exchange rate"""
@@ -158,20 +647,20 @@ class AlphaVantageClient:
             "apikey": self.api_key
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.BASE_URL, params=params, timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        rate_data = data.get("Realtime Currency Exchange Rate", {})
-                        if rate_data:
-                            return {
-                                "from": from_currency,
-                                "to": to_currency,
-                                "rate": float(rate_data.get("5. Exchange Rate", 0)),
-                                "bid": float(rate_data.get("8. Bid Price", 0)),
-                                "ask": float(rate_data.get("9. Ask Price", 0)),
-                                "timestamp": rate_data.get("6. Last Refreshed", "")
-                            }
+            status, data = await self.guard.fetch_json(self.http, self.BASE_URL, params=params)
+            if status == 200 and data:
+                rate_data = data.get("Realtime Currency Exchange Rate", {})
+                if rate_data:
+                    return {
+                        "from": from_currency,
+                        "to": to_currency,
+                        "rate": float(rate_data.get("5. Exchange Rate", 0)),
+                        "bid": float(rate_data.get("8. Bid Price", 0)),
+                        "ask": float(rate_data.get("9. Ask Price", 0)),
+                        "timestamp": rate_data.get("6. Last Refreshed", "")
+                    }
+        except ProviderUnavailable:
+            pass
         except Exception as e:
             print(f"Alpha Vantage error: {e}")
         return None
@@ -188,9 +677,13 @@ class FinnhubClient:
     """Finnhub API client for news and company data"""
     
     BASE_URL = "https://finnhub.io/api/v1"
+    KEY_SYMBOLS = ["FDX", "TSM", "CAT", "WMT", "BHP"]
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, http: HTTPSessionPool = None):
         self.api_key = api_key or os.environ.get("FINNHUB_KEY", "")
+        self.http = http or HTTPSessionPool()
+        # Free tier allows 60 requests per minute
+        self.guard = ProviderGuard("finnhub", rate=1, capacity=10)
     
     async def get_company_news(self, symbol: str, days: int = 7) -> List[Dict]:
         """Get recent news for a company"""
@@ -205,18 +698,18 @@ class FinnhubClient:
             "token": self.api_key
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.BASE_URL}/company-news", params=params, timeout=10) as resp:
-                    if resp.status == 200:
-                        news = await resp.json()
-                        return [{
-                            "headline": item.get("headline", ""),
-                            "summary": item.get("summary", ""),
-                            "source": item.get("source", ""),
-                            "url": item.get("url", ""),
-                            "datetime": datetime.fromtimestamp(item.get("datetime", 0)).isoformat(),
-                            "sentiment": self._analyze_headline_sentiment(item.get("headline", ""))
-                        } for item in news[:10]]  # Limit to 10 recent
+            status, news = await self.guard.fetch_json(self.http, f"{self.BASE_URL}/company-news", params=params)
+            if status == 200 and news:
+                return [{
+                    "headline": item.get("headline", ""),
+                    "summary": item.get("summary", ""),
+                    "source": item.get("source", ""),
+                    "url": item.get("url", ""),
+                    "datetime": datetime.fromtimestamp(item.get("datetime", 0)).isoformat(),
+                    "sentiment": self._analyze_headline_sentiment(item.get("headline", ""))
+                } for item in news[:10]]  # Limit to 10 recent
+        except ProviderUnavailable:
+            pass
         except Exception as e:
             print(f"Finnhub error for {symbol}: {e}")
         return []
@@ -236,133 +729,340 @@ class FinnhubClient:
             return "positive"
         return "neutral"
     
-    async def get_supply_chain_news(self) -> List[Dict]:
-        """Get aggregated news for supply chain companies"""
-        key_symbols = ["FDX", "TSM", "CAT", "WMT", "BHP"]
-        all_news = []
+    async def get_supply_chain_news(
+        self,
+        symbols: List[str] = None,
+        limit: int = 20,
+        max_concurrency: int = 5,
+    ) -> List[Dict]:
+        """Get aggregated, de-duplicated news for supply chain companies, newest first"""
+        symbols = symbols or self.KEY_SYMBOLS
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(symbol: str) -> List[Dict]:
+            async with semaphore:
+                return await self.get_company_news(symbol, days=3)
         
-        for symbol in key_symbols:
-            news = await self.get_company_news(symbol, days=3)
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        
+        # The same wire story is often tagged to several tickers; keep the first copy
+        seen = set()
+        all_news = []
+        for symbol, news in zip(symbols, results):
             for item in news:
-                item["symbol"] = symbol
-                item["company"] = SUPPLY_CHAIN_COMPANIES.get(symbol, {}).get("name", symbol)
-            all_news.extend(news)
+                keys = {self._news_key("url", item.get("url")), self._news_key("headline", item.get("headline"))}
+                keys.discard(None)
+                if keys & seen:
+                    continue
+                seen.update(keys)
+                all_news.append({
+                    **item,
+                    "symbol": symbol,
+                    "company": SUPPLY_CHAIN_COMPANIES.get(symbol, {}).get("name", symbol),
+                })
         
-        # Sort by datetime, newest first
-        all_news.sort(key=lambda x: x.get("datetime", ""), reverse=True)
-        return all_news[:20]
+        return heapq.nlargest(limit, all_news, key=lambda x: x.get("datetime", ""))
+    
+    @staticmethod
+    def _news_key(kind: str, value: Optional[str]) -> Optional[str]:
+        value = (value or "").strip().lower()
+        if not value:
+            return None
+        return hashlib.sha1(f"{kind}:{value}".encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Precomputed dashboard published by the background refresher (treat as read-only)"""
+    dashboard: Dict[str, Any]
+    table: QuoteTable
+    built_at: float
+    
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
 
 
 class SupplyChainDataService:
     """Main service to aggregate supply chain market data"""
     
     def __init__(self, alpha_vantage_key: str = None, finnhub_key: str = None):
-        self.yahoo = YahooFinanceClient()
-        self.alpha_vantage = AlphaVantageClient(alpha_vantage_key)
-        self.finnhub = FinnhubClient(finnhub_key)
+        # One pooled session shared by every provider client
+        self.http = HTTPSessionPool()
+        self.yahoo = YahooFinanceClient(self.http)
+        self.alpha_vantage = AlphaVantageClient(alpha_vantage_key, self.http)
+        self.finnhub = FinnhubClient(finnhub_key, self.http)
+        self.cache = QuoteCache()
+        self.history = PriceHistoryStore()
+        self.history_sync_interval = float(os.environ.get("MARKET_HISTORY_SYNC_INTERVAL", 3600))
+        self._history_synced: Dict[str, float] = {}
+        self._history_locks: Dict[str, asyncio.Lock] = {}
+        self.risk_engine = RiskMetricsEngine(SUPPLY_CHAIN_COMPANIES)
+        self.refresh_interval = float(os.environ.get("MARKET_REFRESH_INTERVAL", 30))
+        # News is an optional dashboard stage with its own time budget
+        self.news_enabled = bool(self.finnhub.api_key)
+        self.news_timeout = float(os.environ.get("MARKET_NEWS_TIMEOUT", 3))
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._snapshot_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+    
+    async def start(self):
+        """Open pooled HTTP connections and start the background refreshers (called on app startup)"""
+        await self.http.start()
+        if self._tasks:
+            return
+        if self.refresh_interval > 0:
+            self._tasks.append(asyncio.create_task(self._refresh_loop()))
+        if self.history_sync_interval > 0:
+            self._tasks.append(asyncio.create_task(self._history_loop()))
+    
+    async def close(self):
+        """Stop the refreshers and release pooled HTTP connections (called on app shutdown)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.http.close()
+    
+    async def _refresh_loop(self):
+        """Rebuild the dashboard snapshot on a fixed cadence"""
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh_snapshot()
+            except Exception as e:
+                print(f"Market snapshot refresh error: {e}")
+            await asyncio.sleep(max(0.0, self.refresh_interval - (time.monotonic() - started)))
+    
+    async def _history_loop(self):
+        """Sync daily bars for the tracked universe and fold new days into the risk engine"""
+        # Warm the engine from disk first so metrics are served before any network call
+        await asyncio.to_thread(self.risk_engine.ingest, self.history)
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh_history()
+            except Exception as e:
+                print(f"Price history refresh error: {e}")
+            await asyncio.sleep(max(0.0, self.history_sync_interval - (time.monotonic() - started)))
+    
+    async def refresh_history(self) -> int:
+        """Incrementally sync every tracked symbol, then update rolling risk metrics; returns days applied"""
+        semaphore = asyncio.Semaphore(self.yahoo.max_concurrency)
+        
+        async def sync(symbol: str):
+            async with semaphore:
+                try:
+                    await self.sync_history(symbol)
+                except Exception as e:
+                    print(f"Price history sync error for {symbol}: {e}")
+        
+        await asyncio.gather(*(sync(symbol) for symbol in self.risk_engine.symbols))
+        return await asyncio.to_thread(self.risk_engine.ingest, self.history)
+    
+    async def refresh_snapshot(self) -> MarketSnapshot:
+        """Fetch all tracked quotes, precompute analytics and publish a new snapshot"""
+        async with self._snapshot_lock:
+            return await self._build_snapshot()
+    
+    async def _build_snapshot(self) -> MarketSnapshot:
+        dashboard, table = await self._compute_dashboard()
+        # Keep the previous snapshot if the upstream returned nothing at all
+        if dashboard["quotes"] or self._snapshot is None:
+            self._snapshot = MarketSnapshot(dashboard=dashboard, table=table, built_at=time.monotonic())
+        return self._snapshot
+    
+    def latest_dashboard(self) -> Optional[Dict[str, Any]]:
+        """The current snapshot's dashboard, or None before the first refresh (never does I/O)"""
+        snapshot = self._snapshot
+        return snapshot.dashboard if snapshot is not None else None
+    
+    async def _published(self) -> MarketSnapshot:
+        """The latest snapshot without upstream I/O (builds one on cold start)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            async with self._snapshot_lock:
+                snapshot = self._snapshot or await self._build_snapshot()
+        return snapshot
+    
+    async def get_dashboard_snapshot(self) -> Dict[str, Any]:
+        """Return the latest precomputed dashboard without upstream I/O (builds one on cold start)"""
+        return (await self._published()).dashboard
+    
+    async def get_company_quote(self, symbol: str) -> Optional[Dict]:
+        """A tracked company's quote from the snapshot; untracked symbols go through the quote cache and may fetch upstream"""
+        if symbol in SUPPLY_CHAIN_COMPANIES:
+            return (await self._published()).dashboard["quotes"].get(symbol)
+        return await self.get_quote(symbol)
+    
+    async def get_quote(self, symbol: str) -> Optional[Dict]:
+        """Get a quote through the cache (callers must not mutate the result)"""
+        return await self.cache.get("quote", symbol, lambda: self.yahoo.get_quote(symbol))
+    
+    async def get_quotes(self, symbols: List[str], revalidate: bool = False) -> Dict[str, Dict]:
+        """Get many quotes through the cache, fetching only the misses upstream"""
+        return await self.cache.get_many("quote", symbols, self.yahoo.get_multiple_quotes, revalidate=revalidate)
+    
+    async def sync_history(self, symbol: str) -> int:
+        """Append bars newer than the last stored one; at most once per sync interval per symbol"""
+        lock = self._history_locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            synced_at = self._history_synced.get(symbol)
+            if synced_at is not None and time.monotonic() - synced_at < self.history_sync_interval:
+                return 0
+            bars = await self.yahoo.get_bars(symbol, since=self.history.last_timestamp(symbol))
+            # Today's bar is still moving; only persist sessions that are at least a day old
+            bars = bars[bars["ts"] + 86400 <= time.time()]
+            appended = await asyncio.to_thread(self.history.append, symbol, bars)
+            self._history_synced[symbol] = time.monotonic()
+            return appended
+    
+    def get_provider_status(self) -> Dict[str, Any]:
+        """Health of each upstream provider plus cache and snapshot freshness"""
+        snapshot = self._snapshot
+        return {
+            "providers": {
+                guard.name: guard.status()
+                for guard in (self.yahoo.guard, self.alpha_vantage.guard, self.finnhub.guard)
+            },
+            "cache": dict(self.cache.stats, entries=len(self.cache._entries)),
+            "snapshot": {
+                "available": snapshot is not None,
+                "age_seconds": round(snapshot.age, 1) if snapshot else None,
+                "timestamp": snapshot.dashboard.get("timestamp") if snapshot else None,
+            },
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+    
+    async def get_news(self) -> List[Dict]:
+        """Get aggregated supply chain news through the cache"""
+        return await self.cache.get("news", "supply_chain", self.finnhub.get_supply_chain_news) or []
+    
+    async def _await_news(self, news_task: asyncio.Task, started: float) -> List[Dict]:
+        """Wait for the news stage within its budget, falling back to the last cached news"""
+        remaining = self.news_timeout - (time.monotonic() - started)
+        try:
+            # Shielded so a slow fetch keeps running and lands in the cache for the next snapshot
+            return await asyncio.wait_for(asyncio.shield(news_task), timeout=max(0.0, remaining))
+        except asyncio.TimeoutError:
+            print(f"Finnhub news exceeded {self.news_timeout}s budget, serving cached news")
+        except Exception as e:
+            print(f"Finnhub news stage error: {e}")
+        return self.cache.last_known("news", "supply_chain") or []
     
     async def get_supply_chain_dashboard(self) -> Dict[str, Any]:
         """Get comprehensive supply chain market data"""
+        dashboard, _ = await self._compute_dashboard()
+        return dashboard
+    
+    async def _compute_dashboard(self) -> Tuple[Dict[str, Any], QuoteTable]:
         symbols = list(SUPPLY_CHAIN_COMPANIES.keys())
+        started = time.monotonic()
         
-        # Fetch data concurrently
-        quotes_task = self.yahoo.get_multiple_quotes(symbols)
+        # Fetch data concurrently; news runs alongside quotes and never delays them
+        news_task = asyncio.create_task(self.get_news()) if self.news_enabled else None
+        quotes_task = self.get_quotes(symbols, revalidate=True)
         # forex_task = self.alpha_vantage.get_supply_chain_forex()  # Uncomment if API key available
-        # news_task = self.finnhub.get_supply_chain_news()  # Uncomment if API key available
         
         quotes = await quotes_task
         
-        # Calculate sector performance
-        sector_performance = {}
-        for symbol, quote in quotes.items():
-            company_info = SUPPLY_CHAIN_COMPANIES.get(symbol, {})
-            sector = company_info.get("sector", "Other")
-            if sector not in sector_performance:
-                sector_performance[sector] = {"total_change": 0, "count": 0, "companies": []}
-            sector_performance[sector]["total_change"] += quote.get("change_percent", 0)
-            sector_performance[sector]["count"] += 1
-            sector_performance[sector]["companies"].append({
-                "symbol": symbol,
-                "name": company_info.get("name", symbol),
-                "price": quote.get("price", 0),
-                "change_percent": quote.get("change_percent", 0)
-            })
-        
-        # Calculate average change per sector
-        for sector in sector_performance:
-            count = sector_performance[sector]["count"]
-            if count > 0:
-                sector_performance[sector]["avg_change"] = round(
-                    sector_performance[sector]["total_change"] / count, 2
-                )
+        # Sector aggregates and alert thresholds run as vectorized group-bys over a columnar table
+        table = QuoteTable.from_quotes(quotes, SUPPLY_CHAIN_COMPANIES)
+        sector_performance = market_analytics.sector_performance(table)
+        risk_alerts, alerts_active = market_analytics.risk_alerts(table, limit=10)
         
-        # Identify risk alerts based on significant price drops
-        risk_alerts = []
-        for symbol, quote in quotes.items():
-            change_pct = quote.get("change_percent", 0)
-            if change_pct < -3:  # More than 3% drop
-                company_info = SUPPLY_CHAIN_COMPANIES.get(symbol, {})
-                risk_alerts.append({
-                    "id": f"ra-{symbol}",
-                    "severity": "high" if change_pct < -5 else "medium",
-                    "supplier": company_info.get("name", symbol),
-                    "symbol": symbol,
-                    "issue": f"Stock down {abs(change_pct):.1f}% - potential financial stress",
-                    "change_percent": change_pct,
-                    "price": quote.get("price", 0),
-                    "probability": min(0.9, abs(change_pct) / 10),
-                    "sector": company_info.get("sector", "Unknown"),
-                    "tier": company_info.get("tier", 2)
-                })
-        
-        # Sort risk alerts by severity
-        risk_alerts.sort(key=lambda x: x.get("change_percent", 0))
-        
-        return {
+        dashboard = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "quotes": quotes,
             "sector_performance": sector_performance,
-            "risk_alerts": risk_alerts[:10],  # Top 10 risks
+            "risk_alerts": risk_alerts,  # Top 10 risks
             "market_summary": {
                 "total_companies_tracked": len(quotes),
                 "sectors_monitored": list(sector_performance.keys()),
-                "alerts_active": len(risk_alerts)
+                "alerts_active": alerts_active
             }
         }
+        if news_task is not None:
+            dashboard["news"] = await self._await_news(news_task, started)
+        return dashboard, table
     
     async def get_company_risk_profile(self, symbol: str) -> Optional[Dict]:
-        """Get detailed risk profile for a specific company"""
-        quote = await self.yahoo.get_quote(symbol)
-        if not quote:
-            return None
-        
-        company_info = SUPPLY_CHAIN_COMPANIES.get(symbol, {"name": symbol, "sector": "Unknown", "tier": 2})
-        
-        # Calculate risk score based on price volatility
-        price = quote.get("price", 0)
-        high_52 = quote.get("fifty_two_week_high", price)
-        low_52 = quote.get("fifty_two_week_low", price)
+        """Risk profile for a company: tracked ones read the snapshot's table and the stored
+        history (kept current by the refreshers); untracked ones fetch their quote and bars upstream"""
+        if symbol in SUPPLY_CHAIN_COMPANIES:
+            table = (await self._published()).table
+            row = table.index_of(symbol)
+            if row is None:
+                return None
+            profile = market_analytics.risk_profiles(table, [row])[0]
+        else:
+            quote = await self.get_quote(symbol)
+            if not quote:
+                return None
+            table = QuoteTable.from_quotes({symbol: quote}, SUPPLY_CHAIN_COMPANIES, default_sector="Unknown")
+            profile = market_analytics.risk_profiles(table)[0]
+            # The history refresher only covers the tracked universe; only new bars are fetched
+            try:
+                await self.sync_history(symbol)
+            except Exception as e:
+                print(f"Price history sync error for {symbol}: {e}")
         
-        volatility = ((high_52 - low_52) / low_52 * 100) if low_52 > 0 else 0
-        price_vs_high = ((high_52 - price) / high_52 * 100) if high_52 > 0 else 0
-        
-        risk_score = min(100, max(0, (volatility / 2) + (price_vs_high / 2)))
+        # Realized volatility from locally stored closes
+        closes = self.history.tail(symbol, 61)["close"]
+        for window in (20, 60):
+            vol = realized_volatility(closes, window)
+            profile[f"realized_volatility_{window}d"] = round(vol, 1) if vol is not None else None
+        profile["history_bars"] = len(self.history.bars(symbol))
+        # EWMA volatility, drawdown, beta and peer correlation are maintained by the history refresher
+        profile["risk_metrics"] = self.risk_engine.metrics(symbol)
+        return profile
+    
+    def resolve_symbols(
+        self,
+        symbols: List[str] = None,
+        sectors: List[str] = None,
+        tiers: List[int] = None,
+    ) -> List[str]:
+        """Expand explicit symbols (or the whole tracked universe) and apply sector/tier filters"""
+        if symbols:
+            selected = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        else:
+            selected = list(SUPPLY_CHAIN_COMPANIES)
+        if sectors:
+            wanted = {s.lower() for s in sectors}
+            selected = [s for s in selected if SUPPLY_CHAIN_COMPANIES.get(s, {}).get("sector", "Unknown").lower() in wanted]
+        if tiers:
+            selected = [s for s in selected if SUPPLY_CHAIN_COMPANIES.get(s, {}).get("tier", 2) in tiers]
+        return selected
+    
+    def _build_risk_profiles(self, quotes: Dict[str, Dict]) -> List[Dict]:
+        """Risk profiles for a batch of quotes in one vectorized pass"""
+        if not quotes:
+            return []
+        table = QuoteTable.from_quotes(quotes, SUPPLY_CHAIN_COMPANIES, default_sector="Unknown")
+        profiles = market_analytics.risk_profiles(table)
+        metrics = self.risk_engine.metrics_many(table.symbols)
+        for profile in profiles:
+            profile["risk_metrics"] = metrics.get(profile["symbol"])
+        return profiles
+    
+    async def get_risk_profiles(self, symbols: List[str]) -> Tuple[List[Dict], List[str]]:
+        """Risk profiles for many symbols from cached quotes; returns (profiles, symbols without data)"""
+        quotes = await self.get_quotes(symbols)
+        profiles = self._build_risk_profiles({s: quotes[s] for s in symbols if s in quotes})
+        return profiles, [s for s in symbols if s not in quotes]
+    
+    async def iter_risk_profiles(self, symbols: List[str]) -> AsyncIterator[Dict]:
+        """Yield risk profiles as they become available: cached symbols first, then fetched batches"""
+        cached = {s: q for s in symbols if (q := self.cache.peek("quote", s)) is not None}
+        for profile in self._build_risk_profiles(cached):
+            yield profile
         
-        return {
-            "symbol": symbol,
-            "name": company_info.get("name"),
-            "sector": company_info.get("sector"),
-            "tier": company_info.get("tier"),
-            "current_price": price,
-            "change_percent": quote.get("change_percent", 0),
-            "fifty_two_week_high": high_52,
-            "fifty_two_week_low": low_52,
-            "price_vs_52_high": round(price_vs_high, 1),
-            "volatility_index": round(volatility, 1),
-            "risk_score": round(risk_score, 0),
-            "risk_level": "HIGH" if risk_score > 60 else "MEDIUM" if risk_score > 30 else "LOW",
-            "timestamp": quote.get("timestamp")
-        }
+        remaining = [s for s in symbols if s not in cached]
+        batches = [remaining[i:i + self.yahoo.batch_size] for i in range(0, len(remaining), self.yahoo.batch_size)]
+        for next_batch in asyncio.as_completed([self.get_quotes(batch) for batch in batches]):
+            for profile in self._build_risk_profiles(await next_batch):
+                yield profile
 
 
 # Singleton instance
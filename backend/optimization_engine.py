@@ -0,0 +1,378 @@
+"""
+Optimization Job Engine for ATLAS Supply Chain OS
+Runs VRP/TSP solves from a bounded priority queue in a process pool off the
+event loop, streams their progress, and persists each job, with its routes, to MongoDB
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Any
+
+import numpy as np
+
+from distance_matrix import DEFAULT_ROAD_FACTOR, METRICS, get_matrix_cache
+from vrp_solver import VRPInstance, solve, synthetic_instance
+
+logger = logging.getLogger(__name__)
+
+# Fields served by /api/quantum/optimizations; routes are only returned per job
+SUMMARY_FIELDS = (
+    "id", "problem_type", "nodes", "vehicles", "status", "classical_time", "quantum_time",
+    "improvement", "solution", "created_at", "completed_at", "error", "priority", "progress",
+)
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    minutes, secs = divmod(int(round(seconds)), 60)
+    if minutes < 60:
+        return f"{minutes}m {secs}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
+
+
+def instance_from_request(spec: Dict[str, Any]) -> VRPInstance:
+    """Build an instance from an optimize request; without stops, a seeded synthetic one of num_nodes"""
+    tsp = spec.get("problem_type", "VRP").upper() == "TSP"
+    vehicles = 1 if tsp else int(spec.get("vehicles", 50))
+    stops = spec.get("stops")
+    if not stops:
+        instance = synthetic_instance(int(spec.get("num_nodes", 200)), vehicles, seed=spec.get("seed") or 0)
+        if tsp:
+            instance.vehicle_capacity = float(instance.demands.sum())
+        return instance
+
+    if len(stops) < 2:
+        raise ValueError("A routing problem needs a depot and at least one stop")
+    geo = all(s.get("lat") is not None and s.get("lon") is not None for s in stops)
+    planar = all(s.get("x") is not None and s.get("y") is not None for s in stops)
+    if not (geo or planar):
+        raise ValueError("Every stop needs either lat/lon or x/y coordinates")
+    metric = spec.get("metric") or ("haversine" if geo else "euclidean")
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+    if metric != "euclidean" and not geo:
+        raise ValueError(f"The {metric} metric needs lat/lon coordinates")
+    coords = np.array([(s["lat"], s["lon"]) if geo else (s["x"], s["y"]) for s in stops], dtype=np.float64)
+    demands = np.array([s.get("demand") or 0.0 for s in stops], dtype=np.float64)
+    demands[0] = 0.0
+    capacity = spec.get("vehicle_capacity")
+    if tsp or capacity is None:
+        capacity = float(demands.sum()) if tsp else float(np.ceil(demands.sum() / vehicles))
+    if demands.max() > capacity:
+        raise ValueError("A stop's demand exceeds the vehicle capacity")
+
+    time_windows = service_times = None
+    windows = [s.get("time_window") for s in stops]
+    if any(windows):
+        if any(w and len(w) != 2 for w in windows) or any(w and w[0] > w[1] for w in windows):
+            raise ValueError("time_window must be [earliest, latest] with earliest <= latest")
+        horizon = max(w[1] for w in windows if w)
+        time_windows = np.array([w or (0.0, horizon) for w in windows], dtype=np.float64)
+        service_times = np.array([s.get("service_time") or 0.0 for s in stops], dtype=np.float64)
+    return VRPInstance(
+        coords=coords,
+        demands=demands,
+        vehicle_capacity=float(capacity),
+        num_vehicles=vehicles,
+        time_windows=time_windows,
+        service_times=service_times,
+        metric=metric,
+        speed=float(spec.get("speed") or 1.0),
+        road_factor=float(spec.get("road_factor") or DEFAULT_ROAD_FACTOR),
+    )
+
+
+# Set in each pool process by _init_worker: progress goes back over a queue, and
+# cancellation is one shared flag per runner slot (a slot runs one job at a time)
+_progress_queue = None
+_cancel_flags = None
+
+
+def _init_worker(progress_queue, cancel_flags):
+    global _progress_queue, _cancel_flags
+    _progress_queue, _cancel_flags = progress_queue, cancel_flags
+
+
+def run_solver(instance: VRPInstance, time_limit: float, job_id: str = None, slot: int = None) -> Dict[str, Any]:
+    """Process-pool entry point; the distance matrix comes from this process's cache, backed by the shared disk cache"""
+    progress = cancelled = None
+    if job_id is not None and _progress_queue is not None:
+        progress = lambda update: _progress_queue.put((job_id, update))
+    if slot is not None and _cancel_flags is not None:
+        cancelled = lambda: bool(_cancel_flags[slot])
+    started = time.perf_counter()
+    dist, source = get_matrix_cache().get(instance.coords, instance.metric, instance.road_factor)
+    matrix_seconds = time.perf_counter() - started
+    result = solve(instance, time_limit=time_limit, progress=progress, dist=dist, cancelled=cancelled)
+    result.update(matrix_source=source, matrix_seconds=matrix_seconds)
+    return result
+
+
+class OptimizationEngine:
+    """Runs solver jobs from a bounded priority queue on a process pool, keeps recent jobs in memory and persists them"""
+
+    RECENT_JOBS = 50
+
+    def __init__(
+        self,
+        collection,
+        max_workers: int = None,
+        on_update: Callable[[Dict[str, Any]], None] = None,
+        max_queue: int = None,
+        max_time_limit: float = None,
+    ):
+        self.collection = collection
+        self.max_workers = max_workers or int(os.environ.get("OPTIMIZER_WORKERS", 1))
+        self.max_queue = max_queue or int(os.environ.get("OPTIMIZER_MAX_QUEUE", 100))
+        self.max_time_limit = max_time_limit or float(os.environ.get("OPTIMIZER_MAX_TIME_LIMIT", 600))
+        self.on_update = on_update
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._cancel_flags = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._progress_thread: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        self._seq = itertools.count()
+        self._instances: Dict[str, VRPInstance] = {}
+        self._running: Dict[str, int] = {}
+        self._tasks: set = set()
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+
+    def start(self):
+        """Create the pool, the runners and the progress reader; idempotent, needs a running loop"""
+        if self._queue is not None:
+            return
+        # spawn: forking a process that holds the event loop and driver threads is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        self._progress_queue = ctx.Queue()
+        self._cancel_flags = ctx.RawArray("b", self.max_workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self._progress_queue, self._cancel_flags),
+        )
+        # Unbounded: capacity counts live queued jobs, so entries left by cancelled ones don't use it up
+        self._queue = asyncio.PriorityQueue()
+        for slot in range(self.max_workers):
+            self._spawn(self._runner(slot))
+        self._closing.clear()
+        self._progress_thread = threading.Thread(
+            target=self._read_progress, args=(asyncio.get_running_loop(),), name="optimizer-progress", daemon=True
+        )
+        self._progress_thread.start()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def submit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and queue a job; raises ValueError for a malformed instance, asyncio.QueueFull when saturated"""
+        self.start()
+        instance = instance_from_request(spec)
+        time_limit = min(float(spec.get("time_limit") or 30.0), self.max_time_limit)
+        priority = int(spec.get("priority") or 0)
+        job = {
+            "id": f"qopt-{str(uuid.uuid4())[:8]}",
+            "problem_type": "TSP" if spec.get("problem_type", "VRP").upper() == "TSP" else "VRP",
+            "nodes": instance.size,
+            "vehicles": instance.num_vehicles,
+            "status": "queued",
+            "priority": priority,
+            "classical_time": "pending",
+            "quantum_time": "n/a",
+            "improvement": 0.0,
+            "solution": {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "time_limit": time_limit,
+        }
+        # Only queued jobs hold an instance; cancelled ones drop theirs and are skipped when dequeued
+        if len(self._instances) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise asyncio.QueueFull
+        # Higher priority first, then first come first served
+        self._queue.put_nowait((-priority, next(self._seq), job["id"]))
+        self.stats["submitted"] += 1
+        self._instances[job["id"]] = instance
+        self._remember(job)
+        return job
+
+    def _remember(self, job: Dict[str, Any]):
+        self.jobs[job["id"]] = job
+        self.jobs.move_to_end(job["id"])
+        while len(self.jobs) > self.RECENT_JOBS:
+            oldest = next(iter(self.jobs))
+            if self.jobs[oldest]["status"] in ("queued", "running"):
+                break
+            self.jobs.popitem(last=False)
+        if self.on_update is not None:
+            self.on_update(self.summary(job))
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job owned by this process; False if it is not one"""
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return False
+        if job["status"] == "running":
+            # The solver polls the flag and returns its best routes so far
+            self._cancel_flags[self._running[job_id]] = 1
+            job["cancel_requested"] = True
+            return True
+        self._instances.pop(job_id, None)
+        job.update(status="cancelled", completed_at=datetime.now(timezone.utc).isoformat())
+        self.stats["cancelled"] += 1
+        self._remember(job)
+        self._spawn(self._persist(job))
+        return True
+
+    async def _runner(self, slot: int):
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                instance = self._instances.pop(job_id, None)
+                job = self.jobs.get(job_id)
+                if instance is not None and job is not None and job["status"] == "queued":
+                    await self._run(job, instance, slot)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any], instance: VRPInstance, slot: int):
+        loop = asyncio.get_running_loop()
+        self._cancel_flags[slot] = 0
+        self._running[job["id"]] = slot
+        job.update(status="running", started_at=datetime.now(timezone.utc).isoformat())
+        self._remember(job)
+        await self._persist(job)
+        try:
+            result = await loop.run_in_executor(self._pool, run_solver, instance, job["time_limit"], job["id"], slot)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Optimization {job['id']} failed: {e}")
+            self.stats["failed"] += 1
+            job.update(status="failed", error=str(e), completed_at=datetime.now(timezone.utc).isoformat())
+        else:
+            cancelled = result["stopped"] == "cancelled"
+            self.stats["cancelled" if cancelled else "completed"] += 1
+            job.update(
+                status="cancelled" if cancelled else "completed",
+                classical_time=format_duration(result["solve_seconds"]),
+                improvement=round(result["improvement"], 1),
+                solution={
+                    "routes": result["vehicles_used"],
+                    "total_distance": round(result["total_distance"], 1),
+                    "baseline_distance": round(result["baseline_distance"], 1),
+                    "capacity_utilization": f"{result['capacity_utilization']:.1f}%",
+                    "feasible": result["feasible"],
+                    "iterations": result["iterations"],
+                    "stopped": result["stopped"] or "converged",
+                    "matrix": result["matrix_source"],
+                    "matrix_seconds": round(result["matrix_seconds"], 3),
+                },
+                routes=result["routes"],
+                completed_at=datetime.now(timezone.utc).isoformat(),
+            )
+        finally:
+            self._running.pop(job["id"], None)
+        job.pop("cancel_requested", None)
+        self._remember(job)
+        await self._persist(job)
+
+    def _read_progress(self, loop: asyncio.AbstractEventLoop):
+        """Progress thread: relay solver updates from the pool processes to the loop until close()"""
+        while not self._closing.is_set():
+            try:
+                job_id, update = self._progress_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            try:
+                loop.call_soon_threadsafe(self._apply_progress, job_id, update)
+            except RuntimeError:
+                # The loop has closed under us
+                return
+
+    def _apply_progress(self, job_id: str, update: Dict[str, Any]):
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] != "running":
+            return
+        job["progress"] = {
+            "iteration": update["iteration"],
+            "best_objective": round(update["objective"], 1),
+            "moves": update["moves"],
+            "moves_per_sec": round(update["moves_per_sec"], 1),
+            "elapsed": round(update["elapsed"], 2),
+        }
+        if self.on_update is not None:
+            self.on_update(self.summary(job))
+
+    async def _persist(self, job: Dict[str, Any]):
+        try:
+            await self.collection.replace_one({"id": job["id"]}, dict(job), upsert=True)
+        except Exception as e:
+            logger.warning(f"Could not persist optimization {job['id']}: {e}")
+
+    @staticmethod
+    def summary(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: job[k] for k in SUMMARY_FIELDS if k in job}
+
+    async def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest first from MongoDB, or from this worker's memory if the database is unavailable"""
+        projection = {"_id": 0, **{k: 1 for k in SUMMARY_FIELDS}}
+        try:
+            return await self.collection.find({}, projection).sort("created_at", -1).limit(limit).to_list(limit)
+        except Exception as e:
+            logger.warning(f"Optimization history unavailable, serving in-memory jobs: {e}")
+            return [self.summary(job) for job in reversed(self.jobs.values())][:limit]
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if job_id in self.jobs:
+            return dict(self.jobs[job_id])
+        try:
+            return await self.collection.find_one({"id": job_id}, {"_id": 0})
+        except Exception as e:
+            logger.warning(f"Optimization lookup failed for {job_id}: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "workers": self.max_workers,
+            "running": len(self._running),
+            "queued": sum(1 for job in self.jobs.values() if job["status"] == "queued"),
+            "max_queue": self.max_queue,
+            "max_time_limit": self.max_time_limit,
+        }
+
+    async def close(self):
+        """Stop running solves and shut the pool down (called on app shutdown)"""
+        self._closing.set()
+        if self._cancel_flags is not None:
+            for slot in range(self.max_workers):
+                self._cancel_flags[slot] = 1
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._progress_thread is not None:
+            # Wakes within one queue poll
+            self._progress_thread.join(timeout=1.0)
+            self._progress_thread = None
+        self._queue = None
@@ -0,0 +1,113 @@
+"""
+Historical Price Store for ATLAS Supply Chain OS
+Per-symbol daily OHLCV bars in append-only binary files that are
+read back as memory-mapped NumPy record arrays
+"""
+
+import fcntl
+import os
+import re
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# One fixed-width record per bar; files are raw little-endian arrays of this dtype
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<i8"),
+])
+
+TRADING_DAYS_PER_YEAR = 252
+
+EMPTY_BARS = np.empty(0, dtype=BAR_DTYPE)
+
+
+class PriceHistoryStore:
+    """Append-only on-disk store of daily bars with memory-mapped range queries"""
+
+    def __init__(self, root: str = None):
+        default_root = Path(__file__).parent / "data" / "price_history"
+        self.root = Path(root or os.environ.get("MARKET_HISTORY_DIR", default_root))
+        self.root.mkdir(parents=True, exist_ok=True)
+        # symbol -> (file size the map was opened at, memmap)
+        self._maps: Dict[str, Tuple[int, np.ndarray]] = {}
+
+    def _path(self, symbol: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper())
+        return self.root / f"{safe}.bars"
+
+    def bars(self, symbol: str) -> np.ndarray:
+        """All stored bars for a symbol, oldest first (read-only memory map)"""
+        path = self._path(symbol)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return EMPTY_BARS
+        size -= size % BAR_DTYPE.itemsize  # ignore a torn trailing record
+        if size == 0:
+            return EMPTY_BARS
+        cached = self._maps.get(symbol)
+        if cached is None or cached[0] != size:
+            mapped = np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(size // BAR_DTYPE.itemsize,))
+            cached = (size, mapped)
+            self._maps[symbol] = cached
+        return cached[1]
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        bars = self.bars(symbol)
+        return int(bars["ts"][-1]) if len(bars) else None
+
+    def range(self, symbol: str, start: int = None, end: int = None) -> np.ndarray:
+        """Bars with start <= ts < end (unix seconds), located by binary search"""
+        bars = self.bars(symbol)
+        ts = bars["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(bars) if end is None else int(np.searchsorted(ts, end, side="left"))
+        return bars[lo:hi]
+
+    def tail(self, symbol: str, count: int) -> np.ndarray:
+        """The most recent `count` bars"""
+        bars = self.bars(symbol)
+        return bars[-count:] if count < len(bars) else bars
+
+    def append(self, symbol: str, bars: np.ndarray) -> int:
+        """Append bars newer than the last stored one; returns how many were written"""
+        if len(bars) == 0:
+            return 0
+        bars = np.sort(np.asarray(bars, dtype=BAR_DTYPE), order="ts")
+        _, first = np.unique(bars["ts"], return_index=True)
+        bars = bars[first]
+
+        path = self._path(symbol)
+        with open(path, "ab") as f:
+            # Other workers may be appending the same symbol; re-check under the lock
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                size = os.fstat(f.fileno()).st_size
+                if size % BAR_DTYPE.itemsize:
+                    size -= size % BAR_DTYPE.itemsize
+                    f.truncate(size)
+                if size:
+                    last = np.fromfile(path, dtype=BAR_DTYPE, count=1, offset=size - BAR_DTYPE.itemsize)
+                    bars = bars[bars["ts"] > last["ts"][0]]
+                if len(bars):
+                    f.write(bars.tobytes())
+                    f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        self._maps.pop(symbol, None)
+        return len(bars)
+
+
+def realized_volatility(closes: np.ndarray, window: int) -> Optional[float]:
+    """Annualized standard deviation of daily log returns over the last `window` returns, in percent"""
+    closes = np.asarray(closes, dtype=np.float64)
+    closes = closes[-(window + 1):]
+    if len(closes) < 3 or np.any(closes <= 0):
+        return None
+    returns = np.diff(np.log(closes))
+    return float(np.std(returns, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100)
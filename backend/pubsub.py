@@ -0,0 +1,302 @@
+"""
+Pub/Sub Backends for ATLAS Supply Chain OS
+Carries WebSocket state changes between gunicorn workers: in-process for a
+single worker, or a local unix-socket broker hosted by one elected worker
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import random
+from typing import Callable, Dict, List, Optional, Any
+
+from fast_json import dumps
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - exercised only without orjson
+    import json
+    loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], None]
+
+
+class InProcessPubSub:
+    """Delivers messages to this process's handlers only; the worker is always the leader"""
+
+    backend = "memory"
+    distributed = False
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self.stats = {"published": 0, "delivered": 0, "handler_errors": 0}
+
+    @property
+    def is_leader(self) -> bool:
+        return True
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def publish(self, channel: str, data: Any):
+        """Deliver to local handlers synchronously"""
+        self.stats["published"] += 1
+        self._deliver(channel, data)
+
+    def _deliver(self, channel: str, data: Any):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(data)
+                self.stats["delivered"] += 1
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(f"Pub/sub handler error on {channel}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "backend": self.backend, "role": "leader" if self.is_leader else "follower"}
+
+
+class SocketPubSub(InProcessPubSub):
+    """Newline-delimited JSON over a unix socket; whichever process holds the broker lock relays.
+
+    Every message is delivered locally first, then relayed to the other workers. A
+    second lock elects one leader worker to run the shared producers. Both locks are
+    flock()s the kernel drops when their holder exits, so another worker takes over.
+    """
+
+    backend = "socket"
+    distributed = True
+
+    # A peer this far behind on reads is dropped rather than buffered without bound
+    MAX_PEER_BUFFER = 8 * 1024 * 1024
+    LINE_LIMIT = 16 * 1024 * 1024
+
+    def __init__(self, path: str, reconnect_delay: float = 0.5, lead: bool = True):
+        super().__init__()
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.lead = lead
+        self._broker_lock = None
+        self._leader_lock = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: List[asyncio.StreamWriter] = []
+        self._upstream: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._elector: Optional[asyncio.Task] = None
+        self.stats.update({"received": 0, "relayed": 0, "undelivered": 0, "reconnects": 0, "peers_dropped": 0})
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_lock is not None
+
+    @property
+    def is_broker(self) -> bool:
+        return self._server is not None
+
+    @property
+    def connected(self) -> bool:
+        return self.is_broker or self._upstream is not None
+
+    async def start(self):
+        """Become the broker or connect to it, and keep doing so in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            if self.lead:
+                self._elector = asyncio.create_task(self._elect())
+            # Give the first election a moment so startup code sees a settled role
+            for _ in range(20):
+                if self.connected:
+                    break
+                await asyncio.sleep(0.05)
+
+    async def close(self):
+        tasks = [t for t in (self._task, self._elector) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._elector = None
+        await self._stop_broker()
+        if self._upstream is not None:
+            self._upstream.close()
+            self._upstream = None
+        if self._leader_lock is not None:
+            self._leader_lock.close()
+            self._leader_lock = None
+
+    # ---------- election ----------
+
+    def _try_lock(self, suffix: str):
+        """An exclusively flock()ed file, or None if another process holds it"""
+        lock_file = open(self.path + suffix, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    async def _elect(self):
+        """Retry the leader lock until held, so a follower takes over when the leader exits"""
+        while self._leader_lock is None:
+            self._leader_lock = self._try_lock(".leader")
+            if self._leader_lock is not None:
+                logger.info(f"Pub/sub leader is pid {os.getpid()}")
+                return
+            await asyncio.sleep(self.reconnect_delay * 2)
+
+    async def _run(self):
+        while True:
+            try:
+                self._broker_lock = self._try_lock(".lock")
+                if self._broker_lock is not None:
+                    await self._serve()
+                else:
+                    await self._follow()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub connection error on {self.path}: {e}")
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(self.reconnect_delay * (0.5 + random.random()))
+
+    async def _serve(self):
+        # Only the lock holder reaches this point, so a leftover socket file is stale
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._on_peer, path=self.path, limit=self.LINE_LIMIT)
+        logger.info(f"Pub/sub broker listening on {self.path} (pid {os.getpid()})")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self._stop_broker()
+
+    async def _stop_broker(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for peer in self._peers:
+            peer.close()
+        self._peers = []
+        if self._broker_lock is not None:
+            self._broker_lock.close()
+            self._broker_lock = None
+
+    async def _follow(self):
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.path, limit=self.LINE_LIMIT)
+        except (FileNotFoundError, ConnectionRefusedError):
+            # The lock holder has not bound the socket yet
+            return
+        self._upstream = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                self._receive(line)
+        finally:
+            self._upstream = None
+            writer.close()
+
+    # ---------- messaging ----------
+
+    async def _on_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.append(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._relay(line, exclude=writer)
+                self._receive(line)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            if writer in self._peers:
+                self._peers.remove(writer)
+            writer.close()
+
+    def _relay(self, line: bytes, exclude: Optional[asyncio.StreamWriter] = None):
+        for peer in list(self._peers):
+            if peer is exclude:
+                continue
+            if peer.transport.get_write_buffer_size() > self.MAX_PEER_BUFFER:
+                self.stats["peers_dropped"] += 1
+                self._peers.remove(peer)
+                peer.close()
+                continue
+            peer.write(line)
+            self.stats["relayed"] += 1
+
+    def _receive(self, line: bytes):
+        self.stats["received"] += 1
+        try:
+            message = loads(line)
+        except ValueError:
+            return
+        self._deliver(message["channel"], message["data"])
+
+    def publish(self, channel: str, data: Any):
+        """Deliver locally, then send to the broker (or, as the broker, to every peer)"""
+        self.stats["published"] += 1
+        self._deliver(channel, data)
+        line = dumps({"channel": channel, "data": data}) + b"\n"
+        if self.is_broker:
+            self._relay(line)
+        elif self._upstream is not None:
+            self._upstream.write(line)
+        else:
+            self.stats["undelivered"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "path": self.path,
+            "broker": self.is_broker,
+            "connected": self.connected,
+            "peers": len(self._peers),
+        }
+
+
+_pubsub: Optional[InProcessPubSub] = None
+
+
+def get_pubsub() -> InProcessPubSub:
+    """Process-wide backend chosen by WS_PUBSUB_BACKEND (memory or socket)"""
+    global _pubsub
+    if _pubsub is None:
+        backend = os.environ.get("WS_PUBSUB_BACKEND", "memory").lower()
+        if backend == "socket":
+            _pubsub = SocketPubSub(os.environ.get("WS_PUBSUB_SOCKET", "/tmp/atlas-pubsub.sock"))
+        elif backend == "memory":
+            _pubsub = InProcessPubSub()
+        else:
+            raise ValueError(f"Unknown WS_PUBSUB_BACKEND {backend!r}; expected 'memory' or 'socket'")
+    return _pubsub
+
+
+async def run_broker(path: str):
+    """Host the broker in a standalone process (relays only; workers still elect a leader)"""
+    broker = SocketPubSub(path, lead=False)
+    await broker.start()
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the ATLAS WebSocket pub/sub broker")
+    parser.add_argument("--path", default=os.environ.get("WS_PUBSUB_SOCKET", "/tmp/atlas-pubsub.sock"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_broker(args.path))
@@ -0,0 +1,148 @@
+"""
+Incremental Risk Metrics Engine for ATLAS Supply Chain OS
+O(1)-per-bar rolling statistics for every tracked symbol:
+EWMA volatility, max drawdown, beta vs sector index, correlation to sector peers
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Any
+
+from price_store import PriceHistoryStore, TRADING_DAYS_PER_YEAR
+
+SECONDS_PER_DAY = 86400
+
+# RiskMetrics decay for daily returns
+DEFAULT_LAMBDA = 0.94
+
+# Metrics are withheld until a symbol has this many return observations
+MIN_OBSERVATIONS = 10
+
+
+class RiskMetricsEngine:
+    """Cross-sectional engine that folds one trading day of closes at a time into EWMA state arrays"""
+
+    def __init__(self, companies: Dict[str, Dict], lam: float = DEFAULT_LAMBDA):
+        self.symbols: List[str] = list(companies)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        sectors: Dict[str, int] = {}
+        self.sector_codes = np.array(
+            [sectors.setdefault(companies[s].get("sector", "Other"), len(sectors)) for s in self.symbols],
+            dtype=np.int32,
+        )
+        self.sectors = list(sectors)
+        self.lam = lam
+
+        n = len(self.symbols)
+        nan = lambda: np.full(n, np.nan)
+        self.last_close = nan()
+        self.observations = np.zeros(n, dtype=np.int64)
+        # EWMA second moments (zero-mean daily log returns)
+        self.var = nan()
+        self.var_index = nan()
+        self.cov_index = nan()
+        self.var_peer = nan()
+        self.var_self_peer = nan()
+        self.cov_peer = nan()
+        # Drawdown state
+        self.peak = nan()
+        self.drawdown = np.zeros(n)
+        self.max_drawdown = np.zeros(n)
+        # Last trading day (unix days) folded in
+        self.last_day: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _ewma(self, state: np.ndarray, sample: np.ndarray, mask: np.ndarray):
+        updated = np.where(np.isnan(state), sample, self.lam * state + (1 - self.lam) * sample)
+        state[mask] = updated[mask]
+
+    def update(self, day: int, closes: np.ndarray):
+        """Fold one trading day in; closes is aligned to self.symbols with NaN where a symbol has no bar"""
+        has_close = ~np.isnan(closes) & (closes > 0)
+        valid = has_close & ~np.isnan(self.last_close)
+        r = np.full(len(self), np.nan)
+        r[valid] = np.log(closes[valid] / self.last_close[valid])
+
+        # Equal-weight sector index, plus the leave-one-out peer return for each member
+        n_sectors = len(self.sectors)
+        codes = self.sector_codes[valid]
+        sums = np.bincount(codes, weights=r[valid], minlength=n_sectors)
+        counts = np.bincount(codes, minlength=n_sectors)
+        member_sum = sums[self.sector_codes]
+        member_count = counts[self.sector_codes]
+        index_r = np.divide(member_sum, member_count, out=np.full(len(self), np.nan), where=member_count > 0)
+        peers = valid & (member_count > 1)
+        peer_r = np.divide(member_sum - np.nan_to_num(r), member_count - 1,
+                           out=np.full(len(self), np.nan), where=member_count > 1)
+
+        self._ewma(self.var, r * r, valid)
+        self._ewma(self.var_index, index_r * index_r, valid)
+        self._ewma(self.cov_index, r * index_r, valid)
+        self._ewma(self.var_peer, peer_r * peer_r, peers)
+        self._ewma(self.var_self_peer, r * r, peers)
+        self._ewma(self.cov_peer, r * peer_r, peers)
+        self.observations += valid
+
+        self.peak[has_close] = np.fmax(self.peak[has_close], closes[has_close])
+        self.drawdown[has_close] = 1 - closes[has_close] / self.peak[has_close]
+        self.max_drawdown = np.maximum(self.max_drawdown, self.drawdown)
+        self.last_close[has_close] = closes[has_close]
+        self.last_day = day
+
+    def ingest(self, store: PriceHistoryStore) -> int:
+        """Fold every stored bar newer than the last processed day; returns the number of days applied"""
+        since = None if self.last_day is None else (self.last_day + 1) * SECONDS_PER_DAY
+        per_symbol = []
+        for i, symbol in enumerate(self.symbols):
+            bars = store.range(symbol, start=since)
+            if len(bars):
+                # Exchanges stamp bars at their own open, so align on calendar day
+                per_symbol.append((i, bars["ts"] // SECONDS_PER_DAY, bars["close"]))
+        if not per_symbol:
+            return 0
+
+        days = np.unique(np.concatenate([d for _, d, _ in per_symbol]))
+        closes = np.full((len(days), len(self)), np.nan)
+        for i, symbol_days, symbol_closes in per_symbol:
+            closes[np.searchsorted(days, symbol_days), i] = symbol_closes
+        for day, row in zip(days.tolist(), closes):
+            self.update(day, row)
+        return len(days)
+
+    def metrics(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Precomputed metrics for one symbol, or None if it is not tracked or lacks history"""
+        return self.metrics_many([symbol]).get(symbol)
+
+    def metrics_many(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Metrics for every symbol in the list that is tracked and has enough history"""
+        found = [(s, self._index[s]) for s in symbols if s in self._index]
+        found = [(s, i) for s, i in found if self.observations[i] >= MIN_OBSERVATIONS]
+        if not found:
+            return {}
+        metrics = self.metrics_for(np.array([i for _, i in found]))
+        return {s: m for (s, _), m in zip(found, metrics)}
+
+    def metrics_for(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Metrics dicts for the given engine rows, computed as array expressions"""
+        annualize = np.sqrt(TRADING_DAYS_PER_YEAR) * 100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol = np.sqrt(self.var[rows]) * annualize
+            beta = self.cov_index[rows] / self.var_index[rows]
+            corr = self.cov_peer[rows] / np.sqrt(self.var_self_peer[rows] * self.var_peer[rows])
+
+        def clean(value: float, digits: int) -> Optional[float]:
+            return round(value, digits) if np.isfinite(value) else None
+
+        results = []
+        for j, i in enumerate(np.asarray(rows).tolist()):
+            results.append({
+                "ewma_volatility": clean(float(vol[j]), 1),
+                "max_drawdown": round(float(self.max_drawdown[i]) * 100, 1),
+                "current_drawdown": round(float(self.drawdown[i]) * 100, 1),
+                "beta_vs_sector": clean(float(beta[j]), 2),
+                "sector_peer_correlation": clean(float(np.clip(corr[j], -1, 1)), 2),
+                "sector": self.sectors[self.sector_codes[i]],
+                "observations": int(self.observations[i]),
+            })
+        return results
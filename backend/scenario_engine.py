@@ -0,0 +1,496 @@
+"""
+Monte Carlo Scenario Engine for ATLAS Supply Chain OS
+Simulates a disruption's cost, lead-time and service-level impact over a
+tiered supplier network, as batched NumPy paths spread across a process pool
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Network shape shown by the supplier_network component: 847 suppliers over 4 tiers
+TIER_SIZES = (85, 190, 260, 312)
+NETWORK_SEED = 847
+ANNUAL_SPEND = 120e6             # Tier-1 purchases per year, USD
+GROSS_MARGIN = 0.38
+BASELINE_OTIF = 99.2             # Percent, as reported by /api/metrics
+MATERIAL_SHARE = 0.4             # Share of a supplier's price that is its own upstream inputs
+AFFECTED_CAPACITY = 0.05         # Capacity loss that counts a supplier as affected
+AFFECTED_DEMAND = 0.25           # Lost sales that count a supplier as affected
+PERCENTILES = (5, 25, 50, 75, 95)
+
+REGIONS = {"APAC": 0.45, "Americas": 0.30, "EMEA": 0.25}
+COUNTRIES = {
+    "APAC": {"China": 0.45, "Taiwan": 0.15, "India": 0.15, "Vietnam": 0.12, "South Korea": 0.08, "Australia": 0.05},
+    "Americas": {"USA": 0.55, "Mexico": 0.35, "Brazil": 0.10},
+    "EMEA": {"Germany": 0.35, "Poland": 0.25, "Netherlands": 0.20, "UK": 0.20},
+}
+CURRENCIES = {
+    "China": "CNY", "Taiwan": "TWD", "India": "INR", "Vietnam": "VND", "South Korea": "KRW", "Australia": "AUD",
+    "USA": "USD", "Mexico": "MXN", "Brazil": "BRL",
+    "Germany": "EUR", "Poland": "PLN", "Netherlands": "EUR", "UK": "GBP",
+}
+# Where each region's goods enter the US
+PORTS = {
+    "APAC": {"LA/Long Beach": 0.6, "Oakland": 0.2, "Seattle/Tacoma": 0.2},
+    "Americas": {"Overland": 1.0},
+    "EMEA": {"NY/NJ": 0.6, "Savannah": 0.4},
+}
+BASE_LEAD_DAYS = {"APAC": 35.0, "Americas": 7.0, "EMEA": 21.0}
+
+# Suppliers the rest of the app refers to by name: tier, region, country, port, failure probability
+NAMED_SUPPLIERS = [
+    ("ChemCorp Ltd", 1, "APAC", "China", "LA/Long Beach", 0.72),
+    ("Taiwan Mfg Co", 1, "APAC", "Taiwan", "LA/Long Beach", 0.45),
+    ("EuroLogistics", 1, "EMEA", "Netherlands", "NY/NJ", 0.23),
+    ("PacificTrade", 1, "APAC", "China", "LA/Long Beach", 0.06),
+    ("AsiaComponents", 1, "APAC", "Vietnam", "LA/Long Beach", 0.05),
+    ("GreenMfg", 1, "Americas", "USA", "Overland", 0.02),
+    ("MexiSupply", 1, "Americas", "Mexico", "Overland", 0.04),
+    ("RawMat Inc", 2, "Americas", "USA", "Overland", 0.03),
+    ("IndiaForge", 2, "APAC", "India", "Seattle/Tacoma", 0.05),
+    ("VietnamTech", 2, "APAC", "Vietnam", "LA/Long Beach", 0.06),
+    ("Taiwan Semi", 2, "APAC", "Taiwan", "Oakland", 0.04),
+    ("KoreaElec", 2, "APAC", "South Korea", "Seattle/Tacoma", 0.03),
+    ("ChinaRare", 2, "APAC", "China", "LA/Long Beach", 0.08),
+    ("MineralCo", 3, "APAC", "Australia", "Oakland", 0.03),
+    ("AussieMining", 3, "APAC", "Australia", "Oakland", 0.03),
+]
+
+# Disruption kinds with their default parameters and prior probability of occurring
+DISRUPTIONS = {
+    "supplier_insolvency": {"name": "Supplier Insolvency", "suppliers": ["ChemCorp Ltd"], "probability": None},
+    "tariff_change": {"name": "Tariff Change", "country": "China", "magnitude": 0.25, "horizon_days": 90, "probability": 0.45},
+    "port_closure": {"name": "Port Closure", "port": "LA/Long Beach", "duration_days": 14, "probability": 0.25},
+    "fx_shock": {"name": "FX Shock", "currency": "CNY", "magnitude": 0.15, "horizon_days": 180, "probability": 0.30},
+    "demand_surge": {"name": "Demand Surge", "magnitude": 0.40, "horizon_days": 90, "probability": 0.35},
+}
+
+
+def _choice(rng: np.random.Generator, weights: Dict[str, float], size: int) -> np.ndarray:
+    return rng.choice(list(weights), size=size, p=list(weights.values()))
+
+
+def _normalize_groups(groups: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+    """Scale weights so those sharing a group id sum to one"""
+    totals = np.bincount(groups, weights=weights, minlength=size)
+    return weights / totals[groups]
+
+
+@dataclass
+class EdgeGroup:
+    """Edges between two adjacent tiers, sorted by the endpoint flows are summed onto"""
+    src: np.ndarray
+    dst: np.ndarray
+    weight: np.ndarray
+    starts: np.ndarray
+    targets: np.ndarray
+
+
+@dataclass
+class SupplierNetwork:
+    """Suppliers as parallel arrays; an edge u -> v means u supplies v one tier closer to us"""
+    names: List[str]
+    tier: np.ndarray
+    region: np.ndarray
+    country: np.ndarray
+    currency: np.ndarray
+    port: np.ndarray
+    spend: np.ndarray            # What we buy from each tier-1 supplier per year (0 beyond tier 1)
+    lead_days: np.ndarray
+    fail_prob: np.ndarray
+    has_backup: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    dependency: np.ndarray       # Share of dst's inputs that come from src
+    sales_share: np.ndarray      # Share of src's sales that go to dst
+    downstream: List[EdgeGroup] = field(default_factory=list)
+    upstream: List[EdgeGroup] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+    def __post_init__(self):
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.volume_share = self.spend / self.spend.sum()
+        # Capacity loss flows down the tiers (4 -> 1), lost demand flows back up (1 -> 4)
+        for k in range(len(TIER_SIZES), 1, -1):
+            mask = self.tier[self.src] == k
+            self.downstream.append(self._group(self.src[mask], self.dst[mask], self.dependency[mask], by_dst=True))
+        for k in range(2, len(TIER_SIZES) + 1):
+            mask = self.tier[self.src] == k
+            self.upstream.append(self._group(self.src[mask], self.dst[mask], self.sales_share[mask], by_dst=False))
+
+    @staticmethod
+    def _group(src: np.ndarray, dst: np.ndarray, weight: np.ndarray, by_dst: bool) -> EdgeGroup:
+        key = dst if by_dst else src
+        order = np.argsort(key, kind="stable")
+        src, dst, weight, key = src[order], dst[order], weight[order], key[order]
+        targets, starts = np.unique(key, return_index=True)
+        return EdgeGroup(src, dst, weight.astype(np.float32), starts, targets)
+
+    def exposure(self, mask: np.ndarray) -> np.ndarray:
+        """Share of each supplier's value that comes from masked suppliers, directly or through its inputs"""
+        share = mask.astype(np.float64)
+        for group in self.downstream:
+            inherited = np.add.reduceat(group.weight * share[group.src], group.starts) * MATERIAL_SHARE
+            share[group.targets] = np.minimum(1.0, share[group.targets] + inherited)
+        return share
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "suppliers": self.size,
+            "connections": len(self.src) + int((self.tier == 1).sum()),
+            "tiers": len(TIER_SIZES),
+            "regions": list(REGIONS),
+            "annual_spend": ANNUAL_SPEND,
+        }
+
+
+@lru_cache(maxsize=4)
+def supplier_network(seed: int = NETWORK_SEED) -> SupplierNetwork:
+    """The seeded synthetic network; every process that asks for the same seed builds the same one"""
+    rng = np.random.default_rng(seed)
+    size = sum(TIER_SIZES)
+    tier = np.repeat(np.arange(1, len(TIER_SIZES) + 1), TIER_SIZES)
+    region = _choice(rng, REGIONS, size)
+    country = np.array([_choice(rng, COUNTRIES[r], 1)[0] for r in region], dtype=object)
+    port = np.array([_choice(rng, PORTS[r], 1)[0] for r in region], dtype=object)
+    names = [f"{c} Supplier {i:03d}" for i, c in enumerate(country)]
+    fail_prob = rng.beta(1.2, 30, size)
+
+    # Named suppliers take the first slots of their tier
+    next_slot = {k: int(np.searchsorted(tier, k)) for k in range(1, len(TIER_SIZES) + 1)}
+    for name, k, reg, ctry, prt, prob in NAMED_SUPPLIERS:
+        i = next_slot[k]
+        next_slot[k] += 1
+        names[i], region[i], country[i], port[i], fail_prob[i] = name, reg, ctry, prt, prob
+    currency = np.array([CURRENCIES[c] for c in country], dtype=object)
+
+    spend = np.where(tier == 1, rng.lognormal(0, 0.8, size), 0.0)
+    # Named tier-1 suppliers are key accounts, several times a typical supplier's volume
+    spend[:next_slot[1]] *= 6
+    spend = spend / spend.sum() * ANNUAL_SPEND
+    lead_days = np.array([BASE_LEAD_DAYS[r] for r in region]) * rng.uniform(0.7, 1.4, size)
+
+    # Each supplier beyond tier 1 sells to 1-4 customers in the tier below it
+    src, dst = [], []
+    offsets = np.concatenate([[0], np.cumsum(TIER_SIZES)])
+    for k in range(2, len(TIER_SIZES) + 1):
+        lo, hi = offsets[k - 2], offsets[k - 1]
+        for u in range(offsets[k - 1], offsets[k]):
+            customers = rng.choice(np.arange(lo, hi), size=min(1 + rng.poisson(1.9), 4, hi - lo), replace=False)
+            src.extend([u] * len(customers))
+            dst.extend(customers.tolist())
+    src = np.array(src, dtype=np.int64)
+    dst = np.array(dst, dtype=np.int64)
+    dependency = _normalize_groups(dst, rng.gamma(1.5, size=len(src)), size)
+    sales_share = _normalize_groups(src, rng.gamma(1.5, size=len(src)), size)
+    return SupplierNetwork(
+        names=names,
+        tier=tier,
+        region=region,
+        country=country,
+        currency=currency,
+        port=port,
+        spend=spend,
+        lead_days=lead_days,
+        fail_prob=fail_prob,
+        has_backup=rng.random(size) < 0.4,
+        src=src,
+        dst=dst,
+        dependency=dependency,
+        sales_share=sales_share,
+    )
+
+
+def resolve_shock(network: SupplierNetwork, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a disruption request against the network; raises ValueError for anything unknown"""
+    kind = spec.get("disruption")
+    if kind not in DISRUPTIONS:
+        raise ValueError(f"disruption must be one of {', '.join(DISRUPTIONS)}")
+    shock = {k: v for k, v in DISRUPTIONS[kind].items() if k not in ("name", "probability")}
+    shock.update({k: v for k, v in spec.items() if v is not None and (k in shock or k in ("region", "count"))})
+    shock["kind"] = kind
+
+    if kind == "supplier_insolvency":
+        if spec.get("suppliers"):
+            unknown = [s for s in spec["suppliers"] if s not in network.index]
+            if unknown:
+                raise ValueError(f"Unknown supplier: {unknown[0]}")
+            targets = [network.index[s] for s in spec["suppliers"]]
+        elif spec.get("region") or spec.get("count"):
+            # The largest tier-1 suppliers in a region, e.g. "3 APAC suppliers fail simultaneously"
+            region = spec.get("region")
+            if region is not None and region not in REGIONS:
+                raise ValueError(f"region must be one of {', '.join(REGIONS)}")
+            candidates = np.flatnonzero((network.tier == 1) & ((network.region == region) if region else True))
+            targets = candidates[np.argsort(-network.spend[candidates], kind="stable")][: int(spec.get("count") or 1)].tolist()
+        else:
+            targets = [network.index[s] for s in shock["suppliers"]]
+        shock["targets"] = targets
+        shock["suppliers"] = [network.names[i] for i in targets]
+    elif kind == "tariff_change" and shock["country"] not in CURRENCIES:
+        raise ValueError(f"country must be one of {', '.join(CURRENCIES)}")
+    elif kind == "port_closure" and shock["port"] not in set(network.port):
+        raise ValueError(f"port must be one of {', '.join(sorted(set(network.port) - {'Overland'}))}")
+    elif kind == "fx_shock" and shock["currency"] not in set(CURRENCIES.values()):
+        raise ValueError(f"currency must be one of {', '.join(sorted(set(CURRENCIES.values())))}")
+    return shock
+
+
+def simulate_paths(shock: Dict[str, Any], paths: int, seed: int, network_seed: int = NETWORK_SEED) -> Dict[str, np.ndarray]:
+    """One batch of paths as (suppliers x paths) arrays; process-pool entry point"""
+    network = supplier_network(network_seed)
+    rng = np.random.default_rng(seed)
+    size = network.size
+    tier1 = network.tier == 1
+    n1 = int(tier1.sum())
+    kind = shock["kind"]
+
+    # Supplier-major so the per-tier gathers and reductions run over contiguous rows
+    loss = np.zeros((size, paths), dtype=np.float32)     # Capacity each supplier loses
+    direct_cost = np.zeros(paths)
+    revenue = np.zeros(paths)
+    if kind == "supplier_insolvency":
+        targets = np.asarray(shock["targets"])
+        loss[targets] = 1.0
+        # Requalifying replacement volume takes longer without a backup already qualified
+        typical = np.where(network.has_backup[targets], 30.0, 75.0)
+        duration = rng.lognormal(np.log(typical)[:, None], 0.35, (len(targets), paths)).max(axis=0)
+    elif kind == "port_closure":
+        stuck = network.port == shock["port"]
+        loss[stuck] = rng.uniform(0.6, 1.0, paths)
+        # Closure plus the backlog that clears after it reopens
+        duration = shock["duration_days"] * rng.uniform(1.0, 1.6, paths)
+    elif kind in ("tariff_change", "fx_shock"):
+        mask = network.country == shock["country"] if kind == "tariff_change" else network.currency == shock["currency"]
+        exposed_spend = float((network.spend * network.exposure(mask)).sum())
+        duration = np.full(paths, float(shock["horizon_days"]))
+        if kind == "tariff_change":
+            pass_through = rng.uniform(0.6, 1.0, paths)
+            direct_cost = exposed_spend * shock["magnitude"] * pass_through * duration / 365
+            # Re-sourcing part of the taxed volume briefly disrupts those suppliers
+            loss[mask & tier1] = rng.uniform(0.0, 0.2, paths)
+        else:
+            hedged = rng.uniform(0.2, 0.6, paths)
+            direct_cost = exposed_spend * abs(shock["magnitude"]) * (1 - hedged) * duration / 365
+    else:  # demand_surge
+        duration = np.full(paths, float(shock["horizon_days"]))
+        surge = np.maximum(0.0, rng.normal(shock["magnitude"], 0.15 * shock["magnitude"], paths))
+        headroom = rng.uniform(0.05, 0.25, (n1, paths))
+        over = np.maximum(0.0, surge - headroom)
+        loss[tier1] = np.minimum(1.0, over / (1 + surge))
+        premium = rng.uniform(0.2, 0.5, paths)
+        direct_cost = ANNUAL_SPEND * (network.volume_share[tier1] @ over) * premium * duration / 365
+        served = 1 - network.volume_share[tier1] @ loss[tier1]
+        revenue = surge * served * ANNUAL_SPEND / (1 - GROSS_MARGIN) * duration / 365
+    direct_loss = loss > 0
+
+    # Lost inputs reach each customer in proportion to its dependency, less the 0-80% that stock and alternates cover
+    exposed = rng.random((size, paths), dtype=np.float32)
+    exposed *= -0.8
+    exposed += 1.0
+    for group in network.downstream:
+        inflow = np.add.reduceat(loss[group.src] * group.weight[:, None], group.starts, axis=0)
+        loss[group.targets] = np.minimum(1.0, loss[group.targets] + inflow * exposed[group.targets])
+    # A customer that produces less buys less from its own suppliers
+    demand_loss = np.zeros((size, paths), dtype=np.float32)
+    for group in network.upstream:
+        lost = np.maximum(loss[group.dst], demand_loss[group.dst]) * group.weight[:, None]
+        demand_loss[group.targets] = np.add.reduceat(lost, group.starts, axis=0)
+    affected = ((loss > AFFECTED_CAPACITY) | (demand_loss > AFFECTED_DEMAND)) & ~direct_loss
+
+    shortfall = network.volume_share[tier1] @ loss[tier1]
+    safety_stock_days = rng.uniform(10, 25, paths)
+    unmet = shortfall * np.clip(1 - safety_stock_days / duration, 0.0, 1.0)
+    otif = np.clip(BASELINE_OTIF * (1 - unmet * rng.uniform(0.8, 1.2, paths)), 0.0, 100.0)
+    # Spot buys and expediting for the volume that is short while it lasts
+    replacement = ANNUAL_SPEND * shortfall * duration / 365 * rng.uniform(0.15, 0.45, paths)
+    # Disrupted volume waits for alternates: part of the disruption's duration
+    lead_time = np.where(shortfall > 0, duration * rng.uniform(0.1, 0.25, paths), 0.0)
+    tier_affected = np.stack([affected[network.tier == k].sum(axis=0) for k in range(1, len(TIER_SIZES) + 1)], axis=1)
+    return {
+        "cost": replacement + direct_cost,
+        "otif": otif,
+        "lead_time": lead_time,
+        "shortfall": shortfall * 100,
+        "duration": duration,
+        "revenue": revenue,
+        "tier_affected": tier_affected,
+        "supplier_hits": affected.sum(axis=1),
+    }
+
+
+def distribution(values: np.ndarray, digits: int = 1) -> Dict[str, float]:
+    points = np.percentile(values, PERCENTILES)
+    return {
+        **{f"p{p}": round(float(v), digits) for p, v in zip(PERCENTILES, points)},
+        "mean": round(float(values.mean()), digits),
+    }
+
+
+def format_money(amount: float) -> str:
+    sign = "-" if amount < 0 else "+"
+    amount = abs(amount)
+    if amount >= 1e6:
+        return f"{sign}${amount / 1e6:.1f}M"
+    return f"{sign}${amount / 1e3:.0f}K"
+
+
+def format_horizon(days: float) -> str:
+    if days >= 60:
+        return f"{days / 30.4:.0f} months"
+    if days >= 14:
+        return f"{days / 7:.0f} weeks"
+    return f"{days:.0f} days"
+
+
+def summarize(network: SupplierNetwork, shock: Dict[str, Any], outcomes: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Percentiles and the Scenario Planner's result shape: impacts and per-tier cascade"""
+    kind = shock["kind"]
+    paths = len(outcomes["cost"])
+    cost, otif, lead = outcomes["cost"], outcomes["otif"], outcomes["lead_time"]
+    horizon = float(np.median(outcomes["duration"]))
+    period_spend = ANNUAL_SPEND * horizon / 365
+
+    if kind == "supplier_insolvency":
+        # All of them failing together, treating failures as independent
+        probability = float(np.prod(network.fail_prob[shock["targets"]]))
+        names = shock["suppliers"]
+        title = f"{names[0]} Insolvency" if len(names) == 1 else f"{len(names)} Suppliers Fail Simultaneously"
+    else:
+        probability = DISRUPTIONS[kind]["probability"]
+        title = {
+            "tariff_change": lambda: f"{shock['magnitude'] * 100:.0f}% {shock['country']} Tariff Change",
+            "port_closure": lambda: f"{shock['port']} Port Closure ({shock['duration_days']:g} days)",
+            "fx_shock": lambda: f"{shock['currency']} Moves {shock['magnitude'] * 100:.0f}% Against USD",
+            "demand_surge": lambda: f"{shock['magnitude'] * 100:.0f}% Demand Surge",
+        }[kind]()
+
+    affected_share = np.median(outcomes["shortfall"]) / 100
+    base_lead = float((network.lead_days * network.volume_share).sum())
+    impacts = [
+        {"metric": "Cost Impact", "value": format_money(float(np.median(cost))),
+         "change": round(float(np.median(cost)) / period_spend * 100, 1), "direction": "negative",
+         "range": f"{format_money(float(np.percentile(cost, 5)))} to {format_money(float(np.percentile(cost, 95)))}"},
+        {"metric": "OTIF", "value": f"{np.median(otif):.1f}%",
+         "change": round(float(np.median(otif)) - BASELINE_OTIF, 1), "direction": "negative",
+         "range": f"{np.percentile(otif, 5):.1f}% to {np.percentile(otif, 95):.1f}%"},
+        {"metric": "Lead Time", "value": f"+{np.median(lead):.0f} days",
+         "change": round(float(np.median(lead)) / base_lead * 100, 1), "direction": "negative",
+         "range": f"+{np.percentile(lead, 5):.0f} to +{np.percentile(lead, 95):.0f} days"},
+        {"metric": "Supply at Risk", "value": f"{affected_share * 100:.1f}%",
+         "change": round(float(affected_share) * 100, 1), "direction": "negative",
+         "range": f"{np.percentile(outcomes['shortfall'], 5):.1f}% to {np.percentile(outcomes['shortfall'], 95):.1f}%"},
+    ]
+    if kind == "demand_surge":
+        revenue = outcomes["revenue"]
+        impacts[3] = {"metric": "Revenue Opportunity", "value": format_money(float(np.median(revenue))),
+                      "change": round(shock["magnitude"] * 100, 1), "direction": "positive",
+                      "range": f"{format_money(float(np.percentile(revenue, 5)))} to {format_money(float(np.percentile(revenue, 95)))}"}
+
+    cascade = []
+    hits = outcomes["supplier_hits"]
+    for k in range(1, len(TIER_SIZES) + 1):
+        counts = outcomes["tier_affected"][:, k - 1]
+        # Same statistic as the card shows: a tier that is untouched in the typical path is left out
+        affected = int(round(float(np.median(counts))))
+        if affected == 0:
+            continue
+        in_tier = np.flatnonzero(network.tier == k)
+        top = in_tier[np.argsort(-hits[in_tier], kind="stable")[:3]]
+        cascade.append({
+            "tier": k,
+            "affected": affected,
+            "affected_p95": int(np.percentile(counts, 95)),
+            "suppliers": [network.names[i] for i in top if hits[i] > 0],
+            "hit_probability": [round(float(hits[i]) / paths, 3) for i in top if hits[i] > 0],
+        })
+
+    return {
+        "scenario": title,
+        "disruption": kind,
+        "probability": round(probability, 3),
+        "timeHorizon": format_horizon(horizon),
+        "impacts": impacts,
+        "cascadeEffects": cascade,
+        "distributions": {
+            "cost": distribution(cost, 0),
+            "otif": distribution(otif),
+            "lead_time_days": distribution(lead),
+            "supply_shortfall_pct": distribution(outcomes["shortfall"], 2),
+            "duration_days": distribution(outcomes["duration"]),
+        },
+        "paths": paths,
+    }
+
+
+class ScenarioEngine:
+    """Splits a scenario's paths into seeded batches and runs them on a process pool"""
+
+    def __init__(self, max_workers: int = None, batch_paths: int = None, network_seed: int = NETWORK_SEED):
+        self.max_workers = max_workers or int(os.environ.get("SCENARIO_WORKERS", min(4, os.cpu_count() or 1)))
+        self.batch_paths = batch_paths or int(os.environ.get("SCENARIO_BATCH_PATHS", 2500))
+        self.network_seed = network_seed
+        self.network = supplier_network(network_seed)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {"runs": 0, "paths": 0, "seconds": 0.0}
+
+    def start(self):
+        """Create the pool and build the network in every worker ahead of the first request"""
+        if self._pool is not None:
+            return
+        # spawn: forking a process that holds the event loop and driver threads is unsafe
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        for _ in range(self.max_workers):
+            self._pool.submit(supplier_network, self.network_seed)
+
+    def batches(self, paths: int, seed: Optional[int]) -> List[Tuple[int, int]]:
+        """(paths, seed) per batch; independent streams from one SeedSequence so results are reproducible"""
+        sizes = [self.batch_paths] * (paths // self.batch_paths)
+        if paths % self.batch_paths:
+            sizes.append(paths % self.batch_paths)
+        streams = np.random.SeedSequence(seed).spawn(len(sizes))
+        return [(size, int(stream.generate_state(1)[0])) for size, stream in zip(sizes, streams)]
+
+    async def run(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Simulate spec["paths"] paths of a disruption; raises ValueError for an invalid spec"""
+        self.start()
+        shock = resolve_shock(self.network, spec)
+        paths = int(spec.get("paths") or 10000)
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, simulate_paths, shock, size, seed, self.network_seed)
+            for size, seed in self.batches(paths, spec.get("seed"))
+        ))
+        outcomes = {
+            key: np.sum([part[key] for part in parts], axis=0) if key == "supplier_hits" else np.concatenate([part[key] for part in parts])
+            for key in parts[0]
+        }
+        result = summarize(self.network, shock, outcomes)
+        elapsed = time.perf_counter() - started
+        self.stats["runs"] += 1
+        self.stats["paths"] += paths
+        self.stats["seconds"] += elapsed
+        return {**result, "elapsed_seconds": round(elapsed, 3), "batches": len(parts), "workers": self.max_workers}
+
+    def disruptions(self) -> List[Dict[str, Any]]:
+        return [{"disruption": kind, **defaults} for kind, defaults in DISRUPTIONS.items()]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, HTTPException, Query, WebSocket
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,12 +7,15 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone
 import asyncio
+import base64
 import random
 import json
+from bson import ObjectId
+from bson.errors import InvalidId
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env', override=True)
@@ -21,12 +25,33 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+from intent_router import get_intent_router
+from command_cache import get_command_cache
+from llm_stream import JsonStringFieldStreamer, peek_array, peek_string
+from history_buffer import WriteBehindBuffer
+from component_registry import CACHE_NONE, ComponentRegistry, encode_json
+from fast_json import FAST_JSON_ENABLED, FastJSONResponse, fast_json
+from ws_hub import BroadcastHub
+from pubsub import get_pubsub
+from optimization_engine import OptimizationEngine, format_duration
+from twin_simulator import SupplyChainTwin
+from scenario_engine import ScenarioEngine
+
+# Command history is written behind the request path in insert_many batches
+command_history_buffer = WriteBehindBuffer(db.command_history)
+
 # LLM Integration
 from openai import AsyncOpenAI
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
+# Any OpenAI-compatible endpoint works, e.g. a local fake server in tests
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_MODEL = os.environ.get("LLM_MODEL", "openai/gpt-4o-mini")
 
 # Create the main app
-app = FastAPI(title="ATLAS Supply Chain OS")
+app = FastAPI(
+    title="ATLAS Supply Chain OS",
+    default_response_class=FastJSONResponse if FAST_JSON_ENABLED else JSONResponse,
+)
 api_router = APIRouter(prefix="/api")
 
 # Configure logging
@@ -37,7 +62,7 @@ logger = logging.getLogger(__name__)
 client_llm = None
 if OPENROUTER_API_KEY:
     client_llm = AsyncOpenAI(
-        base_url="https://openrouter.ai/api/v1",
+        base_url=OPENROUTER_BASE_URL,
         api_key=OPENROUTER_API_KEY,
     )
 else:
@@ -48,12 +73,14 @@ else:
 class CommandRequest(BaseModel):
     command: str
     session_id: Optional[str] = None
+    bypass_cache: bool = False
 
 class CommandResponse(BaseModel):
     response: str
     ui_components: List[Dict[str, Any]]
     agent_activity: Optional[Dict[str, Any]] = None
     intent: str
+    cache: Optional[str] = None
 
 class AgentStatus(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -84,6 +111,35 @@ class BlockchainTransaction(BaseModel):
     timestamp: str
     hash: str
 
+class RiskBatchRequest(BaseModel):
+    symbols: Optional[List[str]] = None
+    sectors: Optional[List[str]] = None
+    tiers: Optional[List[int]] = None
+    stream: bool = False
+
+class RouteStop(BaseModel):
+    # Planar x/y or geographic lat/lon; the first stop is the depot
+    x: Optional[float] = None
+    y: Optional[float] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    demand: float = 0.0
+    time_window: Optional[List[float]] = None
+    service_time: float = 0.0
+
+class OptimizationRequest(BaseModel):
+    problem_type: str = "VRP"
+    stops: Optional[List[RouteStop]] = None
+    num_nodes: int = Field(200, ge=2, le=5000)   # synthetic instance size when stops are omitted
+    vehicles: int = Field(50, ge=1)
+    vehicle_capacity: Optional[float] = Field(None, gt=0)
+    metric: Optional[str] = None                 # euclidean, haversine or road; lat/lon stops default to haversine
+    road_factor: Optional[float] = Field(None, ge=1)   # road metric only: road km per great-circle km
+    speed: float = Field(1.0, gt=0)
+    time_limit: float = Field(30.0, gt=0, le=600)
+    seed: Optional[int] = None
+    priority: int = Field(0, ge=-10, le=10)   # higher runs first among queued jobs
+
 class QuantumOptimization(BaseModel):
     id: str
     problem_type: str
@@ -181,20 +237,10 @@ BLOCKCHAIN_TRANSACTIONS = [
     {"id": "tx-003", "type": "escrow", "parties": ["Tier-2 Supplier X", "ATLAS Corp"], "amount": 78500, "status": "confirmed", "timestamp": "2026-01-15T09:15:33Z", "hash": "0x2b5e...4a9c"},
 ]
 
-QUANTUM_OPTIMIZATIONS = [
-    {"id": "qopt-001", "problem_type": "VRP", "nodes": 200, "vehicles": 50, "status": "completed", "classical_time": "24h 12m", "quantum_time": "4m 23s", "improvement": 28.4, "solution": {"routes": 50, "total_distance": 12450, "fuel_saved": "18.5%"}},
-    {"id": "qopt-002", "problem_type": "TSP", "nodes": 150, "vehicles": 1, "status": "running", "classical_time": "est. 18h", "quantum_time": "est. 3m", "improvement": 0, "solution": {}},
-]
-
 # ===================== LLM COMMAND PROCESSOR =====================
 
-async def process_command_with_llm(command: str, session_id: str) -> Dict[str, Any]:
-    """Process user command with LLM and determine intent + UI components"""
-    
-    if not client_llm:
-        return analyze_command_fallback(command, "Mock LLM (OpenRouter key missing): " + command)
-    
-    system_message = """You are ATLAS, the orchestrator of a next-generation autonomous supply chain platform. 
+# Short fields come first so streamed commands can render components before the text finishes
+SYSTEM_PROMPT = """You are ATLAS, the orchestrator of a next-generation autonomous supply chain platform. 
 Your role is to understand user intent and respond with both conversational text AND UI component instructions.
 
 You control 5 AI agents:
@@ -238,205 +284,165 @@ When users ask about ethereum, mainnet, blockchain transactions, crypto, settlem
 When users ask about strategy, chess, game theory, competition, market position, competitors → use chess_bi
 
 Always be concise, data-driven, and proactive. You are ATLAS - the brain of this autonomous supply chain platform.
-Format your response as JSON with keys: response, components (array), primary_agent, intent"""
+Format your response as JSON with keys in this order: intent, primary_agent, components (array), response"""
 
+
+async def process_command_with_llm(command: str, session_id: str, bypass_cache: bool = False) -> Dict[str, Any]:
+    """Process user command with LLM and determine intent + UI components"""
+    
+    if not client_llm:
+        return analyze_command_fallback(command, "Mock LLM (OpenRouter key missing): " + command)
+    
+    # Paraphrases only share a cached answer when they also route to the same intent
+    result, tier = await get_command_cache().get_or_compute(
+        command,
+        lambda: call_llm(command),
+        guard=get_intent_router().classify(command),
+        bypass=bypass_cache,
+    )
+    if tier:
+        result["cache"] = tier
+    return result
+
+async def call_llm(command: str):
+    """One LLM round-trip; returns (result, cacheable) where errors are not cacheable"""
     try:
         completion = await client_llm.chat.completions.create(
-            model="openai/gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"User command: {command}\n\nRespond with JSON format."}
-            ]
+            model=LLM_MODEL,
+            messages=llm_messages(command)
         )
-        
-        response = completion.choices[0].message.content
-        
-        # Parse LLM response
-        try:
-            # Try to extract JSON from response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0]
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0]
-            else:
-                json_str = response
-            
-            parsed = json.loads(json_str.strip())
-            logger.info(f"LLM parsed response: {parsed}")
-            # Ensure components is a list
-            if "components" not in parsed or not isinstance(parsed.get("components"), list):
-                parsed["components"] = []
-            return parsed
-        except json.JSONDecodeError:
-            # Fallback: analyze command manually
-            logger.info(f"JSON decode failed, using fallback for: {command}")
-            return analyze_command_fallback(command, response)
-            
+        return parse_llm_response(command, completion.choices[0].message.content), True
     except Exception as e:
         logger.error(f"LLM error: {e}")
-        return analyze_command_fallback(command, "I'm processing your request.")
+        return analyze_command_fallback(command, "I'm processing your request."), False
+
+def llm_messages(command: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"User command: {command}\n\nRespond with JSON format."}
+    ]
+
+def parse_llm_response(command: str, response: str) -> Dict[str, Any]:
+    """Parse the LLM's JSON answer, falling back to keyword routing around free text"""
+    try:
+        # Try to extract JSON from response
+        if "```json" in response:
+            json_str = response.split("```json")[1].split("```")[0]
+        elif "```" in response:
+            json_str = response.split("```")[1].split("```")[0]
+        else:
+            json_str = response
+        
+        parsed = json.loads(json_str.strip())
+        logger.info(f"LLM parsed response: {parsed}")
+        # Ensure components is a list
+        if "components" not in parsed or not isinstance(parsed.get("components"), list):
+            parsed["components"] = []
+        return parsed
+    except json.JSONDecodeError:
+        # Fallback: analyze command manually
+        logger.info(f"JSON decode failed, using fallback for: {command}")
+        return analyze_command_fallback(command, response)
 
 def analyze_command_fallback(command: str, llm_response: str) -> Dict[str, Any]:
     """Fallback command analysis when LLM parsing fails"""
-    command_lower = command.lower()
-    
-    # PRIORITY: Check for exact quick command matches first
-    if "market data" in command_lower:
-        return {
-            "response": "Real-Time Market Intelligence activated. Displaying live Fortune 500 supply chain data from Yahoo Finance with sector performance and risk alerts.",
-            "components": ["market_data", "agents"],
-            "primary_agent": "risk",
-            "intent": "market_analysis"
-        }
-    
-    # Determine intent and components based on keywords
-    if any(word in command_lower for word in ["demand", "forecast", "predict", "sales"]):
-        return {
-            "response": llm_response or "Analyzing demand patterns. The Demand Agent is processing current market signals and historical data.",
-            "components": ["agents", "metrics"],
-            "primary_agent": "demand",
-            "intent": "demand_analysis"
-        }
-    elif any(word in command_lower for word in ["procure", "supplier", "buy", "source", "purchase"]):
-        return {
-            "response": llm_response or "Activating Procurement Agent. Analyzing supplier options and negotiation opportunities.",
-            "components": ["agents", "supplier_network", "blockchain"],
-            "primary_agent": "procurement",
-            "intent": "procurement"
-        }
-    elif any(word in command_lower for word in ["route", "logistics", "ship", "deliver", "transport", "map"]):
-        return {
-            "response": llm_response or "Logistics Agent engaged. Interactive map displaying distribution centers, routes, and active shipments.",
-            "components": ["map", "metrics"],
-            "primary_agent": "logistics",
-            "intent": "logistics_optimization"
-        }
-    elif any(word in command_lower for word in ["supplier", "network", "graph", "tier", "partner"]):
-        return {
-            "response": llm_response or "Displaying supplier network graph. Multi-tier relationships and risk indicators visualized.",
-            "components": ["supplier_network", "risk_alerts"],
-            "primary_agent": "procurement",
-            "intent": "supplier_analysis"
-        }
-    elif any(word in command_lower for word in ["explain", "why", "reason", "logic", "symbolic", "trace", "decision", "rationale", "justif", "causal"]):
-        return {
-            "response": llm_response or "Neuro-Symbolic Reasoning Engine activated. Displaying decision traces with neural insights, symbolic rules, and compliance status.",
-            "components": ["neuro_symbolic", "agents"],
-            "primary_agent": "orchestrator",
-            "intent": "explainability"
-        }
-    elif any(word in command_lower for word in ["scenario", "what if", "what-if", "simulate", "counterfactual", "planning"]):
-        return {
-            "response": llm_response or "Counterfactual Scenario Planner activated. Select a scenario to simulate cascading effects across the supply chain.",
-            "components": ["scenario_planner"],
-            "primary_agent": "orchestrator",
-            "intent": "scenario_planning"
-        }
-    elif any(word in command_lower for word in ["contract", "smart contract", "agreement", "settlement", "payment", "terms"]):
-        return {
-            "response": llm_response or "Contract Intelligence module loaded. View active smart contracts, settlements, and create new agreements.",
-            "components": ["contracts", "blockchain"],
-            "primary_agent": "procurement",
-            "intent": "contracts"
-        }
-    elif any(word in command_lower for word in ["timeline", "history", "audit", "decisions", "chronological", "replay"]):
-        return {
-            "response": llm_response or "Decision Timeline activated. View chronological agent decisions with full audit trail for board review.",
-            "components": ["timeline"],
-            "primary_agent": "orchestrator",
-            "intent": "audit"
-        }
-    elif any(word in command_lower for word in ["3d", "digital twin", "world model", "visualization", "physics", "cascade", "demand spike", "simulation", "dynamics"]):
-        return {
-            "response": llm_response or "Digital Twin loaded with physics-based simulation. Click nodes to trigger demand spikes and observe cascade effects through your supply chain network.",
-            "components": ["world_model"],
-            "primary_agent": "orchestrator",
-            "intent": "digital_twin"
-        }
-    elif any(word in command_lower for word in ["demo", "walkthrough", "tour", "presentation", "showcase"]):
-        return {
-            "response": llm_response or "Interactive Demo Walkthrough started. Follow the guided tour of ATLAS capabilities.",
-            "components": ["demo"],
-            "primary_agent": "orchestrator",
-            "intent": "demo"
-        }
-    elif any(word in command_lower for word in ["market", "stock", "fortune", "yahoo", "finance", "price", "sector", "real-time", "realtime"]):
-        return {
-            "response": llm_response or "Real-Time Market Intelligence activated. Displaying live Fortune 500 supply chain data from Yahoo Finance with sector performance and risk alerts.",
-            "components": ["market_data", "agents"],
-            "primary_agent": "risk",
-            "intent": "market_analysis"
-        }
-    elif any(word in command_lower for word in ["risk", "alert", "danger", "warning", "fail"]):
-        return {
-            "response": llm_response or "Risk Sentinel activated. Scanning supplier network for potential disruptions and vulnerabilities.",
-            "components": ["agents", "risk_alerts", "supplier_network"],
-            "primary_agent": "risk",
-            "intent": "risk_assessment"
-        }
-    elif any(word in command_lower for word in ["blockchain", "transaction", "payment", "settle", "contract", "ledger"]):
-        return {
-            "response": llm_response or "Accessing blockchain ledger. Smart contracts and settlements are displayed.",
-            "components": ["blockchain", "quantum"],
-            "primary_agent": "orchestrator",
-            "intent": "blockchain_view"
-        }
-    elif any(word in command_lower for word in ["quantum", "qaoa", "optimization"]):
-        return {
-            "response": llm_response or "Quantum optimization console active. Displaying hybrid solver status and results.",
-            "components": ["quantum"],
-            "primary_agent": "logistics",
-            "intent": "quantum_view"
-        }
-    elif any(word in command_lower for word in ["robot", "robotics", "autonomous", "warehouse automation", "amr", "agv", "drone", "embodied"]):
-        return {
-            "response": llm_response or "Embodied AI robotics console activated. Monitoring autonomous fleet: AMRs, AGVs, drones, and robotic arms.",
-            "components": ["embodied_ai", "agents"],
-            "primary_agent": "logistics",
-            "intent": "robotics"
-        }
-    elif any(word in command_lower for word in ["6g", "edge", "latency", "bandwidth", "global network", "edge computing"]):
-        return {
-            "response": llm_response or "6G Edge Network dashboard activated. Displaying global edge node status, latency metrics, and bandwidth utilization.",
-            "components": ["sixg_edge", "agents"],
-            "primary_agent": "orchestrator",
-            "intent": "edge_network"
-        }
-    elif any(word in command_lower for word in ["ethereum", "mainnet", "crypto", "eth", "settlement", "smart contract"]):
-        return {
-            "response": llm_response or "Blockchain Mainnet console active. Ethereum L1 settlement layer showing live transactions and smart contract status.",
-            "components": ["blockchain_mainnet", "agents"],
-            "primary_agent": "orchestrator",
-            "intent": "blockchain_mainnet"
-        }
-    elif any(word in command_lower for word in ["strategy", "chess", "game theory", "competition", "competitor", "market position"]):
-        return {
-            "response": llm_response or "Strategic Chess BI engine activated. QEMASI analyzing competitive landscape and market positioning.",
-            "components": ["chess_bi", "agents"],
-            "primary_agent": "orchestrator",
-            "intent": "strategy"
-        }
-    elif any(word in command_lower for word in ["erp", "wms", "inventory", "orders", "warehouse", "stock", "fulfillment"]):
-        return {
-            "response": llm_response or "ERP/WMS Live Feed connected. Real-time inventory levels, order status, and shipment tracking now displayed.",
-            "components": ["erp_wms"],
-            "primary_agent": "logistics",
-            "intent": "erp_wms"
-        }
-    elif any(word in command_lower for word in ["status", "overview", "dashboard", "show all", "everything"]):
-        return {
-            "response": llm_response or "ATLAS Command Center initialized. All agents reporting status. Supply chain systems nominal.",
-            "components": ["agents", "metrics", "risk_alerts"],
-            "primary_agent": "orchestrator",
-            "intent": "overview"
-        }
-    else:
-        return {
-            "response": llm_response or "ATLAS is ready. How can I assist with your supply chain operations today?",
-            "components": ["agents"],
-            "primary_agent": "orchestrator",
-            "intent": "general"
-        }
+    return get_intent_router().route(command, llm_response)
+
+# ===================== COMMAND RESPONSES =====================
+
+QUICK_COMMANDS = {
+    "market data": {"response": "Real-Time Market Intelligence activated. Displaying live Fortune 500 supply chain data from Yahoo Finance.", "components": ["market_data", "agents"], "primary_agent": "risk", "intent": "market_analysis"},
+    "show all agents": {"response": "ATLAS Command Center initialized. All 5 autonomous agents are online and operational.", "components": ["agents", "metrics", "risk_alerts"], "primary_agent": "orchestrator", "intent": "overview"},
+    "digital twin": {"response": "Digital Twin loaded with physics-based simulation. Click nodes to trigger demand spikes.", "components": ["world_model"], "primary_agent": "orchestrator", "intent": "digital_twin"},
+    "scenario planner": {"response": "Counterfactual Scenario Planner activated. Select a scenario to simulate.", "components": ["scenario_planner"], "primary_agent": "orchestrator", "intent": "scenario_planning"},
+    "decision timeline": {"response": "Decision Timeline activated. View chronological agent decisions.", "components": ["timeline"], "primary_agent": "orchestrator", "intent": "audit"},
+}
+
+async def save_command_history(command: str, session_id: str):
+    """Queue command for the history write-behind buffer"""
+    if not await command_history_buffer.add({"id": str(uuid.uuid4()), "command": command, "session_id": session_id, "timestamp": datetime.now(timezone.utc).isoformat()}):
+        logger.warning("Command history buffer full, dropped record")
+
+def normalize_components(raw_components: List[Any]) -> List[str]:
+    """Normalize components - handle both string and object formats from LLM"""
+    normalized_comps = []
+    for comp in raw_components:
+        if isinstance(comp, str):
+            normalized_comps.append(comp)
+        elif isinstance(comp, dict):
+            # LLM might use 'type' or 'component' key
+            comp_type = comp.get("type") or comp.get("component")
+            if comp_type:
+                normalized_comps.append(comp_type)
+    return normalized_comps
+
+# Component name -> payload provider; static payloads are encoded once and reused
+component_registry = ComponentRegistry()
+
+component_registry.register("agents", lambda result: list(AGENTS_DATA.values()))
+component_registry.register("metrics", lambda result: {
+    "total_shipments": 12450,
+    "on_time_delivery": 99.2,
+    "cost_savings": 2400000,
+    "active_suppliers": 847,
+    "risk_alerts": 3,
+    "quantum_optimizations": 1247
+})
+component_registry.register("blockchain", lambda result: BLOCKCHAIN_TRANSACTIONS)
+component_registry.register("quantum", lambda result: list(reversed(QUANTUM_JOBS.values())))
+component_registry.register("risk_alerts", lambda result: [
+    {"id": "ra-001", "severity": "high", "supplier": "ChemCorp Ltd", "issue": "78% debt/EBITDA - 6 month failure risk", "probability": 0.72},
+    {"id": "ra-002", "severity": "medium", "supplier": "Taiwan Mfg Co", "issue": "Geopolitical exposure - cross-strait tensions", "probability": 0.45},
+    {"id": "ra-003", "severity": "low", "supplier": "EuroLogistics", "issue": "Port congestion delays possible", "probability": 0.23}
+])
+component_registry.register("supplier_network", lambda result: {
+    "nodes": 847,
+    "connections": 2341,
+    "tiers": 4,
+    "regions": ["APAC", "EMEA", "Americas"]
+})
+component_registry.register("map", lambda result: {
+    "routes": 50,
+    "distribution_centers": 12,
+    "active_shipments": 234
+})
+# One short field taken from the LLM's answer: not worth a memo keyed on free text
+component_registry.register(
+    "neuro_symbolic",
+    lambda result: {"agent": result.get("primary_agent", "orchestrator")},
+    cache=CACHE_NONE,
+)
+# Client-rendered components that carry no server data
+for name in ["contracts", "timeline", "demo",
+             "embodied_ai", "sixg_edge", "blockchain_mainnet", "chess_bi", "erp_wms", "market_data"]:
+    component_registry.register(name, lambda result: {})
+
+def encode_ui_components(result: Dict[str, Any]) -> bytes:
+    """Map components to actual UI data as a pre-serialized JSON array"""
+    normalized_comps = normalize_components(result.get("components", []))
+    logger.info(f"Normalized components: {normalized_comps}")
+    return component_registry.encode_components(normalized_comps, result)
+
+def encode_agent_activity(primary_agent: str) -> bytes:
+    """Agent record with a fresh updated_at, spliced onto its cached encoding"""
+    # The name comes from the LLM; unknown ones fall back so the memo holds one entry per agent
+    if primary_agent not in AGENTS_DATA:
+        primary_agent = "orchestrator"
+    agent = component_registry.memo("agent_activity", primary_agent, lambda: AGENTS_DATA[primary_agent])
+    return agent[:-1] + b',"updated_at":' + encode_json(datetime.now(timezone.utc).isoformat()) + b"}"
+
+def encode_command_response(result: Dict[str, Any]) -> bytes:
+    """Assemble the CommandResponse JSON body for a routed or LLM-parsed command result"""
+    response = result.get("response")
+    intent = result.get("intent")
+    return b"".join([
+        b'{"response":', encode_json("Command processed." if response is None else str(response)),
+        b',"ui_components":', encode_ui_components(result),
+        b',"agent_activity":', encode_agent_activity(result.get("primary_agent", "orchestrator")),
+        b',"intent":', encode_json("general" if intent is None else str(intent)),
+        b',"cache":', encode_json(result.get("cache")),
+        b"}",
+    ])
 
 # ===================== API ROUTES =====================
 
@@ -448,174 +454,235 @@ async def root():
 async def process_command(request: CommandRequest):
     """Process natural language command and return UI components"""
     session_id = request.session_id or str(uuid.uuid4())
-    
-    # Store command in history
-    try:
-        await db.command_history.insert_one({"id": str(uuid.uuid4()), "command": request.command, "session_id": session_id, "timestamp": datetime.now(timezone.utc).isoformat()})
-    except Exception as e:
-        logger.warning(f"Failed to save command history: {e}")
+    await save_command_history(request.command, session_id)
     
     # QUICK COMMAND SHORTCUTS - Skip LLM for exact matches
     command_lower = request.command.lower().strip()
-    quick_commands = {
-        "market data": {"response": "Real-Time Market Intelligence activated. Displaying live Fortune 500 supply chain data from Yahoo Finance.", "components": ["market_data", "agents"], "primary_agent": "risk", "intent": "market_analysis"},
-        "show all agents": {"response": "ATLAS Command Center initialized. All 5 autonomous agents are online and operational.", "components": ["agents", "metrics", "risk_alerts"], "primary_agent": "orchestrator", "intent": "overview"},
-        "digital twin": {"response": "Digital Twin loaded with physics-based simulation. Click nodes to trigger demand spikes.", "components": ["world_model"], "primary_agent": "orchestrator", "intent": "digital_twin"},
-        "scenario planner": {"response": "Counterfactual Scenario Planner activated. Select a scenario to simulate.", "components": ["scenario_planner"], "primary_agent": "orchestrator", "intent": "scenario_planning"},
-        "decision timeline": {"response": "Decision Timeline activated. View chronological agent decisions.", "components": ["timeline"], "primary_agent": "orchestrator", "intent": "audit"},
-    }
-    
-    if command_lower in quick_commands:
-        result = quick_commands[command_lower]
+    if command_lower in QUICK_COMMANDS:
+        result = QUICK_COMMANDS[command_lower]
     else:
         # Process with LLM for complex commands
-        result = await process_command_with_llm(request.command, session_id)
-    
-    # Map components to actual UI data
-    ui_components = []
-    raw_components = result.get("components", [])
+        result = await process_command_with_llm(request.command, session_id, bypass_cache=request.bypass_cache)
     
-    # Normalize components - handle both string and object formats from LLM
-    normalized_comps = []
-    for comp in raw_components:
-        if isinstance(comp, str):
-            normalized_comps.append(comp)
-        elif isinstance(comp, dict):
-            # LLM might use 'type' or 'component' key
-            comp_type = comp.get("type") or comp.get("component")
-            if comp_type:
-                normalized_comps.append(comp_type)
-    
-    logger.info(f"Normalized components: {normalized_comps}")
-    
-    for comp in normalized_comps:
-        if comp == "agents":
-            ui_components.append({"type": "agents", "data": list(AGENTS_DATA.values())})
-        elif comp == "metrics":
-            ui_components.append({"type": "metrics", "data": {
-                "total_shipments": 12450,
-                "on_time_delivery": 99.2,
-                "cost_savings": 2400000,
-                "active_suppliers": 847,
-                "risk_alerts": 3,
-                "quantum_optimizations": 1247
-            }})
-        elif comp == "blockchain":
-            ui_components.append({"type": "blockchain", "data": BLOCKCHAIN_TRANSACTIONS})
-        elif comp == "quantum":
-            ui_components.append({"type": "quantum", "data": QUANTUM_OPTIMIZATIONS})
-        elif comp == "risk_alerts":
-            ui_components.append({"type": "risk_alerts", "data": [
-                {"id": "ra-001", "severity": "high", "supplier": "ChemCorp Ltd", "issue": "78% debt/EBITDA - 6 month failure risk", "probability": 0.72},
-                {"id": "ra-002", "severity": "medium", "supplier": "Taiwan Mfg Co", "issue": "Geopolitical exposure - cross-strait tensions", "probability": 0.45},
-                {"id": "ra-003", "severity": "low", "supplier": "EuroLogistics", "issue": "Port congestion delays possible", "probability": 0.23}
-            ]})
-        elif comp == "supplier_network":
-            ui_components.append({"type": "supplier_network", "data": {
-                "nodes": 847,
-                "connections": 2341,
-                "tiers": 4,
-                "regions": ["APAC", "EMEA", "Americas"]
-            }})
-        elif comp == "map":
-            ui_components.append({"type": "map", "data": {
-                "routes": 50,
-                "distribution_centers": 12,
-                "active_shipments": 234
-            }})
-        elif comp == "neuro_symbolic":
-            ui_components.append({"type": "neuro_symbolic", "data": {
-                "agent": result.get("primary_agent", "orchestrator")
-            }})
-        elif comp == "scenario_planner":
-            ui_components.append({"type": "scenario_planner", "data": {}})
-        elif comp == "contracts":
-            ui_components.append({"type": "contracts", "data": {}})
-        elif comp == "timeline":
-            ui_components.append({"type": "timeline", "data": {}})
-        elif comp == "world_model":
-            ui_components.append({"type": "world_model", "data": {}})
-        elif comp == "digital_twin":
-            ui_components.append({"type": "digital_twin", "data": {}})
-        elif comp == "demo":
-            ui_components.append({"type": "demo", "data": {}})
-        elif comp == "embodied_ai":
-            ui_components.append({"type": "embodied_ai", "data": {}})
-        elif comp == "sixg_edge":
-            ui_components.append({"type": "sixg_edge", "data": {}})
-        elif comp == "blockchain_mainnet":
-            ui_components.append({"type": "blockchain_mainnet", "data": {}})
-        elif comp == "chess_bi":
-            ui_components.append({"type": "chess_bi", "data": {}})
-        elif comp == "erp_wms":
-            ui_components.append({"type": "erp_wms", "data": {}})
-        elif comp == "market_data":
-            ui_components.append({"type": "market_data", "data": {}})
+    return Response(content=encode_command_response(result), media_type="application/json")
+
+def sse_event(event: str, data: Any) -> str:
+    """One server-sent event; bytes are taken as already-encoded JSON"""
+    payload = data.decode() if isinstance(data, bytes) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+async def stream_llm_command(command: str):
+    """Stream one LLM completion; yields ("delta", text) / ("components", list) and finally ("result", (result, cacheable))"""
+    streamer = JsonStringFieldStreamer("response")
+    text = ""
+    components = None
+    try:
+        stream = await client_llm.chat.completions.create(model=LLM_MODEL, messages=llm_messages(command), stream=True)
+        async for chunk in stream:
+            piece = chunk.choices[0].delta.content if chunk.choices else None
+            if not piece:
+                continue
+            text += piece
+            delta = streamer.feed(piece)
+            if delta:
+                yield "delta", delta
+            if components is None:
+                components = peek_array(text, "components")
+                if components is not None:
+                    yield "components", {"components": components, "intent": peek_string(text, "intent")}
+        result = parse_llm_response(command, text)
+        # Free-text answers never matched the "response" field, so send it in one piece
+        if not streamer.text and result.get("response"):
+            yield "delta", result["response"]
+        yield "result", (result, True)
+    except Exception as e:
+        logger.error(f"LLM stream error: {e}")
+        result = analyze_command_fallback(command, "I'm processing your request.")
+        if not streamer.text:
+            yield "delta", result["response"]
+        yield "result", (result, False)
+
+@api_router.post("/command/stream")
+async def process_command_stream(request: CommandRequest):
+    """Server-sent events variant of /command.
+
+    Emits a provisional "intent" and "components" from the keyword router immediately,
+    then "delta" events with response text as the LLM generates it, an updated
+    "components" event once the LLM's own choice arrives, and a final "done" event
+    whose data matches the /command response body.
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    command = request.command
     
-    # Get agent activity
-    primary_agent = result.get("primary_agent", "orchestrator")
-    agent_activity = AGENTS_DATA.get(primary_agent)
-    if agent_activity:
-        agent_activity["updated_at"] = datetime.now(timezone.utc).isoformat()
+    async def events():
+        await save_command_history(command, session_id)
+        command_lower = command.lower().strip()
+        quick = QUICK_COMMANDS.get(command_lower)
+        routed = quick or get_intent_router().route(command)
+        yield sse_event("intent", {
+            "session_id": session_id,
+            "intent": routed["intent"],
+            "primary_agent": routed["primary_agent"],
+            "matched_intents": routed.get("matched_intents", [routed["intent"]]),
+            "provisional": quick is None,
+        })
+        provisional_components = normalize_components(routed["components"])
+        yield sse_event("components", b'{"ui_components":' + encode_ui_components(routed) + b',"provisional":' + encode_json(quick is None) + b"}")
+        
+        result = quick
+        cache = get_command_cache()
+        guard = routed["intent"]
+        if result is None and not client_llm:
+            result = analyze_command_fallback(command, "Mock LLM (OpenRouter key missing): " + command)
+        if result is None and not request.bypass_cache:
+            result, tier = cache.lookup(command, guard)
+            if result is not None:
+                cache.stats["hits" if tier == "exact" else "similar_hits"] += 1
+                result = dict(result, cache=tier)
+        if result is not None:
+            yield sse_event("delta", {"text": result.get("response", "")})
+        else:
+            cache.stats["bypassed" if request.bypass_cache else "misses"] += 1
+            async for kind, payload in stream_llm_command(command):
+                if kind == "delta":
+                    yield sse_event("delta", {"text": payload})
+                elif kind == "components":
+                    if normalize_components(payload["components"]) != provisional_components:
+                        update = {"components": payload["components"], "primary_agent": routed["primary_agent"]}
+                        yield sse_event("components", b"".join([
+                            b'{"ui_components":', encode_ui_components(update),
+                            b',"intent":', encode_json(payload["intent"]),
+                            b',"provisional":false}',
+                        ]))
+                else:
+                    result, cacheable = payload
+                    if cacheable:
+                        cache.store(command, result, guard)
+        
+        yield sse_event("done", encode_command_response(result))
     
-    return CommandResponse(
-        response=result.get("response", "Command processed."),
-        ui_components=ui_components,
-        agent_activity=agent_activity,
-        intent=result.get("intent", "general")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+@api_router.get("/command/cache/stats")
+async def get_command_cache_stats():
+    """Get hit-rate metrics for the LLM command response cache"""
+    return get_command_cache().get_stats()
+
+@api_router.delete("/command/cache")
+async def clear_command_cache():
+    """Drop every cached command response"""
+    get_command_cache().clear()
+    return {"status": "cleared"}
+
 @api_router.get("/agents", response_model=List[AgentStatus])
 async def get_agents():
     """Get all agent statuses"""
-    agents = []
-    for agent_data in AGENTS_DATA.values():
-        agent_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-        agents.append(AgentStatus(**agent_data))
-    return agents
+    updated_at = datetime.now(timezone.utc).isoformat()
+    return fast_json([dict(agent_data, updated_at=updated_at) for agent_data in AGENTS_DATA.values()])
 
 @api_router.get("/agents/{agent_type}", response_model=AgentStatus)
 async def get_agent(agent_type: str):
     """Get specific agent status"""
     if agent_type not in AGENTS_DATA:
         raise HTTPException(status_code=404, detail="Agent not found")
-    agent_data = AGENTS_DATA[agent_type].copy()
-    agent_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    return AgentStatus(**agent_data)
+    return fast_json(dict(AGENTS_DATA[agent_type], updated_at=datetime.now(timezone.utc).isoformat()))
 
 @api_router.get("/metrics", response_model=SupplyChainMetrics)
 async def get_metrics():
     """Get supply chain metrics"""
-    return SupplyChainMetrics(
-        total_shipments=12450 + random.randint(0, 50),
-        on_time_delivery=99.2 + random.uniform(-0.5, 0.3),
-        cost_savings=2400000 + random.randint(0, 50000),
-        active_suppliers=847,
-        risk_alerts=3,
-        quantum_optimizations=1247 + random.randint(0, 10)
-    )
+    return fast_json(current_metrics())
+
+def current_metrics() -> Dict[str, Any]:
+    return {
+        "total_shipments": 12450 + random.randint(0, 50),
+        "on_time_delivery": 99.2 + random.uniform(-0.5, 0.3),
+        "cost_savings": 2400000 + random.randint(0, 50000),
+        "active_suppliers": 847,
+        "risk_alerts": 3,
+        "quantum_optimizations": 1247 + random.randint(0, 10)
+    }
 
 @api_router.get("/blockchain/transactions", response_model=List[BlockchainTransaction])
 async def get_blockchain_transactions():
     """Get blockchain transactions"""
-    return [BlockchainTransaction(**tx) for tx in BLOCKCHAIN_TRANSACTIONS]
+    return fast_json(BLOCKCHAIN_TRANSACTIONS)
 
 @api_router.get("/quantum/optimizations", response_model=List[QuantumOptimization])
 async def get_quantum_optimizations():
-    """Get quantum optimization results"""
-    return [QuantumOptimization(**opt) for opt in QUANTUM_OPTIMIZATIONS]
+    """Get optimization results, newest first"""
+    return fast_json(await optimization_engine.list_jobs())
+
+@api_router.get("/quantum/optimizations/{optimization_id}")
+async def get_quantum_optimization(optimization_id: str):
+    """Get one optimization job, including its routes once completed"""
+    job = await optimization_engine.get_job(optimization_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Optimization not found")
+    return fast_json(job)
 
 @api_router.post("/quantum/optimize")
-async def trigger_quantum_optimization():
-    """Trigger a new quantum optimization"""
-    optimization_id = f"qopt-{str(uuid.uuid4())[:8]}"
+async def trigger_quantum_optimization(request: Optional[OptimizationRequest] = None):
+    """Queue a routing optimization; without a body, a 200-stop / 50-vehicle VRP"""
+    spec = (request or OptimizationRequest()).model_dump()
+    try:
+        job = optimization_engine.submit(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=429, detail="Optimization queue is full; retry later")
     return {
-        "id": optimization_id,
-        "status": "queued",
-        "estimated_time": "4-5 minutes",
-        "message": "Quantum optimization job queued. QAOA solver initializing."
+        "id": job["id"],
+        "status": job["status"],
+        "estimated_time": f"up to {format_duration(job['time_limit'])}",
+        "message": f"{job['problem_type']} optimization queued: {job['nodes']} nodes, {job['vehicles']} vehicles. Savings + 2-opt/or-opt solver starting."
     }
 
+@api_router.post("/quantum/optimizations/{optimization_id}/cancel")
+async def cancel_quantum_optimization(optimization_id: str):
+    """Cancel a queued job, or stop a running one and keep its best routes so far"""
+    job = QUANTUM_JOBS.get(optimization_id) or await optimization_engine.get_job(optimization_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Optimization not found")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Optimization already {job['status']}")
+    # Whichever worker owns the job cancels it; this one included, synchronously
+    ws_hub.bus.publish("quantum.cancel", optimization_id)
+    local = optimization_engine.jobs.get(optimization_id)
+    status = local["status"] if local is not None and local["status"] != "running" else "cancelling"
+    return {"id": optimization_id, "status": status}
+
+@api_router.get("/quantum/queue")
+async def get_quantum_queue():
+    """This worker's optimization queue and pool counters"""
+    return optimization_engine.get_stats()
+
+# Recent jobs from every worker, oldest first; the quantum.jobs topic streams their status
+QUANTUM_JOBS: Dict[str, Dict[str, Any]] = {}
+QUANTUM_JOBS_KEPT = 50
+
+def quantum_jobs_state() -> Dict[str, Any]:
+    while len(QUANTUM_JOBS) > QUANTUM_JOBS_KEPT:
+        QUANTUM_JOBS.pop(next(iter(QUANTUM_JOBS)))
+    return {job_id: dict(job) for job_id, job in QUANTUM_JOBS.items()}
+
+def on_quantum_job(job: Dict[str, Any]):
+    """Every worker records a job change from the bus and pushes it to its quantum.jobs subscribers"""
+    QUANTUM_JOBS[job["id"]] = job
+    component_registry.invalidate("quantum")
+    ws_hub.apply_state("quantum.jobs", quantum_jobs_state())
+
+async def load_recent_optimizations():
+    for job in reversed(await optimization_engine.list_jobs(limit=QUANTUM_JOBS_KEPT)):
+        QUANTUM_JOBS.setdefault(job["id"], job)
+    component_registry.invalidate("quantum")
+
+# Solves run in a process pool; each status change is shared with every worker over the bus
+optimization_engine = OptimizationEngine(db.optimizations, on_update=lambda job: ws_hub.bus.publish("quantum.job", job))
+
 @api_router.get("/risk/alerts")
 async def get_risk_alerts():
     """Get current risk alerts"""
@@ -625,41 +692,334 @@ async def get_risk_alerts():
         {"id": "ra-003", "severity": "low", "supplier": "EuroLogistics", "issue": "Port congestion delays possible", "probability": 0.23, "recommendation": "Monitor Rotterdam schedules"}
     ]
 
-# WebSocket for real-time updates
+# WebSocket for real-time updates: one producer per worker encodes each update once for all clients
+ws_hub = BroadcastHub(bus=get_pubsub())
+
+async def build_agent_update() -> str:
+    update = {
+        "type": "agent_update",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "agents": agent_snapshot()
+    }
+    return encode_json(update).decode()
+
+def agent_snapshot() -> Dict[str, Any]:
+    return {
+        name: {
+            "status": agent["status"],
+            "confidence": agent["confidence"] + random.uniform(-0.02, 0.02),
+            "decisions_today": agent["decisions_today"] + random.randint(0, 2)
+        }
+        for name, agent in AGENTS_DATA.items()
+    }
+
+def market_topic(select: Callable[[Dict[str, Any]], Dict[str, Any]]):
+    """Topic builder over the refresher's latest dashboard; never triggers upstream I/O"""
+    async def build():
+        dashboard = get_data_service().latest_dashboard()
+        return select(dashboard) if dashboard is not None else None
+    return build
+
+async def build_agents_topic():
+    return agent_snapshot()
+
+async def build_metrics_topic():
+    return current_metrics()
+
+async def build_quantum_topic():
+    return quantum_jobs_state()
+
+ws_hub.add_topic("agents", build_agents_topic)
+ws_hub.add_topic("metrics", build_metrics_topic)
+ws_hub.add_topic("market.quotes", market_topic(lambda d: d.get("quotes", {})))
+ws_hub.add_topic("market.sectors", market_topic(lambda d: {
+    "sector_performance": d.get("sector_performance", {}),
+    "market_summary": d.get("market_summary", {}),
+}))
+ws_hub.add_topic("risk.alerts", market_topic(lambda d: {
+    "alerts": d.get("risk_alerts", []),
+    "alerts_active": d.get("market_summary", {}).get("alerts_active", 0),
+}))
+ws_hub.add_topic("quantum.jobs", build_quantum_topic)
+ws_hub.bus.subscribe("quantum.job", on_quantum_job)
+ws_hub.bus.subscribe("quantum.cancel", optimization_engine.cancel)
+
 @api_router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None):
+    """Legacy clients get agent_update every interval; ?topics=a,b or subscribe messages switch to topic frames"""
+    await ws_hub.serve(websocket, topics=[t for t in (topics or "").split(",") if t])
+    logger.info("WebSocket client disconnected")
+
+@api_router.get("/ws/stats")
+async def get_websocket_stats():
+    """Connection counts and fan-out counters for this worker's WebSocket hub"""
+    return ws_hub.get_stats()
+
+# ===================== DIGITAL TWIN =====================
+
+class TwinSpikeRequest(BaseModel):
+    dc_id: str
+    intensity: float = Field(50.0, gt=0, le=10000)
+
+class TwinNetworkRequest(BaseModel):
+    num_dcs: Optional[int] = Field(None, ge=2, le=20000)   # omitted: the twin's default six DCs
+    avg_degree: float = Field(2.5, ge=1, le=20)
+    seed: int = 0
+
+class TwinScheduledSpike(TwinSpikeRequest):
+    at: int = Field(0, ge=0)
+
+class TwinWhatIfRequest(BaseModel):
+    steps: int = Field(100, ge=1, le=100000)
+    spikes: List[TwinScheduledSpike] = []
+    sample_every: Optional[int] = Field(None, ge=1)
+
+# Every worker holds a replica of the twin. The bus leader sequences all changes, including
+# the clock's steps, as small "twin.command" messages that each replica applies in order.
+twin = SupplyChainTwin.default()
+TWIN_TICK_INTERVAL = float(os.environ.get("TWIN_TICK_INTERVAL", 1.0))
+TWIN_STEPS_PER_TICK = int(os.environ.get("TWIN_STEPS_PER_TICK", 10))
+twin_clock = {"running": True}
+
+def twin_network(num_dcs: Optional[int], avg_degree: float, seed: int) -> SupplyChainTwin:
+    return SupplyChainTwin.default() if num_dcs is None else SupplyChainTwin.synthetic(num_dcs, avg_degree, seed)
+
+def on_twin_request(command: Dict[str, Any]):
+    """The leader turns requests from any worker into ordered commands; a sync answers with its full state"""
+    if not ws_hub.bus.is_leader:
+        return
+    if command["op"] == "sync":
+        command = {"op": "load", "state": twin.describe()}
+    ws_hub.bus.publish("twin.command", command)
+
+def on_twin_command(command: Dict[str, Any]):
+    global twin
+    op = command["op"]
+    if op == "step":
+        twin.step(command["steps"])
+    elif op == "spike":
+        if command["dc_id"] in twin.index:
+            twin.spike(command["dc_id"], command["intensity"])
+    elif op == "reset":
+        twin.reset()
+    elif op == "network":
+        twin = twin_network(command["num_dcs"], command["avg_degree"], command["seed"])
+    elif op == "load":
+        twin = SupplyChainTwin.from_dict(command["state"])
+    elif op == "run":
+        twin_clock["running"] = command["running"]
+    ws_hub.apply_state("twin", twin.snapshot())
+
+def request_twin_change(command: Dict[str, Any]):
+    ws_hub.bus.publish("twin.request", command)
+
+async def run_twin_clock():
+    """On the leader only: advance every replica TWIN_STEPS_PER_TICK steps per tick"""
+    while True:
+        await asyncio.sleep(TWIN_TICK_INTERVAL)
+        if ws_hub.bus.is_leader and twin_clock["running"]:
+            ws_hub.bus.publish("twin.command", {"op": "step", "steps": TWIN_STEPS_PER_TICK})
+
+async def build_twin_topic():
+    return twin.snapshot()
+
+ws_hub.add_topic("twin", build_twin_topic, interval=0)
+ws_hub.bus.subscribe("twin.request", on_twin_request)
+ws_hub.bus.subscribe("twin.command", on_twin_command)
+component_registry.register("world_model", lambda result: twin.metrics(), cache=CACHE_NONE)
+component_registry.register("digital_twin", lambda result: twin.metrics(), cache=CACHE_NONE)
+
+@api_router.get("/twin/state")
+async def get_twin_state(limit: Optional[int] = Query(None, ge=1)):
+    """Network, physics and per-DC state of this worker's replica (the first `limit` DCs)"""
+    return fast_json({**twin.describe(limit), "running": twin_clock["running"]})
+
+@api_router.post("/twin/spike")
+async def trigger_twin_spike(request: TwinSpikeRequest):
+    """Add demand at a DC; it cascades to upstream DCs, as clicking a node twice does in the twin"""
+    if request.dc_id not in twin.index:
+        raise HTTPException(status_code=404, detail="DC not found")
+    request_twin_change({"op": "spike", "dc_id": request.dc_id, "intensity": request.intensity})
+    return fast_json({"dc_id": request.dc_id, "intensity": request.intensity, "cascade": twin.cascade(request.dc_id, request.intensity)})
+
+@api_router.post("/twin/reset")
+async def reset_twin():
+    request_twin_change({"op": "reset"})
+    return {"status": "reset"}
+
+@api_router.post("/twin/run")
+async def run_twin(running: bool = True):
+    """Pause or resume the simulation clock"""
+    request_twin_change({"op": "run", "running": running})
+    return {"running": running}
+
+@api_router.post("/twin/network")
+async def load_twin_network(request: Optional[TwinNetworkRequest] = None):
+    """Replace the network: a seeded synthetic graph of num_dcs DCs, or the default six"""
+    request = request or TwinNetworkRequest()
+    command = {"op": "network", **request.model_dump()}
+    # Built here first only to report its size; every replica builds the same graph from the seed
+    network = await asyncio.to_thread(twin_network, request.num_dcs, request.avg_degree, request.seed)
+    request_twin_change(command)
+    return {"dcs": network.size, "connections": len(network.src)}
+
+@api_router.post("/twin/simulate")
+async def simulate_twin(request: TwinWhatIfRequest):
+    """Run a copy of the twin forward with scheduled spikes and return its metrics timeline"""
+    unknown = [s.dc_id for s in request.spikes if s.dc_id not in twin.index]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"DC not found: {unknown[0]}")
+    spikes = [s.model_dump() for s in request.spikes]
+    result = await asyncio.to_thread(twin.what_if, request.steps, spikes, request.sample_every)
+    return fast_json(result)
+
+# ===================== SCENARIO PLANNER =====================
+
+class ScenarioRequest(BaseModel):
+    disruption: str                                        # supplier_insolvency | tariff_change | port_closure | fx_shock | demand_surge
+    suppliers: Optional[List[str]] = None                  # insolvency: named suppliers...
+    region: Optional[str] = None                           # ...or the `count` largest tier-1 suppliers in a region
+    count: Optional[int] = Field(None, ge=1, le=50)
+    country: Optional[str] = None                          # tariff_change
+    port: Optional[str] = None                             # port_closure
+    currency: Optional[str] = None                         # fx_shock
+    magnitude: Optional[float] = Field(None, ge=-1, le=5)  # tariff rate, FX move or demand increase as a fraction
+    duration_days: Optional[float] = Field(None, gt=0, le=365)
+    horizon_days: Optional[float] = Field(None, gt=0, le=730)
+    paths: int = Field(10000, ge=100, le=200000)
+    seed: Optional[int] = None
+
+scenario_engine = ScenarioEngine()
+component_registry.register("scenario_planner", lambda result: {
+    "network": scenario_engine.network.summary(),
+    "disruptions": scenario_engine.disruptions(),
+})
+
+@api_router.get("/scenarios/disruptions")
+async def get_disruptions():
+    """Disruption kinds with their default parameters, and the supplier network they run on"""
+    return {"disruptions": scenario_engine.disruptions(), "network": scenario_engine.network.summary()}
+
+@api_router.post("/scenarios/simulate")
+async def simulate_scenario(request: ScenarioRequest):
+    """Monte Carlo paths of a disruption: percentile distributions, impacts and per-tier cascade"""
+    try:
+        result = await scenario_engine.run(request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_json(result)
+
+# ===================== COMMAND HISTORY =====================
+
+# Only these fields are read back; _id is the keyset tie-breaker
+HISTORY_PROJECTION = {"_id": 1, "id": 1, "command": 1, "session_id": 1, "timestamp": 1}
+HISTORY_PAGE_LIMIT = 500
+
+async def ensure_history_indexes():
+    """Indexes backing session lookups and timestamp keyset pagination"""
+    try:
+        await db.command_history.create_index([("session_id", 1), ("timestamp", -1), ("_id", -1)], name="session_timestamp")
+        await db.command_history.create_index([("timestamp", -1), ("_id", -1)], name="timestamp")
+    except Exception as e:
+        logger.warning(f"Failed to create command history indexes: {e}")
+
+def encode_history_cursor(doc: Dict[str, Any]) -> str:
+    raw = json.dumps([doc["timestamp"], str(doc["_id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str):
+    try:
+        timestamp, oid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return timestamp, ObjectId(oid)
+    except (ValueError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def history_filter(session_id: Optional[str], since: Optional[str], until: Optional[str]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if session_id:
+        query["session_id"] = session_id
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lt"] = until
+    return query
+
+def history_item(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": doc.get("id"), "command": doc.get("command"), "session_id": doc.get("session_id"), "timestamp": doc.get("timestamp")}
+
+@api_router.get("/history")
+async def get_command_history(
+    session_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=HISTORY_PAGE_LIMIT),
+):
+    """Get command history newest first, paginated by an opaque (timestamp, _id) cursor"""
+    query = history_filter(session_id, since, until)
+    if cursor:
+        timestamp, oid = decode_history_cursor(cursor)
+        after = {"$or": [{"timestamp": {"$lt": timestamp}}, {"timestamp": timestamp, "_id": {"$lt": oid}}]}
+        query = {"$and": [query, after]} if query else after
+    
     try:
-        while True:
-            # Send periodic updates
-            update = {
-                "type": "agent_update",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "agents": {
-                    name: {
-                        "status": agent["status"],
-                        "confidence": agent["confidence"] + random.uniform(-0.02, 0.02),
-                        "decisions_today": agent["decisions_today"] + random.randint(0, 2)
-                    }
-                    for name, agent in AGENTS_DATA.items()
-                }
-            }
-            await websocket.send_json(update)
-            await asyncio.sleep(5)
-    except WebSocketDisconnect:
-        logger.info("WebSocket client disconnected")
+        docs = await db.command_history.find(query, HISTORY_PROJECTION).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+    except Exception as e:
+        logger.error(f"Command history query failed: {e}")
+        raise HTTPException(status_code=503, detail="Command history unavailable")
+    
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    return fast_json({
+        "items": [history_item(doc) for doc in docs],
+        "next_cursor": encode_history_cursor(docs[-1]) if has_more else None,
+        "has_more": has_more,
+    })
+
+@api_router.get("/history/export")
+async def export_command_history(session_id: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None):
+    """Stream matching command history oldest first as NDJSON"""
+    query = history_filter(session_id, since, until)
+    
+    async def rows():
+        cursor = db.command_history.find(query, HISTORY_PROJECTION).sort([("timestamp", 1), ("_id", 1)]).batch_size(1000)
+        try:
+            async for doc in cursor:
+                yield json.dumps(history_item(doc)) + "\n"
+        finally:
+            await cursor.close()
+    
+    filename = f"command_history_{session_id or 'all'}.ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 # ===================== REAL-TIME MARKET DATA ENDPOINTS =====================
 
 from market_data import get_data_service, SUPPLY_CHAIN_COMPANIES
 
+# (snapshot dashboard dict, its JSON encoding); re-encoded only when the refresher publishes a new snapshot
+_dashboard_json: tuple = (None, b"")
+
+def dashboard_response(data: Dict[str, Any]):
+    global _dashboard_json
+    if not FAST_JSON_ENABLED:
+        return data
+    if _dashboard_json[0] is not data:
+        _dashboard_json = (data, encode_json(data))
+    return Response(content=_dashboard_json[1], media_type="application/json")
+
 @api_router.get("/market/dashboard")
 async def get_market_dashboard():
-    """Get real-time supply chain market dashboard with Fortune 500 data"""
+    """Get real-time supply chain market dashboard with Fortune 500 data (served from the refresher snapshot)"""
     try:
         service = get_data_service()
-        data = await service.get_supply_chain_dashboard()
-        return data
+        data = await service.get_dashboard_snapshot()
+        return dashboard_response(data)
     except Exception as e:
         logger.error(f"Market dashboard error: {e}")
         return {"error": str(e), "timestamp": datetime.now(timezone.utc).isoformat()}
@@ -678,11 +1038,12 @@ async def get_tracked_companies():
 
 @api_router.get("/market/quote/{symbol}")
 async def get_company_quote(symbol: str):
-    """Get real-time quote for a specific company"""
+    """Quote for a company: tracked symbols from the published snapshot, others fetched through the quote cache"""
     try:
         service = get_data_service()
-        quote = await service.yahoo.get_quote(symbol.upper())
+        quote = await service.get_company_quote(symbol.upper())
         if quote:
+            quote = dict(quote)
             company_info = SUPPLY_CHAIN_COMPANIES.get(symbol.upper(), {})
             quote["company_name"] = company_info.get("name", symbol)
             quote["sector"] = company_info.get("sector", "Unknown")
@@ -693,9 +1054,46 @@ async def get_company_quote(symbol: str):
         logger.error(f"Quote error for {symbol}: {e}")
         return {"error": str(e)}
 
+@api_router.post("/market/risk/batch")
+async def get_company_risk_batch(request: RiskBatchRequest):
+    """Get risk profiles for many companies at once (by symbols, sectors and/or tiers)"""
+    service = get_data_service()
+    symbols = service.resolve_symbols(request.symbols, request.sectors, request.tiers)
+    
+    if request.stream:
+        async def stream_profiles():
+            returned = set()
+            try:
+                async for profile in service.iter_risk_profiles(symbols):
+                    returned.add(profile["symbol"])
+                    yield json.dumps(profile) + "\n"
+            except Exception as e:
+                logger.error(f"Batch risk stream error: {e}")
+                yield json.dumps({"error": str(e)}) + "\n"
+            yield json.dumps({
+                "done": True,
+                "total": len(returned),
+                "missing": [s for s in symbols if s not in returned],
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }) + "\n"
+        
+        return StreamingResponse(stream_profiles(), media_type="application/x-ndjson")
+    
+    try:
+        profiles, missing = await service.get_risk_profiles(symbols)
+        return fast_json({
+            "profiles": profiles,
+            "total": len(profiles),
+            "missing": missing,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Batch risk profile error: {e}")
+        return {"error": str(e)}
+
 @api_router.get("/market/risk/{symbol}")
 async def get_company_risk(symbol: str):
-    """Get risk profile for a specific company"""
+    """Risk profile for a company: tracked symbols from the snapshot and stored history, others fetched upstream"""
     try:
         service = get_data_service()
         risk = await service.get_company_risk_profile(symbol.upper())
@@ -706,16 +1104,21 @@ async def get_company_risk(symbol: str):
         logger.error(f"Risk profile error for {symbol}: {e}")
         return {"error": str(e)}
 
+@api_router.get("/market/providers/status")
+async def get_market_provider_status():
+    """Get circuit breaker, rate limiter and cache health for each market data provider"""
+    return get_data_service().get_provider_status()
+
 @api_router.get("/market/sectors")
 async def get_sector_performance():
     """Get performance by supply chain sector"""
     try:
         service = get_data_service()
-        data = await service.get_supply_chain_dashboard()
-        return {
+        data = await service.get_dashboard_snapshot()
+        return fast_json({
             "sectors": data.get("sector_performance", {}),
             "timestamp": data.get("timestamp")
-        }
+        })
     except Exception as e:
         logger.error(f"Sector performance error: {e}")
         return {"error": str(e)}
@@ -725,12 +1128,12 @@ async def get_market_risk_alerts():
     """Get real-time risk alerts based on market data"""
     try:
         service = get_data_service()
-        data = await service.get_supply_chain_dashboard()
-        return {
+        data = await service.get_dashboard_snapshot()
+        return fast_json({
             "alerts": data.get("risk_alerts", []),
             "total": len(data.get("risk_alerts", [])),
             "timestamp": data.get("timestamp")
-        }
+        })
     except Exception as e:
         logger.error(f"Market alerts error: {e}")
         return {"error": str(e)}
@@ -747,6 +1150,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_history_indexes():
+    # Runs in the background so an unreachable database never blocks startup
+    app.state.history_index_task = asyncio.create_task(ensure_history_indexes())
+
+@app.on_event("startup")
+async def startup_market_data():
+    await get_data_service().start()
+
+@app.on_event("startup")
+async def startup_ws_hub():
+    await ws_hub.bus.start()
+    ws_hub.start(build_agent_update)
+
+@app.on_event("startup")
+async def startup_twin():
+    # A worker that starts late adopts the leader's twin instead of the default network
+    request_twin_change({"op": "sync"})
+    app.state.twin_clock_task = asyncio.create_task(run_twin_clock())
+
+@app.on_event("startup")
+async def startup_optimizations():
+    optimization_engine.start()
+    # Background, like the history indexes: an unreachable database must not block startup
+    app.state.optimizations_task = asyncio.create_task(load_recent_optimizations())
+
+@app.on_event("startup")
+async def startup_scenarios():
+    scenario_engine.start()
+
+@app.on_event("shutdown")
+async def shutdown_scenarios():
+    scenario_engine.close()
+
+@app.on_event("shutdown")
+async def shutdown_twin():
+    app.state.twin_clock_task.cancel()
+
+@app.on_event("shutdown")
+async def shutdown_optimizations():
+    await optimization_engine.close()
+
+@app.on_event("shutdown")
+async def shutdown_ws_hub():
+    await ws_hub.close()
+    await ws_hub.bus.close()
+
+@app.on_event("shutdown")
+async def shutdown_market_data():
+    await get_data_service().close()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await command_history_buffer.drain()
     client.close()
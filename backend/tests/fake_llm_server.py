@@ -0,0 +1,74 @@
+"""
+Fake OpenAI-compatible LLM server for ATLAS command tests
+Run it locally and point the backend at it:
+    python backend/tests/fake_llm_server.py --port 8099
+    OPENROUTER_API_KEY=test OPENROUTER_BASE_URL=http://127.0.0.1:8099/v1 uvicorn server:app
+"""
+import argparse
+import asyncio
+import json
+import time
+from aiohttp import web
+
+CHUNK_SIZE = 8
+
+
+def answer_for(command: str) -> str:
+    """Deterministic JSON answer in the field order the system prompt asks for"""
+    return json.dumps({
+        "intent": "risk_assessment",
+        "primary_agent": "risk",
+        "components": ["agents", "risk_alerts"],
+        "response": f"Fake LLM analysis of \"{command}\": supplier risk is within tolerance.",
+    })
+
+
+def completion_chunk(content: str, finish_reason=None) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "fake",
+        "choices": [{"index": 0, "delta": {"content": content} if content else {}, "finish_reason": finish_reason}],
+    }
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    body = await request.json()
+    command = body["messages"][-1]["content"].removeprefix("User command: ").split("\n\n")[0]
+    content = answer_for(command)
+    delay = request.app["delay"]
+
+    if not body.get("stream"):
+        await asyncio.sleep(delay * len(content) / CHUNK_SIZE)
+        return web.json_response({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        })
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    for i in range(0, len(content), CHUNK_SIZE):
+        await response.write(f"data: {json.dumps(completion_chunk(content[i:i + CHUNK_SIZE]))}\n\n".encode())
+        await asyncio.sleep(delay)
+    await response.write(f"data: {json.dumps(completion_chunk('', 'stop'))}\n\n".encode())
+    await response.write(b"data: [DONE]\n\n")
+    return response
+
+
+def create_app(delay: float = 0.02) -> web.Application:
+    app = web.Application()
+    app["delay"] = delay
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+    web.run_app(create_app(args.delay), host="127.0.0.1", port=args.port)
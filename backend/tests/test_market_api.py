@@ -0,0 +1,96 @@
+"""
+ATLAS Supply Chain OS - Market Data API Tests
+Tests for the snapshot-backed market endpoints and batch risk profiles
+"""
+import json
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestMarketSnapshotEndpoints:
+    """Dashboard, sectors and alerts are served from the same precomputed snapshot"""
+    
+    def test_dashboard_structure(self):
+        """Test GET /api/market/dashboard returns quotes and precomputed analytics"""
+        response = requests.get(f"{BASE_URL}/api/market/dashboard", timeout=60)
+        assert response.status_code == 200
+        data = response.json()
+        assert "quotes" in data
+        assert "sector_performance" in data
+        assert "risk_alerts" in data
+        assert "market_summary" in data
+        assert len(data["risk_alerts"]) <= 10
+    
+    def test_sectors_match_dashboard_snapshot(self):
+        """Test /api/market/sectors reads the same snapshot as the dashboard"""
+        dashboard = requests.get(f"{BASE_URL}/api/market/dashboard", timeout=60).json()
+        sectors = requests.get(f"{BASE_URL}/api/market/sectors", timeout=60).json()
+        if sectors["timestamp"] == dashboard["timestamp"]:
+            assert sectors["sectors"] == dashboard["sector_performance"]
+    
+    def test_alerts_structure(self):
+        """Test GET /api/market/alerts"""
+        response = requests.get(f"{BASE_URL}/api/market/alerts", timeout=60)
+        assert response.status_code == 200
+        data = response.json()
+        assert "alerts" in data
+        assert data["total"] == len(data["alerts"])
+        for alert in data["alerts"]:
+            assert alert["severity"] in ["high", "medium"]
+            assert alert["change_percent"] < -3
+
+
+class TestBatchRiskProfiles:
+    """Tests for POST /api/market/risk/batch"""
+    
+    def test_batch_by_symbols(self):
+        """Test explicit symbols resolve to profiles or are reported missing"""
+        symbols = ["FDX", "TSM", "CAT"]
+        response = requests.post(f"{BASE_URL}/api/market/risk/batch", json={"symbols": symbols}, timeout=60)
+        assert response.status_code == 200
+        data = response.json()
+        returned = [p["symbol"] for p in data["profiles"]]
+        assert sorted(returned + data["missing"]) == sorted(symbols)
+        for profile in data["profiles"]:
+            assert profile["risk_level"] in ["HIGH", "MEDIUM", "LOW"]
+            assert 0 <= profile["risk_score"] <= 100
+    
+    def test_batch_sector_and_tier_filters(self):
+        """Test sector and tier filters select only matching companies"""
+        response = requests.post(f"{BASE_URL}/api/market/risk/batch", json={"sectors": ["Logistics"], "tiers": [1]}, timeout=60)
+        assert response.status_code == 200
+        for profile in response.json()["profiles"]:
+            assert profile["sector"] == "Logistics"
+            assert profile["tier"] == 1
+    
+    def test_batch_streaming(self):
+        """Test streamed results are NDJSON ending with a summary line"""
+        response = requests.post(f"{BASE_URL}/api/market/risk/batch", json={"sectors": ["Energy"], "stream": True}, timeout=60)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        assert lines[-1]["done"] is True
+        assert lines[-1]["total"] == len(lines) - 1
+
+
+
+class TestProviderStatus:
+    """Circuit breaker and rate limiter health per upstream provider"""
+    
+    def test_provider_status_structure(self):
+        """Test GET /api/market/providers/status reports every provider"""
+        response = requests.get(f"{BASE_URL}/api/market/providers/status", timeout=30)
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["providers"]) == {"yahoo", "alpha_vantage", "finnhub"}
+        for status in data["providers"].values():
+            assert status["state"] in ["closed", "open", "half_open"]
+            assert status["rate_limit_per_second"] > 0
+        assert "fallbacks" in data["cache"]
+        assert "available" in data["snapshot"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
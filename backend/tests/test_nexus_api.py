@@ -154,12 +154,21 @@ class TestQuantumEndpoints:
     """Tests for /api/quantum endpoints"""
     
     def test_get_quantum_optimizations(self):
-        """Test GET /api/quantum/optimizations"""
+        """Test GET /api/quantum/optimizations lists a freshly submitted job"""
+        submitted = requests.post(f"{BASE_URL}/api/quantum/optimize", json={"num_nodes": 20, "vehicles": 2, "time_limit": 1})
+        assert submitted.status_code == 200
+        job_id = submitted.json()["id"]
+        # Jobs are stored once they start; wait for this one to finish
+        for _ in range(60):
+            if requests.get(f"{BASE_URL}/api/quantum/optimizations/{job_id}").json()["status"] in ("completed", "failed", "cancelled"):
+                break
+            time.sleep(1)
+        
         response = requests.get(f"{BASE_URL}/api/quantum/optimizations")
         assert response.status_code == 200
         optimizations = response.json()
         
-        assert len(optimizations) >= 1
+        assert job_id in {opt["id"] for opt in optimizations}
         
         for opt in optimizations:
             assert "id" in opt
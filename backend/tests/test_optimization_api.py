@@ -0,0 +1,159 @@
+"""
+ATLAS Supply Chain OS - Optimization API Tests
+Tests for routing optimization jobs behind /api/quantum/optimize
+"""
+import time
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def wait_for_job(job_id, timeout=90):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{BASE_URL}/api/quantum/optimizations/{job_id}", timeout=30)
+        assert response.status_code == 200
+        job = response.json()
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return job
+        time.sleep(1)
+    pytest.fail(f"Optimization {job_id} did not finish in {timeout}s")
+
+
+class TestOptimizationJobs:
+    """Solves run asynchronously and persist real results"""
+    
+    def test_default_vrp_solves(self):
+        """Test POST /api/quantum/optimize without a body solves the 200-node / 50-vehicle example"""
+        response = requests.post(f"{BASE_URL}/api/quantum/optimize", timeout=30)
+        assert response.status_code == 200
+        queued = response.json()
+        assert queued["id"].startswith("qopt-")
+        assert queued["status"] == "queued"
+        
+        job = wait_for_job(queued["id"])
+        assert job["status"] == "completed"
+        assert job["nodes"] == 200
+        assert job["improvement"] > 0
+        assert job["solution"]["routes"] <= 50
+        visited = sorted(stop for route in job["routes"] for stop in route)
+        assert visited == list(range(1, 200))
+        
+        listed = requests.get(f"{BASE_URL}/api/quantum/optimizations", timeout=30).json()
+        assert queued["id"] in [opt["id"] for opt in listed]
+    
+    def test_explicit_stops_with_time_windows(self):
+        """Test a small instance with demands, capacity and time windows"""
+        stops = [
+            {"x": 0, "y": 0, "time_window": [0, 1000]},
+            {"x": 10, "y": 0, "demand": 4, "time_window": [0, 50]},
+            {"x": 0, "y": 10, "demand": 4, "time_window": [0, 50]},
+            {"x": -10, "y": 0, "demand": 4},
+        ]
+        response = requests.post(
+            f"{BASE_URL}/api/quantum/optimize",
+            json={"stops": stops, "vehicles": 3, "vehicle_capacity": 8},
+            timeout=30,
+        )
+        assert response.status_code == 200
+        job = wait_for_job(response.json()["id"])
+        assert job["status"] == "completed"
+        assert job["solution"]["feasible"] is True
+        assert len(job["routes"]) == 2
+    
+    def test_repeat_run_reuses_distance_matrix(self):
+        """Test the same location set is served from the matrix cache on the next run"""
+        spec = {"num_nodes": 300, "vehicles": 30, "seed": 23}
+        first = wait_for_job(requests.post(f"{BASE_URL}/api/quantum/optimize", json=spec, timeout=30).json()["id"])
+        second = wait_for_job(requests.post(f"{BASE_URL}/api/quantum/optimize", json=spec, timeout=30).json()["id"])
+        assert first["status"] == second["status"] == "completed"
+        assert second["solution"]["matrix"] in ("memory", "disk")
+        assert second["solution"]["total_distance"] == first["solution"]["total_distance"]
+    
+    def test_invalid_stops_rejected(self):
+        """Test stops without coordinates or with malformed time windows are a client error"""
+        response = requests.post(f"{BASE_URL}/api/quantum/optimize", json={"stops": [{"x": 0, "y": 0}, {"x": 1}]}, timeout=30)
+        assert response.status_code == 400
+        for windows in ([[0, 10], [5]], [[0, 10], [5, 6, 7]], [[0, 10], [8, 2]]):
+            stops = [{"x": 0, "y": 0, "time_window": windows[0]}, {"x": 1, "y": 1, "time_window": windows[1]}]
+            response = requests.post(f"{BASE_URL}/api/quantum/optimize", json={"stops": stops}, timeout=30)
+            assert response.status_code == 400
+            assert "time_window" in response.json()["detail"]
+    
+    def test_unknown_job_404(self):
+        response = requests.get(f"{BASE_URL}/api/quantum/optimizations/qopt-missing", timeout=30)
+        assert response.status_code == 404
+
+
+class TestOptimizationQueue:
+    """Jobs are queued, report progress and can be cancelled"""
+    
+    def test_cancel_running_job_keeps_best_routes(self):
+        """Test cancelling a long solve stops it early with a usable solution"""
+        response = requests.post(
+            f"{BASE_URL}/api/quantum/optimize",
+            json={"num_nodes": 3000, "vehicles": 300, "time_limit": 120, "priority": 10},
+            timeout=30,
+        )
+        assert response.status_code == 200
+        job_id = response.json()["id"]
+        deadline = time.time() + 60
+        while requests.get(f"{BASE_URL}/api/quantum/optimizations/{job_id}", timeout=30).json()["status"] == "queued":
+            assert time.time() < deadline
+            time.sleep(0.5)
+        
+        cancelled = requests.post(f"{BASE_URL}/api/quantum/optimizations/{job_id}/cancel", timeout=30)
+        assert cancelled.status_code == 200
+        job = wait_for_job(job_id)
+        assert job["status"] in ("cancelled", "completed")
+        if job["status"] == "cancelled":
+            assert job["solution"]["stopped"] == "cancelled"
+        visited = sorted(stop for route in job["routes"] for stop in route)
+        assert visited == list(range(1, 3000))
+        
+        again = requests.post(f"{BASE_URL}/api/quantum/optimizations/{job_id}/cancel", timeout=30)
+        assert again.status_code == 409
+    
+    def test_queue_stats(self):
+        response = requests.get(f"{BASE_URL}/api/quantum/queue", timeout=30)
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["workers"] >= 1
+        assert stats["max_queue"] >= 1
+        assert stats["queued"] >= 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+class TestOptimizationEngine:
+    """Queue capacity and shutdown, exercised on an in-process engine"""
+    
+    def test_cancelled_jobs_free_queue_and_close_stops_progress(self):
+        import asyncio
+        import sys
+        from pathlib import Path
+        
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+        from optimization_engine import OptimizationEngine
+        
+        async def scenario():
+            # No collection: persisting only logs a warning
+            engine = OptimizationEngine(None, max_workers=1, max_queue=2)
+            engine.start()
+            spec = {"num_nodes": 20, "vehicles": 2, "time_limit": 30}
+            engine.submit(spec)
+            await asyncio.sleep(0.2)
+            queued = [engine.submit(spec), engine.submit(spec)]
+            with pytest.raises(asyncio.QueueFull):
+                engine.submit(spec)
+            assert engine.cancel(queued[0]["id"])
+            engine.submit(spec)
+            
+            thread = engine._progress_thread
+            await engine.close()
+            assert not thread.is_alive()
+        
+        asyncio.run(scenario())
@@ -0,0 +1,112 @@
+"""
+ATLAS Supply Chain OS - Realtime API Tests
+Tests for the WebSocket broadcast hub's metrics endpoint, its topics and
+the cross-worker pub/sub broker
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestWebSocketHub:
+    """Agent updates are produced once per worker and fanned out to every client"""
+    
+    def test_ws_stats_structure(self):
+        """Test GET /api/ws/stats"""
+        response = requests.get(f"{BASE_URL}/api/ws/stats", timeout=30)
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("connections", "peak_connections", "accepted", "evicted_slow", "published", "frames_sent", "frames_dropped"):
+            assert isinstance(data[key], int)
+        assert data["connections"] <= data["peak_connections"]
+        assert data["queue_size"] > 0
+    
+    def test_ws_topics_listed(self):
+        """Test every subscribable topic reports its seq and delta counters"""
+        response = requests.get(f"{BASE_URL}/api/ws/stats", timeout=30)
+        assert response.status_code == 200
+        topics = response.json()["topics"]
+        for name in ("agents", "metrics", "market.quotes", "market.sectors", "risk.alerts", "quantum.jobs", "twin"):
+            assert name in topics
+            assert topics[name]["seq"] >= 0
+            assert topics[name]["keyframes"] + topics[name]["deltas"] <= topics[name]["seq"]
+    
+    def test_ws_stats_report_pubsub(self):
+        """Test the hub reports its pub/sub backend and this worker's role"""
+        response = requests.get(f"{BASE_URL}/api/ws/stats", timeout=30)
+        assert response.status_code == 200
+        pubsub = response.json()["pubsub"]
+        assert pubsub["backend"] in ("memory", "socket")
+        assert pubsub["role"] in ("leader", "follower")
+
+
+class TestMarketTopics:
+    """Market topics publish the refresher's latest dashboard to subscribers"""
+    
+    def test_market_quotes_keyframe(self):
+        """Test subscribing to market.quotes delivers a keyframe carrying quotes"""
+        import aiohttp
+        
+        async def first_keyframe():
+            url = BASE_URL.replace("https://", "wss://").replace("http://", "ws://")
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(f"{url}/api/ws?topics=market.quotes") as ws:
+                    while True:
+                        frame = await ws.receive_json()
+                        if frame.get("topic") == "market.quotes" and frame.get("type") == "keyframe":
+                            return frame
+        
+        # The first snapshot may still be loading from Yahoo Finance
+        frame = asyncio.run(asyncio.wait_for(first_keyframe(), timeout=90))
+        assert frame["seq"] >= 1
+        assert frame["data"]
+        quote = next(iter(frame["data"].values()))
+        assert {"symbol", "price", "change_percent"} <= set(quote)
+
+
+class TestSocketPubSub:
+    """Workers share one broker over a unix socket; stands in for separate gunicorn workers"""
+    
+    def test_message_reaches_every_worker_and_survives_broker_exit(self, tmp_path):
+        from pubsub import SocketPubSub
+        
+        async def scenario():
+            path = str(tmp_path / "pubsub.sock")
+            workers = [SocketPubSub(path, reconnect_delay=0.05) for _ in range(3)]
+            received = [[] for _ in workers]
+            for worker, inbox in zip(workers, received):
+                worker.subscribe("test", inbox.append)
+                await worker.start()
+            await asyncio.sleep(0.3)
+            assert sum(w.is_broker for w in workers) == 1
+            assert sum(w.is_leader for w in workers) == 1
+            
+            workers[2].publish("test", {"n": 1})
+            await asyncio.sleep(0.1)
+            assert all(inbox == [{"n": 1}] for inbox in received)
+            
+            broker = next(w for w in workers if w.is_broker)
+            await broker.close()
+            rest = [w for w in workers if w is not broker]
+            await asyncio.sleep(1.0)
+            assert sum(w.is_broker for w in rest) == 1
+            assert sum(w.is_leader for w in rest) == 1
+            
+            rest[0].publish("test", {"n": 2})
+            await asyncio.sleep(0.1)
+            assert all(received[workers.index(w)][-1] == {"n": 2} for w in rest)
+            for worker in rest:
+                await worker.close()
+        
+        asyncio.run(scenario())
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
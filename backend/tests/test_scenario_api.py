@@ -0,0 +1,65 @@
+"""
+ATLAS Supply Chain OS - Scenario Planner API Tests
+Tests for the Monte Carlo disruption simulations behind /api/scenarios
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestScenarioSimulation:
+    """Percentile distributions and cascades over the 847-supplier network"""
+
+    def test_disruptions_listed(self):
+        response = requests.get(f"{BASE_URL}/api/scenarios/disruptions", timeout=30)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["network"]["suppliers"] == 847
+        assert {d["disruption"] for d in data["disruptions"]} == {
+            "supplier_insolvency", "tariff_change", "port_closure", "fx_shock", "demand_surge"
+        }
+
+    def test_supplier_insolvency(self):
+        """Test 10k paths of ChemCorp failing come back as ordered percentiles within a few seconds"""
+        response = requests.post(
+            f"{BASE_URL}/api/scenarios/simulate",
+            json={"disruption": "supplier_insolvency", "suppliers": ["ChemCorp Ltd"], "paths": 10000, "seed": 1},
+            timeout=60,
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["paths"] == 10000
+        assert result["elapsed_seconds"] < 5
+        assert result["probability"] == pytest.approx(0.72)
+        cost = result["distributions"]["cost"]
+        assert 0 < cost["p5"] <= cost["p50"] <= cost["p95"]
+        assert result["distributions"]["otif"]["p50"] < 99.2
+        assert {"Cost Impact", "OTIF", "Lead Time"} <= {impact["metric"] for impact in result["impacts"]}
+        assert all(tier["tier"] > 1 for tier in result["cascadeEffects"])
+
+    def test_seeded_runs_repeat(self):
+        body = {"disruption": "port_closure", "port": "LA/Long Beach", "duration_days": 14, "paths": 2000, "seed": 5}
+        first = requests.post(f"{BASE_URL}/api/scenarios/simulate", json=body, timeout=60).json()
+        second = requests.post(f"{BASE_URL}/api/scenarios/simulate", json=body, timeout=60).json()
+        assert first["distributions"] == second["distributions"]
+
+    def test_fx_shock_costs_without_shortfall(self):
+        response = requests.post(
+            f"{BASE_URL}/api/scenarios/simulate",
+            json={"disruption": "fx_shock", "currency": "CNY", "magnitude": 0.15, "paths": 1000},
+            timeout=60,
+        )
+        assert response.status_code == 200
+        distributions = response.json()["distributions"]
+        assert distributions["cost"]["p50"] > 0
+        assert distributions["supply_shortfall_pct"]["p95"] == 0
+
+    def test_unknown_supplier_400(self):
+        response = requests.post(
+            f"{BASE_URL}/api/scenarios/simulate",
+            json={"disruption": "supplier_insolvency", "suppliers": ["Nobody Inc"]},
+            timeout=30,
+        )
+        assert response.status_code == 400
@@ -0,0 +1,63 @@
+"""
+ATLAS Supply Chain OS - Digital Twin API Tests
+Tests for the server-side supply chain physics behind /api/twin
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestTwinState:
+    """The default network matches the browser twin's six DCs"""
+    
+    def test_default_network(self):
+        response = requests.get(f"{BASE_URL}/api/twin/state", timeout=30)
+        assert response.status_code == 200
+        state = response.json()
+        assert state["physics"]["max_cascade_depth"] == 4
+        assert {"dc-1", "dc-6"} <= {dc["id"] for dc in state["dcs"]}
+        assert state["metrics"]["network_health"] in ("OPTIMAL", "NORMAL", "STRESSED", "CRITICAL")
+    
+    def test_spike_cascades_upstream(self):
+        """Test a spike at Miami reaches NYC and Houston one hop upstream with speed^2 of the demand"""
+        response = requests.post(f"{BASE_URL}/api/twin/spike", json={"dc_id": "dc-6", "intensity": 60}, timeout=30)
+        assert response.status_code == 200
+        cascade = {hit["id"]: hit for hit in response.json()["cascade"]}
+        assert cascade["dc-6"]["depth"] == 0
+        assert cascade["dc-3"]["depth"] == cascade["dc-4"]["depth"] == 1
+        assert cascade["dc-3"]["demand_added"] == pytest.approx(60 * 0.3 ** 2)
+    
+    def test_unknown_dc_404(self):
+        response = requests.post(f"{BASE_URL}/api/twin/spike", json={"dc_id": "dc-missing"}, timeout=30)
+        assert response.status_code == 404
+
+
+class TestTwinSimulation:
+    """What-if runs and large synthetic networks"""
+    
+    def test_what_if_timeline(self):
+        response = requests.post(
+            f"{BASE_URL}/api/twin/simulate",
+            json={"steps": 200, "spikes": [{"dc_id": "dc-2", "intensity": 80, "at": 10}], "sample_every": 50},
+            timeout=30,
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert len(result["timeline"]) == 4
+        assert result["final"]["time"] == result["timeline"][-1]["time"]
+    
+    def test_thousands_of_dcs(self):
+        """Test loading a 2000-DC network, then restoring the default six"""
+        response = requests.post(f"{BASE_URL}/api/twin/network", json={"num_dcs": 2000, "avg_degree": 3, "seed": 7}, timeout=30)
+        assert response.status_code == 200
+        assert response.json() == {"dcs": 2000, "connections": 3000}
+        try:
+            result = requests.post(f"{BASE_URL}/api/twin/simulate", json={"steps": 100}, timeout=30).json()
+            assert result["final"]["dcs"] == 2000
+        finally:
+            assert requests.post(f"{BASE_URL}/api/twin/network", timeout=30).json()["dcs"] == 6
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
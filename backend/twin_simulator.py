@@ -0,0 +1,288 @@
+"""
+Supply Chain Twin Simulator for ATLAS Supply Chain OS
+Steps inventory, flow and demand propagation over an arbitrary DC graph as
+array operations on an edge list, with the digital twin's physics constants
+"""
+
+import math
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+# Same constants as the browser engine in frontend/src/components/DigitalTwin.jsx
+PHYSICS = {
+    "demand_decay": 0.95,        # How fast demand dissipates
+    "propagation_speed": 0.3,    # How fast effects propagate
+    "inventory_inertia": 0.85,   # Resistance to inventory changes
+    "max_cascade_depth": 4,      # Max hops for cascade effect
+}
+DEMAND_FLOOR = 0.5               # Demand below this decays to zero
+MIN_SHIPPING_INVENTORY = 10.0    # A DC at or below this stops shipping
+FLOW_GAIN = 0.01                 # Flow per unit of (inventory pressure + demand pull) x edge capacity
+INVENTORY_GAIN = 0.1             # Share of net flow that lands in inventory per step
+DEMAND_DRAW = 0.5                # Inventory consumed per unit of demand
+CRITICAL_INVENTORY = 30.0        # Percent of capacity
+
+INITIAL_DCS = [
+    {"id": "dc-1", "name": "LA Hub", "x": 120, "y": 200, "type": "hub", "inventory": 78, "capacity": 100},
+    {"id": "dc-2", "name": "Chicago", "x": 420, "y": 140, "type": "fulfillment", "inventory": 92, "capacity": 100},
+    {"id": "dc-3", "name": "NYC", "x": 720, "y": 170, "type": "hub", "inventory": 85, "capacity": 100},
+    {"id": "dc-4", "name": "Houston", "x": 280, "y": 340, "type": "port", "inventory": 65, "capacity": 100},
+    {"id": "dc-5", "name": "Seattle", "x": 100, "y": 60, "type": "port", "inventory": 71, "capacity": 100},
+    {"id": "dc-6", "name": "Miami", "x": 640, "y": 370, "type": "port", "inventory": 88, "capacity": 100},
+]
+
+CONNECTIONS = [
+    {"from": "dc-5", "to": "dc-1", "capacity": 800, "lead_time": 2},
+    {"from": "dc-5", "to": "dc-2", "capacity": 500, "lead_time": 3},
+    {"from": "dc-1", "to": "dc-2", "capacity": 700, "lead_time": 2},
+    {"from": "dc-1", "to": "dc-4", "capacity": 600, "lead_time": 1},
+    {"from": "dc-2", "to": "dc-3", "capacity": 600, "lead_time": 2},
+    {"from": "dc-4", "to": "dc-6", "capacity": 400, "lead_time": 2},
+    {"from": "dc-3", "to": "dc-6", "capacity": 500, "lead_time": 3},
+]
+
+DC_TYPES = ("hub", "fulfillment", "port")
+
+
+def network_health(avg_inventory: float) -> str:
+    if avg_inventory > 70:
+        return "OPTIMAL"
+    if avg_inventory > 50:
+        return "NORMAL"
+    if avg_inventory > 30:
+        return "STRESSED"
+    return "CRITICAL"
+
+
+def synthetic_network(num_dcs: int, avg_degree: float = 2.5, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """A connected random DC graph on the twin's 850 x 420 canvas: a spanning tree plus shortcut edges"""
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(40, 810, num_dcs)
+    ys = rng.uniform(40, 380, num_dcs)
+    types = rng.choice(len(DC_TYPES), size=num_dcs, p=(0.2, 0.6, 0.2))
+    inventory = rng.uniform(50, 95, num_dcs)
+    dcs = [
+        {
+            "id": f"dc-{i + 1}",
+            "name": f"DC {i + 1}",
+            "x": round(float(xs[i]), 1),
+            "y": round(float(ys[i]), 1),
+            "type": DC_TYPES[types[i]],
+            "inventory": round(float(inventory[i]), 1),
+            "capacity": 100,
+        }
+        for i in range(num_dcs)
+    ]
+    # Every DC after the first is supplied by an earlier one, so the graph is connected and acyclic at its core
+    src = (rng.random(num_dcs - 1) * np.arange(1, num_dcs)).astype(np.int64).tolist()
+    dst = list(range(1, num_dcs))
+    extra = max(0, int(num_dcs * avg_degree / 2) - len(src))
+    if num_dcs > 1 and extra:
+        a = rng.integers(0, num_dcs, extra)
+        b = rng.integers(0, num_dcs, extra)
+        keep = a != b
+        src += a[keep].tolist()
+        dst += b[keep].tolist()
+    capacity = rng.integers(300, 801, len(src))
+    lead_time = rng.integers(1, 4, len(src))
+    connections = [
+        {"from": dcs[s]["id"], "to": dcs[d]["id"], "capacity": int(c), "lead_time": int(t)}
+        for s, d, c, t in zip(src, dst, capacity, lead_time)
+    ]
+    return {"dcs": dcs, "connections": connections}
+
+
+class SupplyChainTwin:
+    """DC state as arrays and connections as an edge list (COO adjacency); each step is O(DCs + edges)"""
+
+    def __init__(self, dcs: List[Dict[str, Any]], connections: List[Dict[str, Any]], physics: Dict[str, Any] = None):
+        if not dcs:
+            raise ValueError("A twin needs at least one DC")
+        self.physics = {**PHYSICS, **(physics or {})}
+        self.dcs = [{k: dc[k] for k in ("id", "name", "x", "y", "type")} for dc in dcs]
+        self.ids = [dc["id"] for dc in dcs]
+        self.index = {dc_id: i for i, dc_id in enumerate(self.ids)}
+        if len(self.index) != len(self.ids):
+            raise ValueError("DC ids must be unique")
+        unknown = {c[k] for c in connections for k in ("from", "to")} - self.index.keys()
+        if unknown:
+            raise ValueError(f"Connections reference unknown DCs: {', '.join(sorted(unknown)[:5])}")
+        self.initial_inventory = np.array([dc["inventory"] for dc in dcs], dtype=np.float64)
+        self.capacity = np.array([dc.get("capacity", 100) for dc in dcs], dtype=np.float64)
+        self.src = np.array([self.index[c["from"]] for c in connections], dtype=np.int64)
+        self.dst = np.array([self.index[c["to"]] for c in connections], dtype=np.int64)
+        self.edge_capacity = np.array([c["capacity"] for c in connections], dtype=np.float64)
+        self.lead_time = np.array([c.get("lead_time", 1) for c in connections], dtype=np.int64)
+        self.reset()
+
+    @classmethod
+    def default(cls) -> "SupplyChainTwin":
+        return cls(INITIAL_DCS, CONNECTIONS)
+
+    @classmethod
+    def synthetic(cls, num_dcs: int, avg_degree: float = 2.5, seed: int = 0) -> "SupplyChainTwin":
+        return cls(**synthetic_network(num_dcs, avg_degree, seed))
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def reset(self):
+        self.time = 0
+        self.inventory = self.initial_inventory.copy()
+        self.demand = np.zeros(self.size)
+        self.inflow = np.zeros(self.size)
+        self.outflow = np.zeros(self.size)
+        self.flow = np.zeros(len(self.src))
+
+    def copy(self) -> "SupplyChainTwin":
+        twin = object.__new__(SupplyChainTwin)
+        twin.__dict__.update(self.__dict__)
+        for name in ("inventory", "demand", "inflow", "outflow", "flow"):
+            setattr(twin, name, getattr(self, name).copy())
+        return twin
+
+    # ---------- physics ----------
+
+    def step(self, steps: int = 1):
+        """Advance the simulation; the same update the browser applied per DC and per connection"""
+        decay = self.physics["demand_decay"]
+        inertia = self.physics["inventory_inertia"]
+        n = self.size
+        for _ in range(steps):
+            self.demand *= decay
+            self.demand[self.demand < DEMAND_FLOOR] = 0.0
+            # Flow along each edge from inventory pressure and downstream demand pull
+            supply = self.inventory[self.src]
+            pressure = (supply - self.inventory[self.dst]) / 100 + self.demand[self.dst] / 100
+            rate = np.maximum(0.0, pressure * self.edge_capacity * FLOW_GAIN)
+            rate[supply <= MIN_SHIPPING_INVENTORY] = 0.0
+            # Scatter-add edge flows onto their endpoints (incidence matrix products)
+            self.outflow = np.bincount(self.src, weights=rate, minlength=n)
+            self.inflow = np.bincount(self.dst, weights=rate, minlength=n)
+            net = (self.inflow - self.outflow - self.demand * DEMAND_DRAW) * INVENTORY_GAIN
+            self.inventory = np.clip(self.inventory * inertia + net, 0.0, self.capacity)
+            self.flow = rate
+        self.time += steps
+
+    def cascade(self, dc_id: str, intensity: float = 50.0) -> List[Dict[str, Any]]:
+        """DCs a demand spike reaches by walking upstream, level by level, with the demand each gains"""
+        origin = self.index[dc_id]
+        depth = np.full(self.size, -1, dtype=np.int64)
+        depth[origin] = 0
+        frontier = np.zeros(self.size, dtype=bool)
+        frontier[origin] = True
+        for level in range(1, int(self.physics["max_cascade_depth"]) + 1):
+            upstream = np.unique(self.src[frontier[self.dst]])
+            upstream = upstream[depth[upstream] < 0]
+            if not len(upstream):
+                break
+            depth[upstream] = level
+            frontier[:] = False
+            frontier[upstream] = True
+        reached = np.flatnonzero(depth >= 0)
+        reached = reached[np.argsort(depth[reached], kind="stable")]
+        # The browser scales by speed^depth when enqueuing and again when applying
+        added = intensity * self.physics["propagation_speed"] ** (2 * depth[reached])
+        return [
+            {"id": self.ids[i], "depth": int(d), "demand_added": float(a)}
+            for i, d, a in zip(reached, depth[reached], added)
+        ]
+
+    def spike(self, dc_id: str, intensity: float = 50.0) -> List[Dict[str, Any]]:
+        """Add demand at a DC and the DCs upstream of it; returns the cascade"""
+        cascade = self.cascade(dc_id, intensity)
+        for hit in cascade:
+            self.demand[self.index[hit["id"]]] += hit["demand_added"]
+        return cascade
+
+    # ---------- views ----------
+
+    def metrics(self) -> Dict[str, Any]:
+        level = self.inventory / self.capacity * 100
+        avg_inventory = float(level.mean())
+        return {
+            "time": self.time,
+            "dcs": self.size,
+            "connections": len(self.src),
+            "avg_inventory": round(avg_inventory, 1),
+            "total_demand": round(float(self.demand.sum()), 1),
+            "total_flow": round(float(self.flow.sum()), 1),
+            "critical_nodes": int((level < CRITICAL_INVENTORY).sum()),
+            "network_health": network_health(avg_inventory),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Streamed state: metrics plus per-DC inventory and demand, rounded so idle DCs produce no delta"""
+        inventory = np.round(self.inventory, 1).tolist()
+        demand = np.round(self.demand, 1).tolist()
+        return {
+            "time": self.time,
+            "metrics": self.metrics(),
+            "nodes": {dc_id: {"inventory": inv, "demand": dem} for dc_id, inv, dem in zip(self.ids, inventory, demand)},
+        }
+
+    def describe(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Full network and state; from_dict(describe()) reproduces the twin exactly"""
+        count = self.size if limit is None else min(limit, self.size)
+        dcs = [
+            {
+                **self.dcs[i],
+                "capacity": float(self.capacity[i]),
+                "initial_inventory": float(self.initial_inventory[i]),
+                "inventory": float(self.inventory[i]),
+                "demand": float(self.demand[i]),
+                "inflow": float(self.inflow[i]),
+                "outflow": float(self.outflow[i]),
+            }
+            for i in range(count)
+        ]
+        shown = set(self.ids[:count]) if limit is not None else None
+        connections = [
+            {
+                "from": self.ids[s],
+                "to": self.ids[d],
+                "capacity": float(c),
+                "lead_time": int(t),
+                "flow": float(f),
+            }
+            for s, d, c, t, f in zip(self.src, self.dst, self.edge_capacity, self.lead_time, self.flow)
+            if shown is None or (self.ids[s] in shown and self.ids[d] in shown)
+        ]
+        return {"time": self.time, "physics": self.physics, "metrics": self.metrics(), "dcs": dcs, "connections": connections}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SupplyChainTwin":
+        dcs = [{**dc, "inventory": dc.get("initial_inventory", dc["inventory"])} for dc in data["dcs"]]
+        twin = cls(dcs, data["connections"], data.get("physics"))
+        twin.time = int(data.get("time", 0))
+        twin.inventory = np.array([dc["inventory"] for dc in data["dcs"]], dtype=np.float64)
+        twin.demand = np.array([dc.get("demand", 0.0) for dc in data["dcs"]], dtype=np.float64)
+        twin.inflow = np.array([dc.get("inflow", 0.0) for dc in data["dcs"]], dtype=np.float64)
+        twin.outflow = np.array([dc.get("outflow", 0.0) for dc in data["dcs"]], dtype=np.float64)
+        twin.flow = np.array([c.get("flow", 0.0) for c in data["connections"]], dtype=np.float64)
+        return twin
+
+    def what_if(self, steps: int, spikes: List[Dict[str, Any]] = (), sample_every: int = None) -> Dict[str, Any]:
+        """Run a copy forward with scheduled spikes ({dc_id, intensity, at}); the live twin is untouched"""
+        twin = self.copy()
+        sample_every = sample_every or max(1, math.ceil(steps / 100))
+        schedule: Dict[int, List[Dict[str, Any]]] = {}
+        for spike in spikes:
+            schedule.setdefault(int(spike.get("at", 0)), []).append(spike)
+        timeline = []
+        for t in range(steps):
+            for spike in schedule.get(t, ()):
+                twin.spike(spike["dc_id"], float(spike.get("intensity", 50.0)))
+            twin.step()
+            if (t + 1) % sample_every == 0 or t + 1 == steps:
+                timeline.append(twin.metrics())
+        level = twin.inventory / twin.capacity * 100
+        worst = np.argsort(level, kind="stable")[:10]
+        return {
+            "steps": steps,
+            "final": twin.metrics(),
+            "timeline": timeline,
+            "lowest_inventory": [{"id": twin.ids[i], "inventory": round(float(level[i]), 1)} for i in worst],
+        }
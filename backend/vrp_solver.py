@@ -0,0 +1,401 @@
+"""
+Vehicle Routing Solver for ATLAS Supply Chain OS
+Capacitated VRP/TSP with optional time windows: Clarke-Wright savings
+construction, then 2-opt and or-opt local search over a NumPy distance matrix
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+from distance_matrix import DEFAULT_ROAD_FACTOR, pairwise_distances
+
+# Below this many customers every pair is a savings candidate; above it only k nearest neighbours
+SAVINGS_ALL_PAIRS_LIMIT = 400
+SAVINGS_NEIGHBOURS = 30
+OR_OPT_MAX_SEGMENT = 3
+EPS = 1e-9
+
+Route = List[int]
+
+
+class SearchControl:
+    """Time budget, cooperative cancellation and throttled progress reports for one solve"""
+
+    def __init__(
+        self,
+        time_limit: float,
+        progress: Callable[[Dict[str, Any]], None] = None,
+        cancelled: Callable[[], bool] = None,
+        report_interval: float = 0.25,
+    ):
+        self.started = time.perf_counter()
+        self.deadline = self.started + time_limit
+        self.progress = progress
+        self.cancelled = cancelled
+        self.report_interval = report_interval
+        self.iteration = 0
+        self.moves = 0
+        self.stopped: Optional[str] = None
+        self._next_check = 0.0
+        self._next_report = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def should_stop(self) -> bool:
+        """True once the budget is spent or the job was cancelled; the cancel flag is polled sparingly"""
+        if self.stopped:
+            return True
+        now = time.perf_counter()
+        if now >= self.deadline:
+            self.stopped = "time_limit"
+        elif self.cancelled is not None and now >= self._next_check:
+            self._next_check = now + self.report_interval
+            if self.cancelled():
+                self.stopped = "cancelled"
+        return self.stopped is not None
+
+    def report(self, objective: Callable[[], float], force: bool = False):
+        if self.progress is None:
+            return
+        now = time.perf_counter()
+        if not force and now < self._next_report:
+            return
+        self._next_report = now + self.report_interval
+        elapsed = now - self.started
+        self.progress({
+            "iteration": self.iteration,
+            "objective": objective(),
+            "moves": self.moves,
+            "moves_per_sec": self.moves / elapsed if elapsed > 0 else 0.0,
+            "elapsed": elapsed,
+        })
+
+
+@dataclass
+class VRPInstance:
+    """Node 0 is the depot; distances and travel times share one unit unless speed says otherwise"""
+    coords: np.ndarray                         # (N, 2) x/y, or lat/lon for haversine
+    demands: np.ndarray                        # (N,), depot demand ignored
+    vehicle_capacity: float
+    num_vehicles: int
+    time_windows: Optional[np.ndarray] = None  # (N, 2) earliest/latest service start
+    service_times: Optional[np.ndarray] = None # (N,)
+    metric: str = "euclidean"                  # euclidean, haversine, or road (haversine x road_factor)
+    speed: float = 1.0
+    road_factor: float = DEFAULT_ROAD_FACTOR
+
+    @property
+    def size(self) -> int:
+        return len(self.coords)
+
+
+def distance_matrix(coords: np.ndarray, metric: str = "euclidean", road_factor: float = DEFAULT_ROAD_FACTOR) -> np.ndarray:
+    """Dense N x N distances; haversine and road take (lat, lon) degrees and return km"""
+    return pairwise_distances(coords, coords, metric, road_factor)
+
+
+def synthetic_instance(num_nodes: int = 200, num_vehicles: int = 50, seed: int = 0, fill: float = 0.9) -> VRPInstance:
+    """Random customers on a 100 x 100 grid around a central depot, sized so the fleet is ~fill loaded"""
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(0, 100, size=(num_nodes, 2))
+    coords[0] = (50.0, 50.0)
+    demands = rng.integers(1, 11, size=num_nodes).astype(np.float64)
+    demands[0] = 0
+    capacity = math.ceil(demands.sum() / (num_vehicles * fill)) if num_vehicles > 1 else float(demands.sum())
+    return VRPInstance(coords=coords, demands=demands, vehicle_capacity=capacity, num_vehicles=num_vehicles)
+
+
+class RoutingProblem:
+    """An instance with its distance/time matrices and route evaluation helpers"""
+
+    def __init__(self, instance: VRPInstance, dist: np.ndarray = None):
+        self.instance = instance
+        if dist is None:
+            dist = distance_matrix(instance.coords, instance.metric, instance.road_factor)
+        # Cached matrices are float32; search in float64 so move deltas and costs agree
+        self.dist = np.asarray(dist, dtype=np.float64)
+        self.demands = np.asarray(instance.demands, dtype=np.float64)
+        self.capacity = float(instance.vehicle_capacity)
+        self.has_tw = instance.time_windows is not None
+        if self.has_tw:
+            self.tw = np.asarray(instance.time_windows, dtype=np.float64)
+            self.service = (
+                np.asarray(instance.service_times, dtype=np.float64)
+                if instance.service_times is not None else np.zeros(instance.size)
+            )
+            self.travel = self.dist / instance.speed
+
+    def route_cost(self, route: Route) -> float:
+        if not route:
+            return 0.0
+        path = np.fromiter((0, *route, 0), dtype=np.int64, count=len(route) + 2)
+        return float(self.dist[path[:-1], path[1:]].sum())
+
+    def total_cost(self, routes: List[Route]) -> float:
+        return sum(self.route_cost(r) for r in routes)
+
+    def load(self, route: Route) -> float:
+        return float(self.demands[route].sum()) if route else 0.0
+
+    def time_feasible(self, route: Route) -> bool:
+        """Every stop starts service inside its window and the vehicle returns before the depot closes"""
+        if not self.has_tw:
+            return True
+        tw, travel, service = self.tw, self.travel, self.service
+        t, prev = tw[0, 0], 0
+        for node in route:
+            t = max(t + service[prev] + travel[prev, node], tw[node, 0])
+            if t > tw[node, 1] + EPS:
+                return False
+            prev = node
+        return t + service[prev] + travel[prev, 0] <= tw[0, 1] + EPS
+
+    # ---------- construction ----------
+
+    def nearest_neighbour(self) -> List[Route]:
+        """Greedy dispatcher baseline: drive to the closest reachable customer until the truck is full"""
+        n = self.instance.size
+        unvisited = np.ones(n, dtype=bool)
+        unvisited[0] = False
+        routes: List[Route] = []
+        while unvisited.any():
+            route: Route = []
+            load, current = 0.0, 0
+            while True:
+                candidates = unvisited & (self.demands + load <= self.capacity + EPS)
+                if not candidates.any():
+                    break
+                row = np.where(candidates, self.dist[current], np.inf)
+                chosen = None
+                for node in np.argsort(row)[:int(candidates.sum())]:
+                    if self.time_feasible(route + [int(node)]):
+                        chosen = int(node)
+                        break
+                if chosen is None:
+                    break
+                route.append(chosen)
+                unvisited[chosen] = False
+                load += self.demands[chosen]
+                current = chosen
+            if not route:
+                # A customer no vehicle can serve alone still gets its own (infeasible) route
+                node = int(np.flatnonzero(unvisited)[0])
+                route = [node]
+                unvisited[node] = False
+            routes.append(route)
+        return routes
+
+    def savings(self) -> List[Route]:
+        """Parallel Clarke-Wright: merge route ends in order of d(0,i) + d(0,j) - d(i,j)"""
+        d = self.dist
+        n = self.instance.size
+        customers = np.arange(1, n)
+        if n - 1 <= SAVINGS_ALL_PAIRS_LIMIT:
+            i, j = np.triu_indices(n - 1, k=1)
+            i, j = customers[i], customers[j]
+        else:
+            k = min(SAVINGS_NEIGHBOURS, n - 2)
+            sub = d[1:, 1:].copy()
+            np.fill_diagonal(sub, np.inf)
+            nearest = np.argpartition(sub, k, axis=1)[:, :k] + 1
+            i = np.repeat(customers, k)
+            j = nearest.ravel()
+            pairs = np.unique(np.stack([np.minimum(i, j), np.maximum(i, j)], axis=1), axis=0)
+            i, j = pairs[:, 0], pairs[:, 1]
+        s = d[0, i] + d[0, j] - d[i, j]
+        order = np.argsort(-s, kind="stable")
+        order = order[s[order] > EPS]
+
+        route_of = list(range(n))
+        routes: Dict[int, Route] = {c: [c] for c in range(1, n)}
+        loads: Dict[int, float] = {c: float(self.demands[c]) for c in range(1, n)}
+        for a, b in zip(i[order].tolist(), j[order].tolist()):
+            ra, rb = route_of[a], route_of[b]
+            if ra == rb or loads[ra] + loads[rb] > self.capacity + EPS:
+                continue
+            A, B = routes[ra], routes[rb]
+            if A[-1] == a and B[0] == b:
+                merged = A + B
+            elif A[0] == a and B[-1] == b:
+                merged = B + A
+            elif A[-1] == a and B[-1] == b:
+                merged = A + B[::-1]
+            elif A[0] == a and B[0] == b:
+                merged = A[::-1] + B
+            else:
+                continue
+            if self.has_tw and not self.time_feasible(merged):
+                continue
+            routes[ra] = merged
+            loads[ra] += loads.pop(rb)
+            del routes[rb]
+            for node in B:
+                route_of[node] = ra
+        return list(routes.values())
+
+    # ---------- local search ----------
+
+    def two_opt(self, route: Route, control: SearchControl = None) -> Tuple[Route, bool]:
+        """Best-improvement 2-opt inside one route, evaluating every edge pair at once"""
+        improved = False
+        while len(route) >= 3:
+            path = np.array([0, *route, 0], dtype=np.int64)
+            a, b = path[:-1], path[1:]
+            edge = self.dist[a, b]
+            delta = self.dist[a[:, None], a[None, :]] + self.dist[b[:, None], b[None, :]] - edge[:, None] - edge[None, :]
+            # Only pairs of non-adjacent edges (i, j) with j > i + 1
+            delta[np.tril_indices(len(a), k=1)] = np.inf
+            candidates = np.flatnonzero(delta < -EPS)
+            if candidates.size == 0:
+                break
+            applied = False
+            for flat in candidates[np.argsort(delta.ravel()[candidates])]:
+                i, j = divmod(int(flat), len(a))
+                new_path = path.tolist()
+                new_path[i + 1:j + 1] = new_path[i + 1:j + 1][::-1]
+                candidate = new_path[1:-1]
+                if self.time_feasible(candidate):
+                    route, applied, improved = candidate, True, True
+                    if control is not None:
+                        control.moves += 1
+                    break
+                if not self.has_tw:
+                    break
+            if not applied:
+                break
+        return route, improved
+
+    def or_opt(self, routes: List[Route], control: SearchControl = None) -> bool:
+        """Move segments of 1-3 stops to their cheapest feasible position in any route; True if anything moved"""
+        d = self.dist
+        loads = [self.load(r) for r in routes]
+        moved = False
+        slots = None
+
+        def insertion_slots():
+            # Every edge (u, v) of the solution, with the route and position it belongs to
+            us, vs, owners, positions = [], [], [], []
+            for k, other in enumerate(routes):
+                path = [0, *other, 0]
+                us.extend(path[:-1])
+                vs.extend(path[1:])
+                owners.extend([k] * (len(path) - 1))
+                positions.extend(range(len(path) - 1))
+            return np.array(us), np.array(vs), np.array(owners), np.array(positions)
+
+        for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+            r_idx = 0
+            while r_idx < len(routes):
+                if control is not None:
+                    if control.should_stop():
+                        break
+                    control.report(lambda: self.total_cost(routes))
+                route = routes[r_idx]
+                start = 0
+                while start + length <= len(route):
+                    segment = route[start:start + length]
+                    first, last = segment[0], segment[-1]
+                    prev = route[start - 1] if start > 0 else 0
+                    nxt = route[start + length] if start + length < len(route) else 0
+                    removal_gain = d[prev, first] + d[last, nxt] - d[prev, nxt]
+                    seg_load = float(self.demands[segment].sum())
+
+                    if slots is None:
+                        slots = insertion_slots()
+                    U, V, owner, position = slots
+                    forward = d[U, first] + d[last, V] - d[U, V]
+                    backward = d[U, last] + d[first, V] - d[U, V]
+                    cost = np.minimum(forward, backward)
+                    reverse = backward < forward
+                    blocked = (owner != r_idx) & (np.array(loads)[owner] + seg_load > self.capacity + EPS)
+                    # Slots touching the segment itself would not move it
+                    blocked |= (owner == r_idx) & (position >= start) & (position <= start + length)
+                    cost[blocked] = np.inf
+                    gains = removal_gain - cost
+                    applied = False
+                    for slot in np.flatnonzero(gains > EPS)[np.argsort(-gains[gains > EPS])]:
+                        target, pos = int(owner[slot]), int(position[slot])
+                        piece = segment[::-1] if reverse[slot] else segment
+                        remaining = route[:start] + route[start + length:]
+                        if target == r_idx:
+                            insert_at = pos if pos <= start else pos - length
+                            new_route = remaining[:insert_at] + piece + remaining[insert_at:]
+                            if not self.time_feasible(new_route):
+                                continue
+                            routes[r_idx] = route = new_route
+                        else:
+                            new_target = routes[target][:pos] + piece + routes[target][pos:]
+                            if not (self.time_feasible(new_target) and self.time_feasible(remaining)):
+                                continue
+                            routes[target] = new_target
+                            routes[r_idx] = route = remaining
+                            loads[target] += seg_load
+                            loads[r_idx] -= seg_load
+                        applied = moved = True
+                        slots = None
+                        if control is not None:
+                            control.moves += 1
+                        break
+                    if not applied:
+                        start += 1
+                r_idx += 1
+            # Drop routes emptied by relocations
+            keep = [k for k, r in enumerate(routes) if r]
+            if len(keep) < len(routes):
+                routes[:] = [routes[k] for k in keep]
+                loads = [loads[k] for k in keep]
+                slots = None
+        return moved
+
+
+def solve(
+    instance: VRPInstance,
+    time_limit: float = 30.0,
+    progress: Callable[[Dict[str, Any]], None] = None,
+    dist: np.ndarray = None,
+    cancelled: Callable[[], bool] = None,
+) -> Dict[str, Any]:
+    """Savings construction plus 2-opt/or-opt until no move improves, the time limit passes or cancelled() is true"""
+    control = SearchControl(time_limit, progress, cancelled)
+    problem = RoutingProblem(instance, dist)
+    baseline = problem.total_cost(problem.nearest_neighbour())
+    routes = problem.savings()
+    construction = problem.total_cost(routes)
+    control.report(lambda: construction, force=True)
+
+    while not control.should_stop():
+        control.iteration += 1
+        improved = False
+        for k, route in enumerate(routes):
+            routes[k], changed = problem.two_opt(route, control)
+            improved |= changed
+        improved |= problem.or_opt(routes, control)
+        control.report(lambda: problem.total_cost(routes), force=True)
+        if not improved:
+            break
+
+    total = problem.total_cost(routes)
+    loads = [problem.load(r) for r in routes]
+    elapsed = control.elapsed
+    return {
+        "routes": routes,
+        "total_distance": total,
+        "baseline_distance": baseline,
+        "construction_distance": construction,
+        "improvement": (baseline - total) / baseline * 100 if baseline > 0 else 0.0,
+        "vehicles_used": len(routes),
+        "feasible": len(routes) <= instance.num_vehicles
+                    and max(loads, default=0.0) <= problem.capacity + EPS
+                    and all(problem.time_feasible(r) for r in routes),
+        "capacity_utilization": sum(loads) / (len(routes) * problem.capacity) * 100 if routes else 0.0,
+        "iterations": control.iteration,
+        "moves": control.moves,
+        "solve_seconds": elapsed,
+        "stopped": control.stopped,
+    }
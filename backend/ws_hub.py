@@ -0,0 +1,409 @@
+"""
+WebSocket Broadcast Hub for ATLAS Supply Chain OS
+One producer builds and encodes each update once; the same frame is fanned
+out to every connected client through bounded per-client send queues.
+Clients may subscribe to topics, which stream keyframes and field deltas.
+Updates travel over a pub/sub backend so every worker's clients see them
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Any
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from fast_json import dumps
+from pubsub import InProcessPubSub
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to clients that cannot keep up (RFC 6455 "try again later")
+CLOSE_SLOW_CONSUMER = 1013
+
+Builder = Callable[[], Awaitable[Any]]
+
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any], path: Tuple[str, ...] = ()) -> Tuple[Dict[str, Any], List[List[str]]]:
+    """Nested patch of changed or added fields, plus key paths that were removed; lists are replaced whole"""
+    changes: Dict[str, Any] = {}
+    removed: List[List[str]] = []
+    for key, value in new.items():
+        if key not in old:
+            changes[key] = value
+            continue
+        previous = old[key]
+        if previous is value:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            sub_changes, sub_removed = diff_state(previous, value, path + (key,))
+            if sub_changes:
+                changes[key] = sub_changes
+            removed.extend(sub_removed)
+        elif previous != value:
+            changes[key] = value
+    removed.extend([*path, key] for key in old if key not in new)
+    return changes, removed
+
+
+class TopicChannel:
+    """Latest state of one topic, its sequence number and the frames that describe each change"""
+
+    def __init__(self, name: str, keyframe_every: int):
+        self.name = name
+        self.keyframe_every = keyframe_every
+        self.state: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.updated_at = 0.0
+        self._keyframe: Optional[str] = None
+        self.stats = {"keyframes": 0, "deltas": 0, "unchanged": 0}
+
+    def update(self, state: Dict[str, Any]) -> Optional[str]:
+        """Adopt a new state (not mutated afterwards) and return the frame to broadcast, if anything changed"""
+        self.updated_at = time.monotonic()
+        if self.state is None:
+            changes, removed = state, []
+        else:
+            changes, removed = diff_state(self.state, state)
+            if not changes and not removed:
+                self.stats["unchanged"] += 1
+                return None
+        self.state = state
+        self.seq += 1
+        self._keyframe = None
+        # Periodic keyframes let a client that missed a delta recover without asking
+        if self.seq == 1 or self.seq % self.keyframe_every == 0:
+            self.stats["keyframes"] += 1
+            return self.keyframe()
+        self.stats["deltas"] += 1
+        return dumps({
+            "type": "delta",
+            "topic": self.name,
+            "seq": self.seq,
+            "changes": changes,
+            "removed": removed,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }).decode()
+
+    def keyframe(self) -> Optional[str]:
+        """Full state at the current seq, encoded once per change"""
+        if self.state is None:
+            return None
+        if self._keyframe is None:
+            self._keyframe = dumps({
+                "type": "keyframe",
+                "topic": self.name,
+                "seq": self.seq,
+                "data": self.state,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }).decode()
+        return self._keyframe
+
+
+class Subscriber:
+    """One connected client: its socket, bounded frame queue, sender task and topics"""
+
+    __slots__ = ("websocket", "queue", "task", "connected_at", "sent", "evicted", "topics")
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.connected_at = time.monotonic()
+        self.sent = 0
+        self.evicted = False
+        # Empty means a legacy client that receives the untopiced broadcast
+        self.topics: Set[str] = set()
+
+
+class BroadcastHub:
+    """Fans pre-encoded text frames out to all subscribers; slow consumers are disconnected"""
+
+    def __init__(
+        self,
+        interval: float = None,
+        queue_size: int = None,
+        send_timeout: float = None,
+        keyframe_every: int = None,
+        bus: InProcessPubSub = None,
+    ):
+        self.interval = interval if interval is not None else float(os.environ.get("WS_UPDATE_INTERVAL", 5))
+        self.queue_size = queue_size or int(os.environ.get("WS_SEND_QUEUE", 16))
+        # A send blocked this long means the client's TCP window is full; treat it as slow
+        self.send_timeout = send_timeout or float(os.environ.get("WS_SEND_TIMEOUT", 10))
+        self.keyframe_every = keyframe_every or int(os.environ.get("WS_KEYFRAME_EVERY", 20))
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._build: Optional[Callable[[], Awaitable[Optional[str]]]] = None
+        self._topics: Dict[str, TopicChannel] = {}
+        self._topic_builders: Dict[str, Tuple[Builder, float]] = {}
+        self._producers: List[asyncio.Task] = []
+        # Last published legacy frame and when, so a new client is greeted without a rebuild
+        self._latest: Optional[str] = None
+        self._latest_at = 0.0
+        # Producers run on the bus leader only; every worker applies what arrives on the bus
+        self.bus = bus or InProcessPubSub()
+        self.bus.subscribe("ws.frame", self._apply_frame)
+        self.bus.subscribe("ws.state", lambda message: self.apply_state(message["topic"], message["state"]))
+        self.stats = {
+            "accepted": 0,
+            "disconnected": 0,
+            "evicted_slow": 0,
+            "peak_connections": 0,
+            "published": 0,
+            "frames_queued": 0,
+            "frames_sent": 0,
+            "frames_dropped": 0,
+            "send_errors": 0,
+        }
+
+    @property
+    def connections(self) -> int:
+        return len(self._subscribers)
+
+    # ---------- producers ----------
+
+    def add_topic(self, name: str, build: Builder, interval: float = None):
+        """Register a topic whose state dict build() returns (None = no update); polled while it has subscribers.
+
+        interval=0 makes a push-only topic: build() runs only for a first keyframe, and the
+        state otherwise arrives through apply_state()/publish_state().
+        """
+        self._topics[name] = TopicChannel(name, self.keyframe_every)
+        self._topic_builders[name] = (build, self.interval if interval is None else interval)
+
+    def topics(self) -> List[str]:
+        return list(self._topics)
+
+    def start(self, build: Callable[[], Awaitable[Optional[str]]]):
+        """Run the legacy build() and every topic builder on their intervals (idempotent; called on app startup)"""
+        self._build = build
+        if self._producers:
+            return
+        if self.interval > 0:
+            self._producers.append(asyncio.create_task(self._produce(None, self.interval)))
+        for name, (_, interval) in self._topic_builders.items():
+            if interval > 0:
+                self._producers.append(asyncio.create_task(self._produce(name, interval)))
+
+    async def _tick(self, topic: Optional[str] = None):
+        try:
+            if topic is None:
+                frame = await self._build()
+                if frame is not None:
+                    self.broadcast(frame)
+            else:
+                state = await self._topic_builders[topic][0]()
+                if state is not None:
+                    self.publish_state(topic, state)
+        except Exception as e:
+            logger.error(f"WebSocket producer error ({topic or 'agent_update'}): {e}")
+
+    async def _produce(self, topic: Optional[str], interval: float):
+        while True:
+            started = time.monotonic()
+            # Nothing is built or encoded while nobody is listening (other workers' clients count)
+            if self.bus.is_leader and (self.bus.distributed or self._listeners(topic)):
+                await self._tick(topic)
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def close(self):
+        """Stop the producers and disconnect every client (called on app shutdown)"""
+        for task in self._producers:
+            task.cancel()
+        await asyncio.gather(*self._producers, return_exceptions=True)
+        self._producers = []
+        for sub in list(self._subscribers.values()):
+            await self._close(sub, code=1001)
+
+    # ---------- fan-out ----------
+
+    def _listeners(self, topic: Optional[str]) -> List[Subscriber]:
+        if topic is None:
+            return [sub for sub in self._subscribers.values() if not sub.topics]
+        return [sub for sub in self._subscribers.values() if topic in sub.topics]
+
+    def broadcast(self, frame: str):
+        """Send a legacy frame to untopiced clients on every worker"""
+        self.bus.publish("ws.frame", frame)
+
+    def publish_state(self, topic: str, state: Dict[str, Any]):
+        """Send a new topic state to every worker, each of which diffs it for its own clients"""
+        self.bus.publish("ws.state", {"topic": topic, "state": state})
+
+    def _apply_frame(self, frame: str):
+        self._latest, self._latest_at = frame, time.monotonic()
+        self.publish(frame)
+
+    def apply_state(self, topic: str, state: Dict[str, Any]):
+        """Fold a new topic state into this worker's channel and fan out the resulting keyframe or delta"""
+        channel = self._topics.get(topic)
+        if channel is None:
+            return
+        frame = channel.update(state)
+        if frame is not None:
+            self.publish(frame, topic)
+
+    def publish(self, frame: str, topic: Optional[str] = None):
+        """Queue one encoded frame for this worker's listeners of topic (None = legacy clients)"""
+        self.stats["published"] += 1
+        for sub in self._listeners(topic):
+            self.offer(sub, frame)
+
+    def offer(self, sub: Subscriber, frame: str) -> bool:
+        """Queue a frame for one subscriber; a full queue evicts it as a slow consumer"""
+        if sub.evicted:
+            return False
+        try:
+            sub.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.stats["frames_dropped"] += 1
+            self._evict(sub)
+            return False
+        self.stats["frames_queued"] += 1
+        return True
+
+    def _evict(self, sub: Subscriber):
+        sub.evicted = True
+        self.stats["evicted_slow"] += 1
+        self.stats["frames_dropped"] += sub.queue.qsize()
+        logger.info(f"Evicting slow WebSocket client after {sub.sent} frames")
+        # Closing is awaited off the producer path; the sender task sees the eviction and stops
+        asyncio.create_task(self._close(sub, code=CLOSE_SLOW_CONSUMER))
+
+    async def _sender(self, sub: Subscriber):
+        while not sub.evicted:
+            frame = await sub.queue.get()
+            try:
+                await asyncio.wait_for(sub.websocket.send_text(frame), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                self._evict(sub)
+                return
+            except Exception:
+                self.stats["send_errors"] += 1
+                return
+            sub.sent += 1
+            self.stats["frames_sent"] += 1
+
+    async def _close(self, sub: Subscriber, code: int):
+        self._subscribers.pop(id(sub), None)
+        if sub.task is not None and sub.task is not asyncio.current_task():
+            sub.task.cancel()
+        try:
+            await asyncio.wait_for(sub.websocket.close(code=code), timeout=1.0)
+        except Exception:
+            pass
+
+    # ---------- subscriptions ----------
+
+    async def subscribe(self, sub: Subscriber, topics: Iterable[str]):
+        """Add topics to a client and send each one's current keyframe"""
+        requested = [t for t in topics if isinstance(t, str)]
+        known = [t for t in requested if t in self._topics and t not in sub.topics]
+        self.offer(sub, self._control("subscribed", topics=known, unknown=[t for t in requested if t not in self._topics]))
+        for topic in known:
+            channel = self._topics[topic]
+            interval = self._topic_builders[topic][1]
+            # The topic's producer idles without subscribers, so its state may be stale or missing;
+            # on a follower the keyframe simply arrives with the leader's next update
+            stale = interval > 0 and time.monotonic() - channel.updated_at >= interval
+            if self.bus.is_leader and (channel.state is None or stale):
+                await self._tick(topic)
+            sub.topics.add(topic)
+            self.resync(sub, topic)
+
+    def unsubscribe(self, sub: Subscriber, topics: Iterable[str]):
+        removed = [t for t in topics if t in sub.topics]
+        sub.topics.difference_update(removed)
+        self.offer(sub, self._control("unsubscribed", topics=removed))
+
+    def resync(self, sub: Subscriber, topic: str):
+        """Send a topic's keyframe to one client, e.g. after it detected a seq gap"""
+        channel = self._topics.get(topic)
+        if channel is not None and topic in sub.topics:
+            frame = channel.keyframe()
+            if frame is not None:
+                self.offer(sub, frame)
+
+    def _control(self, kind: str, **fields) -> str:
+        return dumps({"type": kind, **fields}).decode()
+
+    async def _on_message(self, sub: Subscriber, text: str):
+        """Client protocol: {"action": "subscribe" | "unsubscribe" | "resync", "topics": [...]}"""
+        try:
+            message = json.loads(text)
+            action, topics = message.get("action"), message.get("topics") or []
+            if isinstance(topics, str):
+                topics = [topics]
+        except (ValueError, AttributeError):
+            self.offer(sub, self._control("error", message="Expected a JSON object"))
+            return
+        if action == "subscribe":
+            await self.subscribe(sub, topics)
+        elif action == "unsubscribe":
+            self.unsubscribe(sub, topics)
+        elif action == "resync":
+            for topic in topics:
+                self.resync(sub, topic)
+        else:
+            self.offer(sub, self._control("error", message=f"Unknown action {action!r}"))
+
+    # ---------- connections ----------
+
+    async def serve(self, websocket: WebSocket, topics: Iterable[str] = ()):
+        """Own one client connection until it disconnects or is evicted"""
+        await websocket.accept()
+        sub = Subscriber(websocket, self.queue_size)
+        self._subscribers[id(sub)] = sub
+        self.stats["accepted"] += 1
+        self.stats["peak_connections"] = max(self.stats["peak_connections"], len(self._subscribers))
+        sub.task = asyncio.create_task(self._sender(sub))
+        try:
+            topics = list(topics)
+            if topics:
+                await self.subscribe(sub, topics)
+            else:
+                await self._greet(sub)
+            # Reading is what notices a closed socket; client messages are subscription requests
+            while not sub.evicted and not sub.task.done():
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is not None:
+                    await self._on_message(sub, message["text"])
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            self._subscribers.pop(id(sub), None)
+            sub.task.cancel()
+            self.stats["disconnected"] += 1
+
+    async def _greet(self, sub: Subscriber):
+        """Send the current legacy frame to a new client right away, building it only if the last one is stale"""
+        if self._latest is not None and (time.monotonic() - self._latest_at < self.interval or not self.bus.is_leader):
+            self.offer(sub, self._latest)
+        elif self._build is not None and self.bus.is_leader:
+            # The producer idles with no clients, so this is the first listener after a quiet period
+            await self._tick()
+
+    def get_stats(self) -> Dict[str, Any]:
+        pending = [sub.queue.qsize() for sub in self._subscribers.values()]
+        return {
+            **self.stats,
+            "connections": len(pending),
+            "max_pending_frames": max(pending, default=0),
+            "queue_size": self.queue_size,
+            "interval": self.interval,
+            "producer_running": any(not task.done() for task in self._producers),
+            "pubsub": self.bus.get_stats(),
+            "topics": {
+                name: {
+                    "seq": channel.seq,
+                    "subscribers": len(self._listeners(name)),
+                    **channel.stats,
+                }
+                for name, channel in self._topics.items()
+            },
+        }
@@ -41,6 +41,8 @@ Group=www-data
 WorkingDirectory=/var/www/atlas/backend
 Environment="PATH=/var/www/atlas/backend/venv/bin"
 EnvironmentFile=/var/www/atlas/backend/.env
+# Workers share WebSocket updates through a broker hosted by one of them
+Environment="WS_PUBSUB_BACKEND=socket"
 ExecStart=/var/www/atlas/backend/venv/bin/gunicorn server:app -w 4 -k uvicorn.workers.UvicornWorker --bind 127.0.0.1:8001 --timeout 120
 Restart=always
 RestartSec=5
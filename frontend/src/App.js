@@ -67,6 +67,9 @@ const WorldModel3D = React.lazy(() => import('./components/WorldModel3D'));
 // Hooks
 import { useWebSocket } from './hooks/useWebSocket';
 
+// Lib
+import { streamCommand } from './lib/commandStream';
+
 // Data
 import { REAL_CUSTOMER_DATA } from './data/customerData';
 
@@ -146,27 +149,34 @@ const CommandCenter = () => {
     return () => { if (ws) ws.close(); };
   }, []);
 
-  // Handle command submission
+  // Handle command submission: stream the answer so widgets render before the LLM finishes
   const handleCommand = useCallback(async (command) => {
     setIsLoading(true);
     setResponse('');
     
+    const body = { command, session_id: sessionId };
     try {
-      const res = await axios.post(`${API}/command`, {
-        command,
-        session_id: sessionId
-      });
+      let result;
+      try {
+        result = await streamCommand(`${API}/command/stream`, body, {
+          components: (data) => setUiComponents(data.ui_components),
+          delta: (data) => setResponse(prev => prev + data.text),
+        });
+      } catch (streamError) {
+        console.warn('Command stream unavailable, falling back:', streamError);
+        result = (await axios.post(`${API}/command`, body)).data;
+      }
       
-      setResponse(res.data.response);
-      setUiComponents(res.data.ui_components);
+      setResponse(result.response);
+      setUiComponents(result.ui_components);
       
       // Play success sound
       cyberSound.playSuccess();
       
       // If there's agent activity, highlight it
-      if (res.data.agent_activity) {
-        setSelectedAgent(res.data.agent_activity.type);
-        toast.success(`${res.data.agent_activity.name} activated`);
+      if (result.agent_activity) {
+        setSelectedAgent(result.agent_activity.type);
+        toast.success(`${result.agent_activity.name} activated`);
       }
       
     } catch (error) {
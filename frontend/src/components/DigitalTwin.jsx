@@ -1,7 +1,14 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { Play, Pause, Zap, TrendingUp, AlertTriangle, RotateCcw, Activity } from 'lucide-react';
+import { useTopics } from '../hooks/useTopics';
+
+const API_URL = process.env.REACT_APP_BACKEND_URL || '';
+const TWIN_TOPICS = ['twin'];
+const CASCADE_COLORS = ['#FF003C', '#FFB800', '#00F0FF'];
 
 // ============== SUPPLY CHAIN PHYSICS ENGINE ==============
+// The server steps the same physics (backend/twin_simulator.py) and streams it on the
+// "twin" topic; this browser engine only runs while that stream is unavailable.
 
 // Distribution centers with physics properties
 const INITIAL_DCS = [
@@ -58,6 +65,20 @@ const DigitalTwin = () => {
   const PHYSICS_UPDATE_INTERVAL = 100; // Update physics every 100ms instead of every frame
   const dcsRef = useRef(INITIAL_DCS);
   const cascadeEffectsRef = useRef([]);
+  const { state: pushed } = useTopics(TWIN_TOPICS);
+  const serverTwin = pushed.twin;
+  const serverTwinRef = useRef(null);
+
+  // Adopt the server's inventory and demand for the DCs drawn here
+  useEffect(() => {
+    serverTwinRef.current = serverTwin || null;
+    if (!serverTwin || !serverTwin.nodes) return;
+    setDcs(prevDcs => prevDcs.map(dc => {
+      const node = serverTwin.nodes[dc.id];
+      return node ? { ...dc, inventory: node.inventory, demand: node.demand } : dc;
+    }));
+    setSimTime(serverTwin.time);
+  }, [serverTwin]);
   
   // Keep refs in sync with state
   useEffect(() => {
@@ -81,7 +102,7 @@ const DigitalTwin = () => {
 
   // Physics simulation step
   const simulatePhysics = useCallback(() => {
-    setDcs(prevDcs => {
+    if (!serverTwinRef.current) setDcs(prevDcs => {
       const newDcs = prevDcs.map(dc => ({ ...dc }));
       const dcMap = {};
       newDcs.forEach(dc => { dcMap[dc.id] = dc; });
@@ -134,7 +155,7 @@ const DigitalTwin = () => {
       }))
     );
 
-    setSimTime(t => t + 1);
+    if (!serverTwinRef.current) setSimTime(t => t + 1);
   }, []);
 
   // Trigger demand spike at a DC
@@ -147,6 +168,34 @@ const DigitalTwin = () => {
     const targetDC = dcMap[dcId];
     if (!targetDC) return;
 
+    if (serverTwinRef.current) {
+      // The server applies the spike; its cascade drives the ripples
+      fetch(`${API_URL}/api/twin/spike`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ dc_id: dcId, intensity }),
+      })
+        .then(response => (response.ok ? response.json() : null))
+        .then(result => {
+          if (!result) return;
+          result.cascade.forEach(({ id, depth }) => {
+            const dc = dcMap[id];
+            if (!dc) return;
+            setTimeout(() => {
+              setCascadeEffects(prev => [...prev, {
+                x: dc.x,
+                y: dc.y,
+                radius: depth === 0 ? 20 : 15,
+                alpha: depth === 0 ? 1 : 0.8 - (depth - 1) * 0.15,
+                color: CASCADE_COLORS[Math.min(Math.max(depth - 1, 0), CASCADE_COLORS.length - 1)]
+              }]);
+            }, Math.max(0, depth - 1) * 300);
+          });
+        })
+        .catch(e => console.error('[ATLAS Twin] Spike failed:', e));
+      return;
+    }
+
     // Initial spike effect
     setCascadeEffects(prev => [...prev, {
       x: targetDC.x,
@@ -421,6 +470,10 @@ const DigitalTwin = () => {
 
   // Reset simulation
   const resetSimulation = () => {
+    if (serverTwinRef.current) {
+      fetch(`${API_URL}/api/twin/reset`, { method: 'POST' })
+        .catch(e => console.error('[ATLAS Twin] Reset failed:', e));
+    }
     setDcs(INITIAL_DCS);
     setCascadeEffects([]);
     setDemandSpike(null);
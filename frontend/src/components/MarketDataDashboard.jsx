@@ -1,6 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import { TrendingUp, TrendingDown, RefreshCw, AlertTriangle, Building2, Truck, Cpu, Factory, ShoppingCart, Pickaxe, FlaskConical, Brain, Bot, Car, Zap } from 'lucide-react';
 import { ScrollArea } from '../components/ui/scroll-area';
+import { useTopics } from '../hooks/useTopics';
+
+const MARKET_TOPICS = ['market.quotes', 'market.sectors', 'risk.alerts'];
 
 const SECTOR_ICONS = {
   'Logistics': Truck,
@@ -48,12 +51,34 @@ const MarketDataDashboard = () => {
     setLoading(false);
   };
 
+  // One fetch paints the dashboard; after that quote ticks, sectors and alerts are pushed over /api/ws
+  const { state: pushed, isConnected } = useTopics(MARKET_TOPICS);
+
   useEffect(() => {
     fetchData();
-    // Auto-refresh every 60 seconds
+  }, []);
+
+  // Without the socket, fall back to refreshing every 60 seconds
+  useEffect(() => {
+    if (isConnected) return undefined;
     const interval = setInterval(fetchData, 60000);
     return () => clearInterval(interval);
-  }, []);
+  }, [isConnected]);
+
+  useEffect(() => {
+    const quotes = pushed['market.quotes'];
+    const sectors = pushed['market.sectors'];
+    const risk = pushed['risk.alerts'];
+    if (!quotes && !sectors && !risk) return;
+    setData((prev) => ({
+      ...prev,
+      ...(quotes && { quotes }),
+      ...(sectors && { sector_performance: sectors.sector_performance, market_summary: sectors.market_summary }),
+      ...(risk && { risk_alerts: risk.alerts }),
+    }));
+    setLastUpdate(new Date().toLocaleTimeString());
+    setLoading(false);
+  }, [pushed]);
 
   if (loading && !data) {
     return (
@@ -255,7 +280,7 @@ const MarketDataDashboard = () => {
             </div>
           </div>
           <p className="text-xs font-mono text-white/30">
-            Data from Yahoo Finance • Updates every 60s
+            Data from Yahoo Finance • Live updates
           </p>
         </div>
       </div>
@@ -0,0 +1,103 @@
+import { useState, useEffect, useRef } from 'react';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || '';
+
+// Applies a delta frame's nested changes and removed key paths to a topic state without mutating it
+export const applyDelta = (state, changes, removed = []) => {
+  const merge = (target, patch) => {
+    const next = { ...target };
+    for (const [key, value] of Object.entries(patch)) {
+      const current = next[key];
+      next[key] =
+        value && typeof value === 'object' && !Array.isArray(value) &&
+        current && typeof current === 'object' && !Array.isArray(current)
+          ? merge(current, value)
+          : value;
+    }
+    return next;
+  };
+  const next = merge(state || {}, changes || {});
+  for (const path of removed) {
+    let parent = next;
+    for (const key of path.slice(0, -1)) {
+      if (!parent[key] || typeof parent[key] !== 'object') { parent = null; break; }
+      parent[key] = { ...parent[key] };
+      parent = parent[key];
+    }
+    if (parent) delete parent[path[path.length - 1]];
+  }
+  return next;
+};
+
+// Subscribes to /api/ws topics and keeps each one's state current from keyframes and deltas.
+// A gap in a topic's seq asks the server for a fresh keyframe.
+export const useTopics = (topics) => {
+  const [state, setState] = useState({});
+  const [isConnected, setIsConnected] = useState(false);
+  const seqRef = useRef({});
+  const key = topics.join(',');
+
+  useEffect(() => {
+    let ws = null;
+    let closed = false;
+    let attempts = 0;
+    let timer = null;
+
+    const connect = () => {
+      const wsUrl = BACKEND_URL.replace('https://', 'wss://').replace('http://', 'ws://');
+      ws = new WebSocket(`${wsUrl}/api/ws?topics=${encodeURIComponent(key)}`);
+      seqRef.current = {};
+
+      ws.onopen = () => {
+        setIsConnected(true);
+        attempts = 0;
+      };
+
+      ws.onmessage = (event) => {
+        let frame;
+        try {
+          frame = JSON.parse(event.data);
+        } catch (e) {
+          console.error('[ATLAS WebSocket] Parse error:', e);
+          return;
+        }
+        const { topic, seq } = frame;
+        if (frame.type === 'keyframe') {
+          seqRef.current[topic] = seq;
+          setState((prev) => ({ ...prev, [topic]: frame.data }));
+        } else if (frame.type === 'delta') {
+          const last = seqRef.current[topic];
+          // null/undefined: waiting for a keyframe, so deltas are ignored until it arrives
+          if (last == null) return;
+          if (seq !== last + 1) {
+            seqRef.current[topic] = null;
+            ws.send(JSON.stringify({ action: 'resync', topics: [topic] }));
+            return;
+          }
+          seqRef.current[topic] = seq;
+          setState((prev) => ({ ...prev, [topic]: applyDelta(prev[topic], frame.changes, frame.removed) }));
+        }
+      };
+
+      ws.onclose = () => {
+        setIsConnected(false);
+        if (!closed && attempts < 5) {
+          const delay = Math.min(1000 * Math.pow(2, attempts), 30000);
+          attempts += 1;
+          timer = setTimeout(connect, delay);
+        }
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(timer);
+      if (ws) ws.close();
+    };
+  }, [key]);
+
+  return { state, isConnected };
+};
+
+export default useTopics;